@@ -0,0 +1,39 @@
+"""booking overlap exclusion
+
+Revision ID: 5b1e0c7a9d21
+Revises:
+Create Date: 2026-10-16 10:00:00.000000
+
+Rejects overlapping pending/confirmed bookings of one mentor at the
+database level (Postgres only). Existing overlaps must be resolved before
+upgrading, otherwise creating the constraint fails.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e0c7a9d21'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.create_exclude_constraint(
+        "booking_no_overlap",
+        "bookings",
+        ("mentor_id", "="),
+        (sa.text("tsrange(scheduled_at, scheduled_at + duration_minutes * interval '1 minute')"), "&&"),
+        using="gist",
+        where=sa.text("status IN ('pending', 'confirmed')"),
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_constraint("booking_no_overlap", "bookings")
@@ -0,0 +1,87 @@
+"""booking ends_at
+
+Revision ID: 8c4f2d6e1a37
+Revises: 5b1e0c7a9d21
+Create Date: 2026-10-16 14:00:00.000000
+
+Stores each booking's end timestamp so overlap checks are a plain
+`scheduled_at < new_end AND ends_at > new_start` range seek on
+(mentor_id, scheduled_at, ends_at). Existing rows are backfilled in
+batches from scheduled_at + duration_minutes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f2d6e1a37'
+down_revision = '5b1e0c7a9d21'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 10000
+
+
+def _backfill(bind) -> None:
+    if bind.dialect.name == "postgresql":
+        end_expr = "scheduled_at + duration_minutes * interval '1 minute'"
+    else:
+        # Keep SQLAlchemy's "YYYY-MM-DD HH:MM:SS.ffffff" storage format
+        end_expr = (
+            "strftime('%Y-%m-%d %H:%M:%S', scheduled_at, '+' || duration_minutes || ' minutes')"
+            " || substr(scheduled_at, 20)"
+        )
+
+    while True:
+        result = bind.execute(sa.text(
+            f"UPDATE bookings SET ends_at = {end_expr} "
+            f"WHERE id IN (SELECT id FROM bookings WHERE ends_at IS NULL LIMIT {BACKFILL_BATCH})"
+        ))
+        if result.rowcount < BACKFILL_BATCH:
+            break
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == "postgresql"
+
+    op.add_column("bookings", sa.Column("ends_at", sa.DateTime(), nullable=True))
+    _backfill(bind)
+
+    with op.batch_alter_table("bookings") as batch_op:
+        batch_op.alter_column("ends_at", existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index("idx_booking_mentor_interval", "bookings", ["mentor_id", "scheduled_at", "ends_at"])
+    op.drop_index("idx_booking_mentor_scheduled", table_name="bookings")
+
+    if is_postgres:
+        op.drop_constraint("booking_no_overlap", "bookings")
+        op.create_exclude_constraint(
+            "booking_no_overlap",
+            "bookings",
+            ("mentor_id", "="),
+            (sa.text("tsrange(scheduled_at, ends_at)"), "&&"),
+            using="gist",
+            where=sa.text("status IN ('pending', 'confirmed')"),
+        )
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    if is_postgres:
+        op.drop_constraint("booking_no_overlap", "bookings")
+        op.create_exclude_constraint(
+            "booking_no_overlap",
+            "bookings",
+            ("mentor_id", "="),
+            (sa.text("tsrange(scheduled_at, scheduled_at + duration_minutes * interval '1 minute')"), "&&"),
+            using="gist",
+            where=sa.text("status IN ('pending', 'confirmed')"),
+        )
+
+    op.create_index("idx_booking_mentor_scheduled", "bookings", ["mentor_id", "scheduled_at"])
+    op.drop_index("idx_booking_mentor_interval", table_name="bookings")
+
+    with op.batch_alter_table("bookings") as batch_op:
+        batch_op.drop_column("ends_at")
@@ -0,0 +1,104 @@
+"""mentor read-path tables and indexes
+
+Revision ID: a9d2e6f4c1b7
+Revises: f5a3c8e1b0d4
+Create Date: 2026-10-17 10:00:00.000000
+
+Adds the denormalized tables the mentor list, search and availability
+endpoints read from, and the profile indexes their keyset pagination
+seeks on:
+
+- profiles: idx_profile_mentor_created, idx_profile_mentor_rate
+- mentor_stats: ratings and session counts per mentor
+- profile_languages: normalized profile languages
+- mentor_search_documents: flattened search text (GIN index on Postgres)
+- mentor_neighbors: precomputed item-item recommendations
+- mentor_weekly_availability: weekly availability bitmaps
+
+The new tables start empty. Fill them after upgrading with
+python -m app.services.mentor_stats, app.services.languages,
+app.services.mentor_search, app.services.collaborative and
+app.services.availability.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d2e6f4c1b7'
+down_revision = 'f5a3c8e1b0d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    op.create_index("idx_profile_mentor_created", "profiles", ["is_mentor", "created_at", "id"])
+    op.create_index("idx_profile_mentor_rate", "profiles", ["is_mentor", "hourly_rate", "id"])
+
+    op.create_table(
+        "mentor_stats",
+        sa.Column("profile_id", sa.Integer(), sa.ForeignKey("profiles.id"), primary_key=True),
+        sa.Column("avg_rating", sa.Float(), nullable=False),
+        sa.Column("review_count", sa.Integer(), nullable=False),
+        sa.Column("completed_sessions", sa.Integer(), nullable=False),
+        sa.Column("last_booking_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("idx_mentor_stats_rating", "mentor_stats", ["avg_rating", "profile_id"])
+    op.create_index("idx_mentor_stats_sessions", "mentor_stats", ["completed_sessions", "profile_id"])
+
+    op.create_table(
+        "profile_languages",
+        sa.Column("profile_id", sa.Integer(), sa.ForeignKey("profiles.id"), primary_key=True),
+        sa.Column("language", sa.String(50), primary_key=True),
+    )
+    op.create_index("idx_profile_language_lookup", "profile_languages", ["language", "profile_id"])
+
+    op.create_table(
+        "mentor_search_documents",
+        sa.Column("profile_id", sa.Integer(), sa.ForeignKey("profiles.id"), primary_key=True),
+        sa.Column("document", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_mentor_search_documents_updated_at", "mentor_search_documents", ["updated_at"])
+    if is_postgres:
+        op.create_index(
+            "idx_search_document_tsv",
+            "mentor_search_documents",
+            [sa.text("to_tsvector('simple'::regconfig, document)")],
+            postgresql_using="gin",
+        )
+
+    op.create_table(
+        "mentor_neighbors",
+        sa.Column("mentor_id", sa.Integer(), sa.ForeignKey("profiles.id"), primary_key=True),
+        sa.Column("rank", sa.Integer(), primary_key=True),
+        sa.Column("neighbor_id", sa.Integer(), sa.ForeignKey("profiles.id"), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+
+    op.create_table(
+        "mentor_weekly_availability",
+        sa.Column("profile_id", sa.Integer(), sa.ForeignKey("profiles.id"), primary_key=True),
+        sa.Column("bitmap", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("mentor_weekly_availability")
+    op.drop_table("mentor_neighbors")
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("idx_search_document_tsv", table_name="mentor_search_documents")
+    op.drop_index("ix_mentor_search_documents_updated_at", table_name="mentor_search_documents")
+    op.drop_table("mentor_search_documents")
+    op.drop_index("idx_profile_language_lookup", table_name="profile_languages")
+    op.drop_table("profile_languages")
+    op.drop_index("idx_mentor_stats_sessions", table_name="mentor_stats")
+    op.drop_index("idx_mentor_stats_rating", table_name="mentor_stats")
+    op.drop_table("mentor_stats")
+    op.drop_index("idx_profile_mentor_rate", table_name="profiles")
+    op.drop_index("idx_profile_mentor_created", table_name="profiles")
@@ -0,0 +1,49 @@
+"""stripe event inbox
+
+Revision ID: e41b7d2c9a58
+Revises: c27a9e4b51d3
+Create Date: 2026-10-16 20:00:00.000000
+
+Adds stripe_events, the webhook inbox keyed by Stripe event id. The
+(status, next_attempt_at) index serves the drain's claim query, the
+(object_id, created) index its per-object ordering checks.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41b7d2c9a58'
+down_revision = 'c27a9e4b51d3'
+branch_labels = None
+depends_on = None
+
+webhook_event_status = sa.Enum(
+    "pending", "processed", "superseded", "failed", name="webhookeventstatusenum"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stripe_events",
+        sa.Column("id", sa.String(255), primary_key=True),
+        sa.Column("type", sa.String(100), nullable=False),
+        sa.Column("object_id", sa.String(255), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+        sa.Column("status", webhook_event_status, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+    )
+    op.create_index("idx_stripe_event_status_next", "stripe_events", ["status", "next_attempt_at"])
+    op.create_index("idx_stripe_event_object_created", "stripe_events", ["object_id", "created"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_stripe_event_object_created", table_name="stripe_events")
+    op.drop_index("idx_stripe_event_status_next", table_name="stripe_events")
+    op.drop_table("stripe_events")
+    webhook_event_status.drop(op.get_bind(), checkfirst=True)
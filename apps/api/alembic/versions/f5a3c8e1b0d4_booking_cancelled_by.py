@@ -0,0 +1,30 @@
+"""booking cancelled_by
+
+Revision ID: f5a3c8e1b0d4
+Revises: e41b7d2c9a58
+Create Date: 2026-10-17 09:00:00.000000
+
+Records which participant (mentor or mentee profile) cancelled a booking.
+Existing cancellations keep a NULL cancelled_by.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a3c8e1b0d4'
+down_revision = 'e41b7d2c9a58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("bookings") as batch_op:
+        batch_op.add_column(sa.Column("cancelled_by", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_bookings_cancelled_by", "profiles", ["cancelled_by"], ["id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bookings") as batch_op:
+        batch_op.drop_constraint("fk_bookings_cancelled_by", type_="foreignkey")
+        batch_op.drop_column("cancelled_by")
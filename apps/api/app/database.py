@@ -1,20 +1,60 @@
-
+import datetime as dt
 import os
-from sqlalchemy import create_engine
+import uuid
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import jwt, JWTError
+from passlib.context import CryptContext
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 
+from .services.db_pool import engine_options, instrument_engine
+from .services.principal_cache import Principal, principal_cache
+from .services.replicas import REPLICA_URLS, ReplicaRouter
+from .services.token_revocation import revocation_list
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./srs.db")
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
+engine = create_engine(DATABASE_URL, echo=False, future=True, **engine_options(DATABASE_URL, "primary"))
+instrument_engine(engine, "primary")
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
-import datetime as dt
-from typing import Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from passlib.context import CryptContext
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+
+# Async drivers for the same databases, used by the hot read endpoints
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the async one (asyncpg / aiosqlite)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+# Created on first use, so processes that never serve async routes don't need the driver
+# (nor a DATABASE_URL with a known async driver)
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_engine():
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        async_url = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(
+            async_url, echo=False, **engine_options(async_url, "primary_async", is_async=True)
+        )
+        instrument_engine(_async_engine, "primary_async")
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+# Optional read replicas for read-only endpoints (DATABASE_REPLICA_URLS)
+replica_router = ReplicaRouter(REPLICA_URLS, async_database_url)
 
 Base = declarative_base()
 
@@ -54,13 +94,38 @@ class Review(Base):
     response_ms = Column(Integer, default=0)
     reviewed_at = Column(DateTime, default=dt.datetime.utcnow)
 
+class RefreshToken(Base):
+    """Refresh token (only its SHA-256 is stored); rotated on use within a session family"""
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    family_id = Column(String(32), nullable=False, index=True)  # session id, the access tokens' sid
+    created_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+class RevokedToken(Base):
+    """Access token jti or session id revoked before expiry (see services/token_revocation.py)"""
+    __tablename__ = "revoked_tokens"
+    token_id = Column(String(32), primary_key=True)
+    revoked_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 # Auth setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost; hashes made with any other cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 JWT_SECRET = os.getenv("JWT_SECRET", "dev_secret_change_me")
 JWT_ALGO = "HS256"
-ACCESS_EXPIRES_MIN = int(os.getenv("ACCESS_EXPIRES_MIN", "60"))
+# Access tokens are verified without a database lookup, so keep them short; clients renew them with
+# their refresh token (POST /auth/refresh)
+ACCESS_EXPIRES_MIN = int(os.getenv("ACCESS_EXPIRES_MIN", "15"))
 
 def get_db():
     db = SessionLocal()
@@ -69,32 +134,92 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    get_async_engine()
+    async with _async_session_factory() as db:
+        yield db
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica when routing allows, else the primary"""
+    db = replica_router.open_session(request, SessionLocal)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """Async session for read-only endpoints: a replica when routing allows, else the primary"""
+    get_async_engine()
+    db = await replica_router.open_async_session(request, _async_session_factory)
+    try:
+        yield db
+    finally:
+        await db.close()
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
-def create_access_token(data: dict, expires_delta: Optional[dt.timedelta] = None):
+def verify_and_update_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash if the stored one uses an outdated scheme or cost"""
+    if not password_hash:
+        return False, None  # Google-only accounts have no password
+    return pwd_context.verify_and_update(password, password_hash)
+
+def create_access_token(data: dict, expires_delta: Optional[dt.timedelta] = None, session_id: Optional[str] = None):
     to_encode = data.copy()
-    expire = dt.datetime.utcnow() + (expires_delta or dt.timedelta(minutes=ACCESS_EXPIRES_MIN))
-    to_encode.update({"exp": expire})
+    now = dt.datetime.utcnow()
+    expire = now + (expires_delta or dt.timedelta(minutes=ACCESS_EXPIRES_MIN))
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid.uuid4().hex})
+    if session_id:
+        to_encode["sid"] = session_id
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGO)
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def decode_access_token(db: Session, token: str) -> dict:
+    """Claims of a valid access token whose jti and session (sid) are not revoked; 401 otherwise"""
     credentials_exc = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exc
     except JWTError:
         raise credentials_exc
+    if payload.get("sub") is None:
+        raise credentials_exc
+    if revocation_list.is_revoked(db, payload.get("jti"), payload.get("sid")):
+        raise credentials_exc
+    return payload
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+    credentials_exc = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    email: str = decode_access_token(db, token)["sub"]
     user = db.query(User).filter(User.email == email).first()
     if not user:
         raise credentials_exc
     return user
 
+def get_current_principal(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    """Authenticated user id and profile, served from the principal cache when possible"""
+    from .models.mentoring import Profile
+
+    credentials_exc = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    email: str = decode_access_token(db, token)["sub"]
+
+    principal = principal_cache.get(email)
+    if principal is None:
+        row = (
+            db.query(User.id, User.email, Profile.id, Profile.is_mentor)
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .filter(User.email == email)
+            .first()
+        )
+        if not row:
+            raise credentials_exc
+        user_id, user_email, profile_id, is_mentor = row
+        principal = Principal(user_id, user_email, profile_id, bool(is_mentor))
+        principal_cache.put(email, principal)
+    return principal
+
 
 def init_db():
     Base.metadata.create_all(bind=engine)
@@ -2,16 +2,20 @@
 DayZero API - Mentoring Marketplace Backend
 """
 
+import asyncio
 import os
 import logging
 from datetime import datetime
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 # Environment setup
 from dotenv import load_dotenv
 load_dotenv()
 
+from .database import replica_router
+from .services.replicas import PRIMARY_UNTIL_HEADER, READ_METHODS, token_subject
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,8 +34,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PRIMARY_UNTIL_HEADER],
 )
 
+# Route a user's reads to the primary for a short while after they write
+@app.middleware("http")
+async def track_writes_for_replica_routing(request: Request, call_next):
+    response = await call_next(request)
+    if replica_router.enabled and request.method not in READ_METHODS and response.status_code < 400:
+        replica_router.record_write(response, token_subject(request))
+    return response
+
 # Initialize MentorMatch database
 try:
     from .mentormatch_db import init_mentormatch_db
@@ -103,6 +116,119 @@ try:
 except Exception as e:
     logger.error(f"Failed to include Auth router: {e}")
 
+try:
+    from .routers.internal import router as internal_router
+    app.include_router(internal_router)
+    logger.info("Internal router included")
+except Exception as e:
+    logger.error(f"Failed to include Internal router: {e}")
+
+# Blocking work (sync handlers, DB sessions) runs on a sized worker thread pool
+loop_lag_monitor = None
+
+
+@app.on_event("startup")
+async def configure_worker_threads():
+    global loop_lag_monitor
+    from .services.threadpool import configure_threadpool, monitor_event_loop_lag
+    configure_threadpool()
+    loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+
+
+@app.on_event("shutdown")
+async def stop_loop_lag_monitor():
+    if loop_lag_monitor is not None:
+        loop_lag_monitor.cancel()
+
+
+# Google sign-in verifies ID tokens locally; keep the signing keys fresh
+google_keys_refresher = None
+
+
+@app.on_event("startup")
+async def start_google_keys_refresher():
+    global google_keys_refresher
+    if not os.getenv("GOOGLE_CLIENT_ID"):
+        return
+    from .services.google_tokens import google_token_verifier
+    google_keys_refresher = asyncio.create_task(google_token_verifier.refresh_in_background())
+
+
+@app.on_event("shutdown")
+async def stop_google_keys_refresher():
+    if google_keys_refresher is not None:
+        google_keys_refresher.cancel()
+
+
+# Access token revocations, kept up to date in every API process: loaded in batches
+# after startup, then synced with other processes, with expired refresh tokens and
+# revocations pruned. Jobs in one scheduler run one after another, so these get
+# their own and a slow recommendation rebuild can't hold up revocation sync
+token_scheduler = None
+
+
+@app.on_event("startup")
+async def start_token_scheduler():
+    global token_scheduler
+    from .services.refresh_tokens import token_jobs
+    from .services.scheduler import Scheduler
+    token_scheduler = Scheduler(token_jobs())
+    token_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_token_scheduler():
+    if token_scheduler is not None:
+        await token_scheduler.stop()
+
+
+# Per-process recommendation matrices, rebuilt in every API process
+recommendation_scheduler = None
+
+
+@app.on_event("startup")
+async def start_recommendation_scheduler():
+    global recommendation_scheduler
+    from .services.recommendations import recommendation_jobs
+    from .services.scheduler import Scheduler
+    recommendation_scheduler = Scheduler(recommendation_jobs())
+    recommendation_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_recommendation_scheduler():
+    if recommendation_scheduler is not None:
+        await recommendation_scheduler.stop()
+
+
+# Booking/subscription lifecycle sweeps and the Stripe webhook inbox drain. Set
+# RUN_SCHEDULER=false when they run in the standalone workers instead
+# (python -m app.services.booking_lifecycle, python -m app.services.stripe_inbox).
+lifecycle_scheduler = None
+
+
+@app.on_event("startup")
+async def start_lifecycle_scheduler():
+    global lifecycle_scheduler
+    if os.getenv("RUN_SCHEDULER", "true").lower() not in ("1", "true", "yes"):
+        return
+    try:
+        from .services.booking_lifecycle import lifecycle_jobs
+        from .services.scheduler import Scheduler
+        from .services.stripe_inbox import inbox_jobs
+        lifecycle_scheduler = Scheduler(lifecycle_jobs() + inbox_jobs())
+        lifecycle_scheduler.start()
+        logger.info("Lifecycle scheduler started")
+    except Exception as e:
+        logger.error(f"Failed to start lifecycle scheduler: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_lifecycle_scheduler():
+    if lifecycle_scheduler is not None:
+        await lifecycle_scheduler.stop()
+
+
 # API Routes
 @app.get("/")
 async def root():
@@ -2,16 +2,16 @@
 
 from .database import Base, engine
 from .models import (
-    MentorProfile,
+    Profile,
     AvailabilitySlot,
     Booking,
     Session,
-    Review,
+    MentorReview,
     PaymentAccount,
     Transaction,
     Subscription,
     Tip,
-    Payout,
+    StripeEvent,
 )
 
 
@@ -13,9 +13,14 @@ from .mentoring import (
     SubscriptionStatusEnum,
     SubscriptionTierEnum,
     ReportStatusEnum,
+    WebhookEventStatusEnum,
     
     # Core Models
     Profile,
+    MentorStats,
+    ProfileLanguage,
+    MentorSearchDocument,
+    MentorNeighbor,
     Category,
     MentorCategory,
     ExpertiseTag,
@@ -29,6 +34,7 @@ from .mentoring import (
     # Availability Models
     AvailabilitySlot,
     AvailabilityOverride,
+    MentorWeeklyAvailability,
     
     # Booking & Session Models
     Booking,
@@ -39,6 +45,7 @@ from .mentoring import (
     Transaction,
     Subscription,
     Tip,
+    StripeEvent,
     
     # Review & Safety Models
     MentorReview,
@@ -55,9 +62,14 @@ __all__ = [
     "SubscriptionStatusEnum",
     "SubscriptionTierEnum",
     "ReportStatusEnum",
+    "WebhookEventStatusEnum",
     
     # Core Models
     "Profile",
+    "MentorStats",
+    "ProfileLanguage",
+    "MentorSearchDocument",
+    "MentorNeighbor",
     "Category",
     "MentorCategory",
     "ExpertiseTag",
@@ -71,6 +83,7 @@ __all__ = [
     # Availability Models
     "AvailabilitySlot",
     "AvailabilityOverride",
+    "MentorWeeklyAvailability",
     
     # Booking & Session Models
     "Booking",
@@ -81,6 +94,7 @@ __all__ = [
     "Transaction",
     "Subscription",
     "Tip",
+    "StripeEvent",
     
     # Review & Safety Models
     "MentorReview",
@@ -6,8 +6,10 @@ import datetime as dt
 from decimal import Decimal
 from sqlalchemy import (
     Column, Integer, String, DateTime, Float, ForeignKey, Boolean,
-    Text, Numeric, Time, Date, JSON, Enum, Index, UniqueConstraint
+    Text, Numeric, Time, Date, JSON, Enum, Index, UniqueConstraint, LargeBinary, text
 )
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 import enum
 
@@ -65,6 +67,13 @@ class ReportStatusEnum(str, enum.Enum):
     resolved = "resolved"
 
 
+class WebhookEventStatusEnum(str, enum.Enum):
+    pending = "pending"
+    processed = "processed"
+    superseded = "superseded"  # a newer event for the same object was applied first
+    failed = "failed"  # gave up after the maximum number of attempts
+
+
 # Models
 class Profile(Base):
     """Extended user profile for mentors and mentees"""
@@ -88,6 +97,8 @@ class Profile(Base):
     mentor_tags = relationship("MentorTag", back_populates="mentor", foreign_keys="MentorTag.mentor_id")
     availability_slots = relationship("AvailabilitySlot", back_populates="mentor")
     availability_overrides = relationship("AvailabilityOverride", back_populates="mentor")
+    stats = relationship("MentorStats", back_populates="profile", uselist=False)
+    language_entries = relationship("ProfileLanguage", back_populates="profile", cascade="all, delete-orphan")
 
     # Bookings where this profile is the mentor
     mentor_bookings = relationship("Booking", foreign_keys="Booking.mentor_id", back_populates="mentor")
@@ -106,12 +117,91 @@ class Profile(Base):
 
     __table_args__ = (
         Index('idx_profile_mentor_verified', 'is_mentor', 'is_verified'),
+        # Keyset pagination seeks on (sort key, id)
+        Index('idx_profile_mentor_created', 'is_mentor', 'created_at', 'id'),
+        Index('idx_profile_mentor_rate', 'is_mentor', 'hourly_rate', 'id'),
     )
 
     def __repr__(self):
         return f"<Profile(id={self.id}, user_id={self.user_id}, display_name='{self.display_name}', is_mentor={self.is_mentor})>"
 
 
+class ProfileLanguage(Base):
+    """Normalized profile languages for indexed language filtering"""
+    __tablename__ = "profile_languages"
+
+    profile_id = Column(Integer, ForeignKey("profiles.id"), primary_key=True)
+    language = Column(String(50), primary_key=True)  # Normalized code, e.g. "en"
+
+    # Relationships
+    profile = relationship("Profile", back_populates="language_entries")
+
+    __table_args__ = (
+        Index('idx_profile_language_lookup', 'language', 'profile_id'),
+    )
+
+    def __repr__(self):
+        return f"<ProfileLanguage(profile_id={self.profile_id}, language='{self.language}')>"
+
+
+class MentorStats(Base):
+    """Denormalized per-mentor stats, maintained on review and booking writes"""
+    __tablename__ = "mentor_stats"
+
+    profile_id = Column(Integer, ForeignKey("profiles.id"), primary_key=True)
+    avg_rating = Column(Float, default=0.0, nullable=False)
+    review_count = Column(Integer, default=0, nullable=False)
+    completed_sessions = Column(Integer, default=0, nullable=False)
+    last_booking_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow, nullable=False)
+
+    # Relationships
+    profile = relationship("Profile", back_populates="stats")
+
+    __table_args__ = (
+        Index('idx_mentor_stats_rating', 'avg_rating', 'profile_id'),
+        Index('idx_mentor_stats_sessions', 'completed_sessions', 'profile_id'),
+    )
+
+    def __repr__(self):
+        return f"<MentorStats(profile_id={self.profile_id}, avg_rating={self.avg_rating}, review_count={self.review_count})>"
+
+
+class MentorSearchDocument(Base):
+    """Flattened searchable text per mentor (name, bio, categories, tags)"""
+    __tablename__ = "mentor_search_documents"
+
+    profile_id = Column(Integer, ForeignKey("profiles.id"), primary_key=True)
+    document = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        # Full-text GIN index on Postgres; SQLite uses the in-process index
+        Index(
+            'idx_search_document_tsv',
+            text("to_tsvector('simple'::regconfig, document)"),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self):
+        return f"<MentorSearchDocument(profile_id={self.profile_id}, updated_at={self.updated_at})>"
+
+
+class MentorNeighbor(Base):
+    """Precomputed item-item neighbours from the collaborative-filtering batch job"""
+    __tablename__ = "mentor_neighbors"
+
+    mentor_id = Column(Integer, ForeignKey("profiles.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<MentorNeighbor(mentor_id={self.mentor_id}, rank={self.rank}, neighbor_id={self.neighbor_id})>"
+
+
 class Category(Base):
     """Mentoring categories with hierarchical support"""
     __tablename__ = "categories"
@@ -290,6 +380,18 @@ class AvailabilityOverride(Base):
         return f"<AvailabilityOverride(id={self.id}, mentor_id={self.mentor_id}, date={self.date}, available={self.is_available})>"
 
 
+class MentorWeeklyAvailability(Base):
+    """Weekly availability as a bitmap of 15-minute buckets from Monday 00:00, maintained on slot writes"""
+    __tablename__ = "mentor_weekly_availability"
+
+    profile_id = Column(Integer, ForeignKey("profiles.id"), primary_key=True)
+    bitmap = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<MentorWeeklyAvailability(profile_id={self.profile_id}, updated_at={self.updated_at})>"
+
+
 class Booking(Base):
     """Session bookings between mentors and mentees"""
     __tablename__ = "bookings"
@@ -299,6 +401,7 @@ class Booking(Base):
     mentee_id = Column(Integer, ForeignKey("profiles.id"), nullable=False, index=True)
     scheduled_at = Column(DateTime, nullable=False, index=True)
     duration_minutes = Column(Integer, nullable=False, default=60)
+    ends_at = Column(DateTime, nullable=False)  # scheduled_at + duration_minutes, set on flush
     status = Column(Enum(BookingStatusEnum), default=BookingStatusEnum.pending, nullable=False, index=True)
     price = Column(Numeric(10, 2), nullable=False)
     session_type = Column(Enum(SessionTypeEnum), default=SessionTypeEnum.video, nullable=False)
@@ -306,6 +409,7 @@ class Booking(Base):
     created_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
     cancelled_at = Column(DateTime, nullable=True)
     cancel_reason = Column(Text, nullable=True)
+    cancelled_by = Column(Integer, ForeignKey("profiles.id"), nullable=True)  # mentor or mentee profile
 
     # Relationships
     mentor = relationship("Profile", foreign_keys=[mentor_id], back_populates="mentor_bookings")
@@ -315,15 +419,40 @@ class Booking(Base):
     reviews = relationship("MentorReview", back_populates="booking")
 
     __table_args__ = (
-        Index('idx_booking_mentor_scheduled', 'mentor_id', 'scheduled_at'),
+        # Overlap checks seek on mentor_id and scheduled_at, filtering ends_at from the index
+        Index('idx_booking_mentor_interval', 'mentor_id', 'scheduled_at', 'ends_at'),
         Index('idx_booking_mentee_scheduled', 'mentee_id', 'scheduled_at'),
         Index('idx_booking_status_scheduled', 'status', 'scheduled_at'),
+        # Postgres rejects overlapping active bookings of one mentor (needs btree_gist)
+        ExcludeConstraint(
+            ('mentor_id', '='),
+            (text("tsrange(scheduled_at, ends_at)"), '&&'),
+            name='booking_no_overlap',
+            using='gist',
+            where=text("status IN ('pending', 'confirmed')"),
+        ).ddl_if(dialect='postgresql'),
     )
 
     def __repr__(self):
         return f"<Booking(id={self.id}, mentor_id={self.mentor_id}, mentee_id={self.mentee_id}, scheduled_at={self.scheduled_at}, status={self.status})>"
 
 
+@event.listens_for(Booking, "before_insert")
+@event.listens_for(Booking, "before_update")
+def _set_booking_end(mapper, connection, target):
+    """Keep Booking.ends_at in step with scheduled_at and duration_minutes"""
+    if target.scheduled_at is not None:
+        duration = target.duration_minutes if target.duration_minutes is not None else 60
+        target.ends_at = target.scheduled_at + dt.timedelta(minutes=duration)
+
+
+event.listen(
+    Booking.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+
+
 class Session(Base):
     """Actual session records with video/call details"""
     __tablename__ = "sessions"
@@ -428,6 +557,31 @@ class Tip(Base):
         return f"<Tip(id={self.id}, from_user_id={self.from_user_id}, to_user_id={self.to_user_id}, amount={self.amount})>"
 
 
+class StripeEvent(Base):
+    """Inbox of received Stripe webhook events, applied by services/stripe_inbox.py"""
+    __tablename__ = "stripe_events"
+
+    id = Column(String(255), primary_key=True)  # Stripe event id, so redeliveries are deduplicated
+    type = Column(String(100), nullable=False)
+    object_id = Column(String(255), nullable=False)  # events of one object are applied in created order
+    payload = Column(JSON, nullable=False)  # the event's data.object
+    created = Column(DateTime, nullable=False)  # when Stripe created the event
+    received_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
+    status = Column(Enum(WebhookEventStatusEnum), default=WebhookEventStatusEnum.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index('idx_stripe_event_status_next', 'status', 'next_attempt_at'),
+        Index('idx_stripe_event_object_created', 'object_id', 'created'),
+    )
+
+    def __repr__(self):
+        return f"<StripeEvent(id='{self.id}', type='{self.type}', status={self.status}, attempts={self.attempts})>"
+
+
 class MentorReview(Base):
     """Session reviews - renamed to avoid conflict with existing Review model"""
     __tablename__ = "mentor_reviews"
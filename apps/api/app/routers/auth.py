@@ -2,7 +2,8 @@
 Authentication Router - Register, Login, Google OAuth
 """
 
-from datetime import timedelta
+import os
+from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -10,9 +11,16 @@ from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 
 from ..database import (
-    get_db, User, hash_password, verify_password,
-    create_access_token, get_current_user, ACCESS_EXPIRES_MIN
+    get_db, User, hash_password, verify_and_update_password, oauth2_scheme,
+    create_access_token, decode_access_token, get_current_user, ACCESS_EXPIRES_MIN
 )
+from ..services.google_tokens import google_token_verifier
+from ..services.metrics import metrics
+from ..services.password_hashing import PasswordHashingBusy, RETRY_AFTER_SECONDS, password_hasher
+from ..services.refresh_tokens import (
+    InvalidRefreshToken, issue_refresh_token, revoke_access_token, revoke_session, rotate_refresh_token
+)
+from ..services.threadpool import run_blocking
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -36,43 +44,94 @@ class UserResponse(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: int = ACCESS_EXPIRES_MIN * 60
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class GoogleAuthRequest(BaseModel):
     token: str  # Google ID token
 
 
+def _email_taken(db: Session, email: str) -> bool:
+    taken = db.query(User.id).filter(User.email == email).first() is not None
+    db.rollback()  # release the connection while the password is hashed
+    return taken
+
+
+def _create_user(db: Session, user_data: UserCreate, password_hash: str) -> User:
+    user = User(
+        email=user_data.email,
+        password_hash=password_hash,
+        name=user_data.name
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _find_credentials(db: Session, email: str):
+    """(id, email, password_hash) of a user, releasing the connection before the slow verify"""
+    credentials = db.query(User.id, User.email, User.password_hash).filter(User.email == email).first()
+    db.rollback()
+    return credentials
+
+
+def _store_password_hash(db: Session, user_id: int, password_hash: str):
+    db.query(User).filter(User.id == user_id).update({User.password_hash: password_hash})
+    db.commit()
+
+
+def _issue_tokens(db: Session, user_id: int, email: str) -> TokenResponse:
+    """Start a session: a refresh token, and an access token carrying the session id"""
+    refresh_token, row = issue_refresh_token(db, user_id)
+    db.commit()
+    access_token = create_access_token(
+        data={"sub": email},
+        expires_delta=timedelta(minutes=ACCESS_EXPIRES_MIN),
+        session_id=row.family_id
+    )
+    return TokenResponse(access_token=access_token, refresh_token=refresh_token)
+
+
+async def _hash(func, *args):
+    """Run a password hashing call on the bounded hashing pool; 429 when it is saturated"""
+    try:
+        return await password_hasher.run(func, *args)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in attempts in progress, please retry",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+
 # Endpoints
+# signup and login are async so that bcrypt runs on the dedicated hashing
+# pool, not on (and not starving) the shared worker threads; their queries
+# go through run_blocking.
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user with email and password.
     """
     # Check if user exists
-    existing = db.query(User).filter(User.email == user_data.email).first()
-    if existing:
+    if await run_blocking(_email_taken, db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
     # Create user
-    user = User(
-        email=user_data.email,
-        password_hash=hash_password(user_data.password),
-        name=user_data.name
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    password_hash = await _hash(hash_password, user_data.password)
+    user = await run_blocking(_create_user, db, user_data, password_hash)
 
-    # Generate token
-    access_token = create_access_token(
-        data={"sub": user.email},
-        expires_delta=timedelta(minutes=ACCESS_EXPIRES_MIN)
-    )
-
-    return TokenResponse(access_token=access_token)
+    # Generate tokens
+    return await run_blocking(_issue_tokens, db, user.id, user.email)
 
 
 @router.post("/login", response_model=TokenResponse)
@@ -83,98 +142,120 @@ async def login(
     """
     Login with email and password (OAuth2 compatible).
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await run_blocking(_find_credentials, db, form_data.username)
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await _hash(verify_and_update_password, form_data.password, user.password_hash)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    access_token = create_access_token(
-        data={"sub": user.email},
-        expires_delta=timedelta(minutes=ACCESS_EXPIRES_MIN)
-    )
+    if new_hash:
+        # Stored hash used another cost (BCRYPT_ROUNDS changed); upgrade it transparently
+        await run_blocking(_store_password_hash, db, user.id, new_hash)
+        metrics.counter("password_hash.rehashed").inc()
 
-    return TokenResponse(access_token=access_token)
+    return await run_blocking(_issue_tokens, db, user.id, user.email)
 
 
 @router.post("/google", response_model=TokenResponse)
-async def google_auth(auth_data: GoogleAuthRequest, db: Session = Depends(get_db)):
+def google_auth(auth_data: GoogleAuthRequest, db: Session = Depends(get_db)):
     """
     Authenticate with Google OAuth.
     Creates account if user doesn't exist.
     """
-    try:
-        from google.oauth2 import id_token
-        from google.auth.transport import requests
-        import os
-
-        # Verify Google token
-        client_id = os.getenv("GOOGLE_CLIENT_ID")
-        if not client_id:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Google OAuth not configured"
-            )
-
-        idinfo = id_token.verify_oauth2_token(
-            auth_data.token,
-            requests.Request(),
-            client_id
-        )
-
-        email = idinfo.get("email")
-        name = idinfo.get("name")
-        google_id = idinfo.get("sub")
-
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email not provided by Google"
-            )
-
-        # Find or create user
-        user = db.query(User).filter(User.email == email).first()
-
-        if not user:
-            # Create new user with Google auth
-            user = User(
-                email=email,
-                password_hash="",  # No password for Google users
-                name=name,
-                google_id=google_id
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-        elif not user.google_id:
-            # Link Google account to existing user
-            user.google_id = google_id
-            if name and not user.name:
-                user.name = name
-            db.commit()
-
-        # Generate token
-        access_token = create_access_token(
-            data={"sub": user.email},
-            expires_delta=timedelta(minutes=ACCESS_EXPIRES_MIN)
+    # Verify Google token against the cached signing keys
+    client_id = os.getenv("GOOGLE_CLIENT_ID")
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Google OAuth not configured"
         )
 
-        return TokenResponse(access_token=access_token)
-
+    try:
+        idinfo = google_token_verifier.verify(auth_data.token, client_id)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid Google token: {str(e)}"
         )
-    except ImportError:
+
+    email = idinfo.get("email")
+    name = idinfo.get("name")
+    google_id = idinfo.get("sub")
+
+    if not email:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Google auth library not installed"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email not provided by Google"
         )
 
+    # Find or create user
+    user = db.query(User).filter(User.email == email).first()
+
+    if not user:
+        # Create new user with Google auth
+        user = User(
+            email=email,
+            password_hash="",  # No password for Google users
+            name=name,
+            google_id=google_id
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    elif not user.google_id:
+        # Link Google account to existing user
+        user.google_id = google_id
+        if name and not user.name:
+            user.name = name
+        db.commit()
+
+    # Generate tokens
+    return _issue_tokens(db, user.id, user.email)
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    Each refresh token works once; reusing one revokes its session.
+    """
+    try:
+        refresh_token, row = rotate_refresh_token(db, refresh_data.refresh_token)
+    except InvalidRefreshToken as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e)
+        )
+    email = db.query(User.email).filter(User.id == row.user_id).scalar()
+    db.commit()
+
+    access_token = create_access_token(
+        data={"sub": email},
+        expires_delta=timedelta(minutes=ACCESS_EXPIRES_MIN),
+        session_id=row.family_id
+    )
+    return TokenResponse(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """
+    End the current session: its refresh tokens and access tokens stop working.
+    """
+    claims = decode_access_token(db, token)
+    if claims.get("sid"):
+        revoke_session(db, claims["sid"])
+    elif claims.get("jti"):
+        revoke_access_token(db, claims["jti"], datetime.utcfromtimestamp(claims["exp"]))
+    db.commit()
+
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user: User = Depends(get_current_user)):
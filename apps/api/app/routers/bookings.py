@@ -1,83 +1,69 @@
 """Booking management endpoints for MentorMatch"""
 
-from datetime import datetime, timedelta
+from datetime import datetime
+from decimal import Decimal
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
 
-from ..database import get_db, User, get_current_user
-from ..models import Booking, MentorProfile, AvailabilitySlot, Session as SessionModel
+from ..database import get_db, get_current_principal
+from ..models import Booking, BookingStatusEnum, Profile, Session as SessionModel
+from ..services.availability import as_naive_utc
+from ..services.booking_series import book_series, expand_occurrences
+from ..services.booking_slots import SlotUnavailableError, commit_booking_slot
+from ..services.mentor_stats import record_booking
+from ..services.pagination import keyset_booking_page
+from ..services.principal_cache import Principal
+from .sessions import get_video_room_url
 from ..schemas.booking import (
     BookingCreate,
     BookingUpdate,
     BookingResponse,
     BookingDetailResponse,
-    BookingStatus,
+    BookingListItem,
+    BookingSeriesCreate,
+    BookingSeriesResponse,
+    BulkBookingAction,
+    BulkBookingRequest,
+    BulkBookingItemResult,
+    BulkBookingResponse,
+    SeriesOccurrenceResult,
 )
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
 
-def check_slot_available(
-    db: Session, mentor_id: int, scheduled_at: datetime, duration_minutes: int
-) -> bool:
-    """Check if a time slot is available for booking"""
-    end_time = scheduled_at + timedelta(minutes=duration_minutes)
-
-    # Check for overlapping bookings
-    overlapping = (
-        db.query(Booking)
-        .filter(
-            Booking.mentor_id == mentor_id,
-            Booking.status.in_(["pending", "confirmed"]),
-            or_(
-                # New booking starts during existing booking
-                and_(
-                    Booking.scheduled_at <= scheduled_at,
-                    Booking.scheduled_at
-                    + timedelta(minutes=Booking.duration_minutes)
-                    > scheduled_at,
-                ),
-                # New booking ends during existing booking
-                and_(
-                    Booking.scheduled_at < end_time,
-                    Booking.scheduled_at
-                    + timedelta(minutes=Booking.duration_minutes)
-                    >= end_time,
-                ),
-                # New booking completely contains existing booking
-                and_(
-                    Booking.scheduled_at >= scheduled_at,
-                    Booking.scheduled_at
-                    + timedelta(minutes=Booking.duration_minutes)
-                    <= end_time,
-                ),
-            ),
-        )
-        .first()
-    )
+def get_booking_price(db: Session, mentor_id: int, duration_minutes: int) -> Decimal:
+    """Calculate booking price based on the mentor's hourly rate"""
+    hourly_rate = db.query(Profile.hourly_rate).filter(Profile.id == mentor_id).scalar()
+    price = (hourly_rate or Decimal(0)) * duration_minutes / 60
+    return price.quantize(Decimal("0.01"))
 
-    return overlapping is None
 
+def price_cents(price: Optional[Decimal]) -> int:
+    """Booking price in cents, as the API reports it"""
+    return int((price or 0) * 100)
 
-def get_booking_price(
-    db: Session, mentor_id: int, session_type: str, duration_minutes: int
-) -> int:
-    """Calculate booking price based on mentor rates"""
-    profile = db.query(MentorProfile).filter(MentorProfile.user_id == mentor_id).first()
 
-    if not profile:
-        raise HTTPException(status_code=404, detail="Mentor profile not found")
+def require_profile(principal: Principal) -> int:
+    """The caller's profile id; bookings are made between profiles"""
+    if principal.profile_id is None:
+        raise HTTPException(status_code=400, detail="Create a profile before booking")
+    return principal.profile_id
 
-    if session_type == "trial":
-        return profile.trial_rate_cents
 
-    # Calculate hourly rate
-    hourly_rate = profile.hourly_rate_cents
-    price = int((hourly_rate / 60) * duration_minutes)
+def get_active_mentor(db: Session, mentor_id: int) -> Profile:
+    """The mentor's profile, if they are accepting bookings"""
+    mentor_profile = db.get(Profile, mentor_id)
 
-    return price
+    if not mentor_profile:
+        raise HTTPException(status_code=404, detail="Mentor not found")
+
+    if not mentor_profile.is_mentor:
+        raise HTTPException(status_code=400, detail="Mentor is not accepting bookings")
+
+    return mentor_profile
 
 
 def can_cancel_booking(booking: Booking) -> bool:
@@ -88,13 +74,31 @@ def can_cancel_booking(booking: Booking) -> bool:
 
 def can_reschedule_booking(booking: Booking) -> bool:
     """Check if a booking can be rescheduled"""
-    return booking.status in ["pending", "confirmed"] and booking.scheduled_at > datetime.utcnow()
+    return (
+        booking.status in (BookingStatusEnum.pending, BookingStatusEnum.confirmed)
+        and booking.scheduled_at > datetime.utcnow()
+    )
+
+
+def cancel_rejection(status: BookingStatusEnum) -> Optional[str]:
+    """Why a booking in this status can't be cancelled"""
+    if status == BookingStatusEnum.cancelled:
+        return "Booking already cancelled"
+    if status == BookingStatusEnum.completed:
+        return "Cannot cancel completed booking"
+    if status == BookingStatusEnum.no_show:
+        return "Cannot cancel a no-show booking"
+    return None
+
+
+def _video_room_url(session: Optional[SessionModel]) -> Optional[str]:
+    return get_video_room_url(session.video_room_id) if session and session.video_room_id else None
 
 
 @router.post("", response_model=BookingResponse, status_code=201)
-async def create_booking(
+def create_booking(
     booking_data: BookingCreate,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -106,63 +110,52 @@ async def create_booking(
     - Scheduled time is in the future
     - No double booking
     """
-    # Check if mentor exists and is active
-    mentor_profile = (
-        db.query(MentorProfile)
-        .filter(MentorProfile.user_id == booking_data.mentor_id)
-        .first()
-    )
+    mentee_id = require_profile(principal)
 
-    if not mentor_profile:
-        raise HTTPException(status_code=404, detail="Mentor not found")
-
-    if not mentor_profile.is_active:
-        raise HTTPException(status_code=400, detail="Mentor is not accepting bookings")
+    # Check if mentor exists and is active
+    get_active_mentor(db, booking_data.mentor_id)
 
     # Can't book yourself
-    if booking_data.mentor_id == current_user.id:
+    if booking_data.mentor_id == mentee_id:
         raise HTTPException(status_code=400, detail="Cannot book yourself as a mentor")
 
     # Check if time is in the future
     if booking_data.scheduled_at <= datetime.utcnow():
         raise HTTPException(status_code=400, detail="Scheduled time must be in the future")
 
-    # Check slot availability
-    if not check_slot_available(
-        db,
-        booking_data.mentor_id,
-        booking_data.scheduled_at,
-        booking_data.duration_minutes,
-    ):
-        raise HTTPException(status_code=400, detail="Time slot is not available")
-
     # Calculate price
-    price_cents = get_booking_price(
-        db,
-        booking_data.mentor_id,
-        booking_data.session_type.value,
-        booking_data.duration_minutes,
-    )
-
-    # Create booking
-    booking = Booking(
-        mentor_id=booking_data.mentor_id,
-        mentee_id=current_user.id,
-        scheduled_at=booking_data.scheduled_at,
-        duration_minutes=booking_data.duration_minutes,
-        session_type=booking_data.session_type.value,
-        status="pending",
-        price_cents=price_cents,
-        currency=mentor_profile.currency,
-        notes=booking_data.notes,
-    )
+    price = get_booking_price(db, booking_data.mentor_id, booking_data.duration_minutes)
+
+    def add_booking() -> Booking:
+        booking = Booking(
+            mentor_id=booking_data.mentor_id,
+            mentee_id=mentee_id,
+            scheduled_at=booking_data.scheduled_at,
+            duration_minutes=booking_data.duration_minutes,
+            session_type=booking_data.session_type.value,
+            status=BookingStatusEnum.pending,
+            price=price,
+            notes=booking_data.notes,
+        )
+        db.add(booking)
+        record_booking(db, booking_data.mentor_id)
+        return booking
 
-    db.add(booking)
-    db.commit()
+    # Check the slot and insert atomically, so concurrent requests can't double book
+    try:
+        booking = commit_booking_slot(
+            db,
+            booking_data.mentor_id,
+            booking_data.scheduled_at,
+            booking_data.duration_minutes,
+            add_booking,
+        )
+    except SlotUnavailableError:
+        raise HTTPException(status_code=400, detail="Time slot is not available")
     db.refresh(booking)
 
     # Determine if payment is required
-    payment_required = price_cents > 0
+    payment_required = price > 0
 
     return BookingResponse(
         id=booking.id,
@@ -172,58 +165,145 @@ async def create_booking(
         duration_minutes=booking.duration_minutes,
         session_type=booking.session_type,
         status=booking.status,
-        price_cents=booking.price_cents,
+        price_cents=price_cents(booking.price),
         payment_required=payment_required,
         notes=booking.notes,
         created_at=booking.created_at,
-        updated_at=booking.updated_at,
     )
 
 
-@router.get("", response_model=List[BookingResponse])
-async def list_bookings(
+@router.post("/series", response_model=BookingSeriesResponse, status_code=201)
+def create_booking_series(
+    series: BookingSeriesCreate,
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Create a recurring series of bookings
+
+    Expands the pattern in the mentor's timezone, checks every occurrence
+    against existing bookings and availability overrides in one query, and
+    books the free ones. Conflicting occurrences are reported per item
+    instead of failing the whole series.
+    """
+    if series.count is None and series.until is None:
+        raise HTTPException(status_code=400, detail="Series needs a count or an end date")
+
+    mentee_id = require_profile(principal)
+    mentor_profile = get_active_mentor(db, series.mentor_id)
+
+    if series.mentor_id == mentee_id:
+        raise HTTPException(status_code=400, detail="Cannot book yourself as a mentor")
+
+    occurrences = expand_occurrences(
+        series.scheduled_at,
+        series.duration_minutes,
+        frequency=series.frequency.value,
+        interval=series.interval,
+        count=series.count,
+        until=as_naive_utc(series.until) if series.until else None,
+        by_weekday=series.by_weekday,
+        mentor_tz=mentor_profile.timezone,
+    )
+
+    price = get_booking_price(db, series.mentor_id, series.duration_minutes)
+
+    try:
+        booking_ids, conflicts = book_series(
+            db,
+            series.mentor_id,
+            mentee_id,
+            occurrences,
+            series.duration_minutes,
+            series.session_type.value,
+            price,
+            series.notes,
+        )
+    except SlotUnavailableError:
+        raise HTTPException(status_code=409, detail="Bookings changed while creating the series, try again")
+
+    return BookingSeriesResponse(
+        mentor_id=series.mentor_id,
+        created=len(booking_ids),
+        conflicts=len(conflicts),
+        occurrences=[
+            SeriesOccurrenceResult(
+                scheduled_at=occurrence.starts_at,
+                booking_id=booking_ids.get(index),
+                conflict=conflicts.get(index),
+            )
+            for index, occurrence in enumerate(occurrences)
+        ],
+    )
+
+
+def _load_participants(db: Session, bookings: List[Booking]):
+    """Participant names and sessions for a page of bookings, in two queries"""
+    profile_ids = {b.mentor_id for b in bookings} | {b.mentee_id for b in bookings}
+    names = {
+        profile_id: name
+        for profile_id, name in db.query(Profile.id, Profile.display_name).filter(Profile.id.in_(profile_ids)).all()
+    } if profile_ids else {}
+
+    sessions = {
+        session.booking_id: session
+        for session in db.query(SessionModel).filter(
+            SessionModel.booking_id.in_([b.id for b in bookings])
+        ).all()
+    } if bookings else {}
+
+    return names, sessions
+
+
+@router.get("", response_model=List[BookingListItem])
+def list_bookings(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     upcoming_only: bool = Query(False, description="Show only upcoming bookings"),
     role: Optional[str] = Query(None, description="Filter by role: 'mentor' or 'mentee'"),
-    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor of the previous page"),
+    include_participants: bool = Query(False, description="Embed participant names and session info"),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
-    List user's bookings (as mentor and mentee)
+    List user's bookings (as mentor and mentee), newest first
 
     Query params:
     - status: Filter by booking status
     - upcoming_only: Show only future bookings
     - role: Filter by 'mentor' or 'mentee'
+    - limit / cursor: Keyset pagination on (scheduled_at, id); the cursor
+      for the next page is returned in the X-Next-Cursor header
+    - include_participants: Embed names and session info, loaded in bulk
     """
-    query = db.query(Booking)
+    if principal.profile_id is None:
+        return []
 
-    # Filter by role
-    if role == "mentor":
-        query = query.filter(Booking.mentor_id == current_user.id)
-    elif role == "mentee":
-        query = query.filter(Booking.mentee_id == current_user.id)
-    else:
-        # Show both
-        query = query.filter(
-            or_(
-                Booking.mentor_id == current_user.id,
-                Booking.mentee_id == current_user.id,
-            )
-        )
+    filters = []
 
     # Filter by status
     if status:
-        query = query.filter(Booking.status == status)
+        filters.append(Booking.status == status)
 
     # Filter upcoming only
     if upcoming_only:
-        query = query.filter(Booking.scheduled_at > datetime.utcnow())
+        filters.append(Booking.scheduled_at > datetime.utcnow())
+
+    try:
+        bookings, next_cursor = keyset_booking_page(
+            db, principal.profile_id, role if role in ("mentor", "mentee") else None, filters, cursor, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
-    bookings = query.order_by(Booking.scheduled_at.desc()).all()
+    names, sessions = _load_participants(db, bookings) if include_participants else ({}, {})
 
     return [
-        BookingResponse(
+        BookingListItem(
             id=b.id,
             mentor_id=b.mentor_id,
             mentee_id=b.mentee_id,
@@ -231,20 +311,115 @@ async def list_bookings(
             duration_minutes=b.duration_minutes,
             session_type=b.session_type,
             status=b.status,
-            price_cents=b.price_cents,
-            payment_required=b.price_cents > 0,
+            price_cents=price_cents(b.price),
+            payment_required=b.price > 0,
             notes=b.notes,
             created_at=b.created_at,
-            updated_at=b.updated_at,
+            mentor_name=names.get(b.mentor_id),
+            mentee_name=names.get(b.mentee_id),
+            session_id=sessions[b.id].id if b.id in sessions else None,
+            video_room_url=_video_room_url(sessions.get(b.id)),
         )
         for b in bookings
     ]
 
 
+# Statuses a bulk action may start from, and the status it moves bookings to
+BULK_TRANSITIONS = {
+    BulkBookingAction.CONFIRM: ([BookingStatusEnum.pending], BookingStatusEnum.confirmed),
+    BulkBookingAction.CANCEL: (
+        [BookingStatusEnum.pending, BookingStatusEnum.confirmed],
+        BookingStatusEnum.cancelled,
+    ),
+}
+
+
+def _bulk_rejection(action: BulkBookingAction, booking, profile_id: Optional[int]) -> Optional[str]:
+    """Why a booking can't take the action, with the same rules as the single endpoints"""
+    if booking is None:
+        return "Booking not found"
+
+    _, mentor_id, mentee_id, status = booking
+    if action == BulkBookingAction.CONFIRM:
+        if profile_id is None or mentor_id != profile_id:
+            return "Only the mentor can confirm the booking"
+        if status != BookingStatusEnum.pending:
+            return "Booking is not pending"
+    else:
+        if profile_id is None or profile_id not in (mentor_id, mentee_id):
+            return "Not authorized to cancel this booking"
+        return cancel_rejection(status)
+    return None
+
+
+@router.post("/bulk", response_model=BulkBookingResponse)
+def bulk_update_bookings(
+    request: BulkBookingRequest,
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Confirm or cancel many bookings at once
+
+    All bookings are validated with one query and updated with one
+    UPDATE ... WHERE id IN (...) AND status IN (...) in a single
+    transaction. Bookings that fail validation, or whose status changed
+    concurrently, are reported per item and do not block the others.
+    """
+    booking_ids = list(dict.fromkeys(request.booking_ids))
+    from_statuses, to_status = BULK_TRANSITIONS[request.action]
+
+    found = {
+        row[0]: row
+        for row in db.query(
+            Booking.id, Booking.mentor_id, Booking.mentee_id, Booking.status
+        ).filter(Booking.id.in_(booking_ids)).all()
+    }
+    errors = {
+        booking_id: error
+        for booking_id in booking_ids
+        if (error := _bulk_rejection(request.action, found.get(booking_id), principal.profile_id))
+    }
+
+    valid_ids = [booking_id for booking_id in booking_ids if booking_id not in errors]
+    updated = set()
+    if valid_ids:
+        values = {"status": to_status}
+        if request.action == BulkBookingAction.CANCEL:
+            values.update(
+                cancelled_at=datetime.utcnow(), cancel_reason=request.reason, cancelled_by=principal.profile_id
+            )
+
+        # The status guard makes the update safe against concurrent changes
+        updated = set(db.execute(
+            update(Booking)
+            .where(Booking.id.in_(valid_ids), Booking.status.in_(from_statuses))
+            .values(**values)
+            .returning(Booking.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        db.commit()
+
+    results = []
+    for booking_id in booking_ids:
+        if booking_id in updated:
+            results.append(BulkBookingItemResult(booking_id=booking_id, success=True, status=to_status.value))
+        else:
+            error = errors.get(booking_id, "Booking status changed, try again")
+            results.append(BulkBookingItemResult(booking_id=booking_id, success=False, error=error))
+
+    return BulkBookingResponse(
+        action=request.action,
+        succeeded=len(updated),
+        failed=len(booking_ids) - len(updated),
+        results=results,
+    )
+
+
 @router.get("/{booking_id}", response_model=BookingDetailResponse)
-async def get_booking(
+def get_booking(
     booking_id: int,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """Get detailed booking information"""
@@ -254,12 +429,12 @@ async def get_booking(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check authorization
-    if booking.mentor_id != current_user.id and booking.mentee_id != current_user.id:
+    if principal.profile_id is None or principal.profile_id not in (booking.mentor_id, booking.mentee_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this booking")
 
     # Get mentor and mentee names
-    mentor = db.query(User).filter(User.id == booking.mentor_id).first()
-    mentee = db.query(User).filter(User.id == booking.mentee_id).first()
+    mentor = db.get(Profile, booking.mentor_id)
+    mentee = db.get(Profile, booking.mentee_id)
 
     # Get session if exists
     session = (
@@ -276,16 +451,15 @@ async def get_booking(
         duration_minutes=booking.duration_minutes,
         session_type=booking.session_type,
         status=booking.status,
-        price_cents=booking.price_cents,
-        payment_required=booking.price_cents > 0,
+        price_cents=price_cents(booking.price),
+        payment_required=booking.price > 0,
         notes=booking.notes,
         created_at=booking.created_at,
-        updated_at=booking.updated_at,
-        mentor_name=mentor.email if mentor else None,
-        mentee_name=mentee.email if mentee else None,
+        mentor_name=mentor.display_name if mentor else None,
+        mentee_name=mentee.display_name if mentee else None,
         session_id=session.id if session else None,
-        video_room_url=session.video_room_url if session else None,
-        cancellation_reason=booking.cancellation_reason,
+        video_room_url=_video_room_url(session),
+        cancellation_reason=booking.cancel_reason,
         cancelled_at=booking.cancelled_at,
         can_cancel=can_cancel_booking(booking),
         can_reschedule=can_reschedule_booking(booking),
@@ -293,10 +467,10 @@ async def get_booking(
 
 
 @router.put("/{booking_id}/cancel", response_model=BookingResponse)
-async def cancel_booking(
+def cancel_booking(
     booking_id: int,
     reason: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -312,22 +486,19 @@ async def cancel_booking(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check authorization (mentor or mentee can cancel)
-    if booking.mentor_id != current_user.id and booking.mentee_id != current_user.id:
+    if principal.profile_id is None or principal.profile_id not in (booking.mentor_id, booking.mentee_id):
         raise HTTPException(status_code=403, detail="Not authorized to cancel this booking")
 
-    # Check if already cancelled
-    if booking.status == "cancelled":
-        raise HTTPException(status_code=400, detail="Booking already cancelled")
-
-    # Check if already completed
-    if booking.status == "completed":
-        raise HTTPException(status_code=400, detail="Cannot cancel completed booking")
+    # Only pending and confirmed bookings can be cancelled
+    rejection = cancel_rejection(booking.status)
+    if rejection:
+        raise HTTPException(status_code=400, detail=rejection)
 
     # Update booking
-    booking.status = "cancelled"
-    booking.cancellation_reason = reason
+    booking.status = BookingStatusEnum.cancelled
+    booking.cancel_reason = reason
     booking.cancelled_at = datetime.utcnow()
-    booking.cancelled_by = current_user.id
+    booking.cancelled_by = principal.profile_id
 
     db.commit()
     db.refresh(booking)
@@ -343,19 +514,18 @@ async def cancel_booking(
         duration_minutes=booking.duration_minutes,
         session_type=booking.session_type,
         status=booking.status,
-        price_cents=booking.price_cents,
+        price_cents=price_cents(booking.price),
         payment_required=False,  # Already paid/refunded
         notes=booking.notes,
         created_at=booking.created_at,
-        updated_at=booking.updated_at,
     )
 
 
 @router.put("/{booking_id}/reschedule", response_model=BookingResponse)
-async def reschedule_booking(
+def reschedule_booking(
     booking_id: int,
     reschedule_data: BookingUpdate,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """Reschedule a booking to a new time"""
@@ -365,7 +535,7 @@ async def reschedule_booking(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check authorization (only mentee can reschedule)
-    if booking.mentee_id != current_user.id:
+    if booking.mentee_id != principal.profile_id:
         raise HTTPException(
             status_code=403, detail="Only the mentee can reschedule the booking"
         )
@@ -374,38 +544,41 @@ async def reschedule_booking(
     if not can_reschedule_booking(booking):
         raise HTTPException(status_code=400, detail="Booking cannot be rescheduled")
 
-    # Update scheduled time if provided
-    if reschedule_data.scheduled_at:
-        # Check new slot availability
-        duration = reschedule_data.duration_minutes or booking.duration_minutes
+    new_price = None
+    if reschedule_data.duration_minutes:
+        # Recalculate price
+        new_price = get_booking_price(db, booking.mentor_id, reschedule_data.duration_minutes)
 
-        if not check_slot_available(
-            db, booking.mentor_id, reschedule_data.scheduled_at, duration
-        ):
-            raise HTTPException(status_code=400, detail="New time slot is not available")
+    def apply_changes() -> Booking:
+        # Re-read after a possible rollback between attempts
+        target = db.query(Booking).filter(Booking.id == booking_id).first()
 
-        booking.scheduled_at = reschedule_data.scheduled_at
+        if reschedule_data.scheduled_at:
+            target.scheduled_at = reschedule_data.scheduled_at
 
-    # Update duration if provided
-    if reschedule_data.duration_minutes:
-        # Recalculate price
-        new_price = get_booking_price(
-            db,
-            booking.mentor_id,
-            booking.session_type,
-            reschedule_data.duration_minutes,
-        )
-        booking.duration_minutes = reschedule_data.duration_minutes
-        booking.price_cents = new_price
+        if reschedule_data.duration_minutes:
+            target.duration_minutes = reschedule_data.duration_minutes
+            target.price = new_price
 
-    # Update notes if provided
-    if reschedule_data.notes is not None:
-        booking.notes = reschedule_data.notes
+        if reschedule_data.notes is not None:
+            target.notes = reschedule_data.notes
 
-    # Reset status to pending for mentor confirmation
-    booking.status = "pending"
+        # Reset status to pending for mentor confirmation
+        target.status = BookingStatusEnum.pending
+        return target
 
-    db.commit()
+    # Claim the new slot atomically; the booking's own current slot doesn't count
+    try:
+        booking = commit_booking_slot(
+            db,
+            booking.mentor_id,
+            reschedule_data.scheduled_at or booking.scheduled_at,
+            reschedule_data.duration_minutes or booking.duration_minutes,
+            apply_changes,
+            exclude_booking_id=booking.id,
+        )
+    except SlotUnavailableError:
+        raise HTTPException(status_code=400, detail="New time slot is not available")
     db.refresh(booking)
 
     return BookingResponse(
@@ -416,18 +589,17 @@ async def reschedule_booking(
         duration_minutes=booking.duration_minutes,
         session_type=booking.session_type,
         status=booking.status,
-        price_cents=booking.price_cents,
-        payment_required=booking.price_cents > 0,
+        price_cents=price_cents(booking.price),
+        payment_required=booking.price > 0,
         notes=booking.notes,
         created_at=booking.created_at,
-        updated_at=booking.updated_at,
     )
 
 
 @router.put("/{booking_id}/confirm", response_model=BookingResponse)
-async def confirm_booking(
+def confirm_booking(
     booking_id: int,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """Mentor confirms a pending booking"""
@@ -437,17 +609,17 @@ async def confirm_booking(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check authorization (only mentor can confirm)
-    if booking.mentor_id != current_user.id:
+    if booking.mentor_id != principal.profile_id:
         raise HTTPException(
             status_code=403, detail="Only the mentor can confirm the booking"
         )
 
     # Check if pending
-    if booking.status != "pending":
+    if booking.status != BookingStatusEnum.pending:
         raise HTTPException(status_code=400, detail="Booking is not pending")
 
     # Confirm booking
-    booking.status = "confirmed"
+    booking.status = BookingStatusEnum.confirmed
 
     db.commit()
     db.refresh(booking)
@@ -460,9 +632,8 @@ async def confirm_booking(
         duration_minutes=booking.duration_minutes,
         session_type=booking.session_type,
         status=booking.status,
-        price_cents=booking.price_cents,
+        price_cents=price_cents(booking.price),
         payment_required=False,  # Already confirmed
         notes=booking.notes,
         created_at=booking.created_at,
-        updated_at=booking.updated_at,
     )
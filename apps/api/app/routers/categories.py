@@ -1,69 +1,78 @@
 """
 Category browsing and discovery endpoints
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models.mentoring import Category, MentorCategory, Profile
+from ..database import get_async_read_db, get_read_db
+from ..models.mentoring import Category, MentorCategory, MentorStats, Profile
 from ..schemas.mentoring import (
     CategoryResponse, CategoryWithMentorsResponse, MentorListResponse
 )
+from ..services.mentor_cards import build_mentor_cards
+from ..services.pagination import keyset_mentor_page, mentor_sort_key, order_by_key
 
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
+def category_list_query(include_subcategories: bool = True, active_only: bool = True):
+    """Categories with their mentor counts, ordered for display"""
+    mentor_counts = (
+        select(MentorCategory.category_id, func.count(MentorCategory.mentor_id).label("mentor_count"))
+        .join(Profile, Profile.id == MentorCategory.mentor_id)
+        .where(Profile.is_mentor == True)
+        .group_by(MentorCategory.category_id)
+        .subquery()
+    )
+    query = select(Category, mentor_counts.c.mentor_count).outerjoin(
+        mentor_counts, mentor_counts.c.category_id == Category.id
+    )
+
+    if active_only:
+        query = query.where(Category.is_active == True)
+
+    if not include_subcategories:
+        query = query.where(Category.parent_id.is_(None))
+
+    return query.order_by(Category.display_order, Category.name)
+
+
 @router.get("", response_model=List[CategoryResponse])
-def list_categories(
+async def list_categories(
     include_subcategories: bool = Query(True, description="Include subcategories"),
     active_only: bool = Query(True, description="Only active categories"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List all categories with count of mentors.
 
-    Returns categories sorted by display_order and name.
+    Returns categories sorted by display_order and name. Served from the
+    async engine with one query (mentor counts are grouped per category).
     """
-    query = db.query(Category)
+    query = category_list_query(include_subcategories, active_only)
+    rows = await db.execute(query)
 
-    if active_only:
-        query = query.filter(Category.is_active == True)
-
-    # Get all categories first
-    if not include_subcategories:
-        query = query.filter(Category.parent_id.is_(None))
-
-    categories = query.order_by(Category.display_order, Category.name).all()
-
-    # Count mentors for each category
-    responses = []
-    for cat in categories:
-        # Count mentors in this category
-        mentor_count = db.query(func.count(MentorCategory.mentor_id)).filter(
-            MentorCategory.category_id == cat.id
-        ).join(Profile, Profile.id == MentorCategory.mentor_id).filter(
-            Profile.is_mentor == True
-        ).scalar()
-
-        responses.append(CategoryResponse(
+    return [
+        CategoryResponse(
             id=cat.id,
             name=cat.name,
             slug=cat.slug,
             description=cat.description,
             icon=cat.icon,
             mentor_count=mentor_count or 0
-        ))
-
-    return responses
+        )
+        for cat, mentor_count in rows
+    ]
 
 
 @router.get("/{slug}", response_model=CategoryResponse)
 def get_category(
     slug: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get category details by slug.
@@ -96,15 +105,20 @@ def get_category(
 @router.get("/{slug}/mentors", response_model=List[MentorListResponse])
 def get_category_mentors(
     slug: str,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
     sort_by: str = Query("rating", description="Sort by: rating, price, sessions"),
-    db: Session = Depends(get_db)
+    paginate: str = Query("offset", description="Pagination mode: offset or cursor"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page (implies cursor mode)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get mentors in a specific category.
 
-    Returns paginated list of mentors with their profiles.
+    Returns paginated list of mentors with their profiles. In cursor mode
+    the cursor for the next page is returned in the X-Next-Cursor header
+    (absent on the last page).
     """
     # Find category
     category = db.query(Category).filter(Category.slug == slug).first()
@@ -116,51 +130,29 @@ def get_category_mentors(
         )
 
     # Query mentors in this category
-    query = db.query(Profile).join(MentorCategory).filter(
+    query = db.query(Profile).join(MentorCategory).outerjoin(
+        MentorStats, MentorStats.profile_id == Profile.id
+    ).filter(
         MentorCategory.category_id == category.id,
         Profile.is_mentor == True
     )
 
-    # Apply sorting
-    if sort_by == "rating":
-        # For now, we'll sort by created_at since we don't have ratings in Profile model yet
-        # In production, you'd calculate average rating
-        query = query.order_by(Profile.created_at.desc())
-    elif sort_by == "price":
-        query = query.order_by(Profile.hourly_rate.asc())
-    elif sort_by == "sessions":
-        # Would need to count sessions from bookings
-        query = query.order_by(Profile.created_at.desc())
+    if paginate == "cursor" or cursor is not None:
+        # Seek past the last (sort key, id) instead of OFFSET
+        try:
+            mentors, next_cursor = keyset_mentor_page(query, sort_by, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     else:
-        query = query.order_by(Profile.created_at.desc())
+        # Apply sorting
+        sort_by, key_column, descending = mentor_sort_key(sort_by)
+        query = order_by_key(query, key_column, Profile.id, descending)
 
-    # Apply pagination
-    offset = (page - 1) * limit
-    mentors = query.offset(offset).limit(limit).all()
+        # Apply pagination
+        offset = (page - 1) * limit
+        mentors = query.offset(offset).limit(limit).all()
 
     # Build responses
-    responses = []
-    for mentor in mentors:
-        # Get all categories for this mentor
-        mentor_cats = db.query(Category).join(MentorCategory).filter(
-            MentorCategory.mentor_id == mentor.id
-        ).all()
-
-        # For now, set default values for fields not in Profile model
-        responses.append(MentorListResponse(
-            id=mentor.id,
-            user_id=mentor.user_id,
-            headline=mentor.bio[:100] if mentor.bio else None,  # Use first 100 chars of bio as headline
-            languages=",".join(mentor.languages) if mentor.languages else None,
-            hourly_rate=float(mentor.hourly_rate) if mentor.hourly_rate else None,
-            currency="EUR",
-            is_available=True,  # Default
-            avg_rating=0.0,  # Would need to calculate from reviews
-            total_reviews=0,  # Would need to count from reviews
-            total_sessions=0,  # Would need to count from bookings
-            profile_image_url=mentor.avatar_url,
-            is_verified=mentor.is_verified,
-            categories=[cat.name for cat in mentor_cats]
-        ))
-
-    return responses
+    return build_mentor_cards(db, mentors)
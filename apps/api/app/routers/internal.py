@@ -0,0 +1,26 @@
+"""
+Internal operational endpoints
+"""
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+
+from ..services.metrics import metrics
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+# Requests must send it in the X-Internal-Token header; unset, the endpoints are disabled
+INTERNAL_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN", "")
+
+
+@router.get("/metrics")
+def get_metrics(
+    prefix: str = Query("", description="Only metrics whose name starts with this"),
+    x_internal_token: Optional[str] = Header(None),
+):
+    """Snapshot of this process's in-process metrics"""
+    if not INTERNAL_TOKEN or not secrets.compare_digest(x_internal_token or "", INTERNAL_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return metrics.snapshot(prefix)
@@ -6,26 +6,79 @@ from typing import List, Optional
 from math import ceil
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import and_, or_, func
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from ..database import get_db, get_current_user, User
+from ..database import get_async_read_db, get_db, get_current_principal
 from ..models.mentoring import (
     Profile, Category, MentorReview, MentorLike, MentorSave, Match,
-    AvailabilitySlot, MentorCategory
+    AvailabilitySlot, MentorCategory, MentorStats, ProfileLanguage, MentorSearchDocument
 )
 from ..schemas.mentoring import (
     MentorListResponse, MentorDetailResponse, MentorFilters,
     LikeResponse, SaveResponse, CategoryResponse, ReviewResponse,
-    AvailabilitySlotResponse, MentorListWithPagination, PaginationMetadata
+    AvailabilitySlotResponse, MentorListWithPagination, PaginationMetadata,
+    MentorSearchResult, MentorSearchResponse, MentorAvailabilityResult,
+    MentorAvailabilitySearchResponse, TimeWindow
 )
+from ..services.availability import get_free_slots, search_available_mentors, as_naive_utc
+from ..services.collaborative import similar_mentors
+from ..services.languages import normalize_language
+from ..services.mentor_cards import build_mentor_cards
+from ..services.principal_cache import Principal, principal_cache
+from ..services.mentor_search import mentor_search_index, is_postgres, postgres_search
+from ..services.pagination import keyset_mentor_page, mentor_sort_key, order_by_key
+from ..services.recommendations import recommendation_engine
+from ..services.timezones import get_zone, is_valid_zone
 
 
 router = APIRouter(prefix="/mentors", tags=["Mentors"])
 
+# Upper bound on ranked hits considered by the in-process search index
+MAX_SEARCH_CANDIDATES = 1000
+
+# Longest window accepted by the multi-mentor availability search
+MAX_AVAILABILITY_WINDOW = dt.timedelta(days=7)
+
+# Upper bound on filtered mentors (best rated first) checked by the availability search
+MAX_AVAILABILITY_CANDIDATES = 1000
+
+
+def _apply_mentor_filters(
+    db: Session,
+    query,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    language: Optional[str] = None,
+):
+    """Apply the shared category/price/language filters to a Profile query"""
+    if category:
+        cat = db.query(Category).filter(Category.slug == category, Category.is_active == True).first()
+        if cat:
+            query = query.join(MentorCategory).filter(MentorCategory.category_id == cat.id)
+
+    if min_price is not None:
+        query = query.filter(Profile.hourly_rate >= min_price)
+
+    if max_price is not None:
+        query = query.filter(Profile.hourly_rate <= max_price)
+
+    if language:
+        # Indexed lookup on the normalized language table
+        query = query.filter(Profile.id.in_(
+            db.query(ProfileLanguage.profile_id).filter(
+                ProfileLanguage.language == normalize_language(language)
+            )
+        ))
+
+    return query
+
 
 @router.get("", response_model=MentorListWithPagination)
-def list_mentors(
+async def list_mentors(
     category: Optional[str] = Query(None, description="Filter by category slug"),
     min_price: Optional[float] = Query(None, description="Minimum hourly rate"),
     max_price: Optional[float] = Query(None, description="Maximum hourly rate"),
@@ -35,146 +88,270 @@ def list_mentors(
     sort_by: str = Query("rating", description="Sort by: rating, price, sessions, created"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    paginate: str = Query("offset", description="Pagination mode: offset or cursor"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page (implies cursor mode)"),
+    include_total: Optional[bool] = Query(None, description="Count total matches (default: on for offset, off for cursor mode)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List mentors with filtering, sorting, and pagination.
 
     Returns a paginated list of mentors matching the specified criteria.
+    In cursor mode, pages are fetched by seeking past the last row's sort
+    key instead of using OFFSET; pass pagination.next_cursor back as
+    `cursor` to fetch the next page.
     """
-    query = db.query(Profile).filter(Profile.is_mentor == True)
-
-    # Apply filters
-    if category:
-        cat = db.query(Category).filter(Category.slug == category, Category.is_active == True).first()
-        if cat:
-            query = query.join(MentorCategory).filter(MentorCategory.category_id == cat.id)
+    # The filter, pagination and card helpers are shared with the sync routes;
+    # run_sync runs them on this session's async connection
+    return await db.run_sync(
+        _list_mentors_page, category, min_price, max_price, language, available_now,
+        rating_min, sort_by, page, limit, paginate, cursor, include_total,
+    )
 
-    if min_price is not None:
-        query = query.filter(Profile.hourly_rate >= min_price)
 
-    if max_price is not None:
-        query = query.filter(Profile.hourly_rate <= max_price)
+def _list_mentors_page(
+    db: Session,
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    language: Optional[str],
+    available_now: Optional[bool],
+    rating_min: Optional[float],
+    sort_by: str,
+    page: int,
+    limit: int,
+    paginate: str,
+    cursor: Optional[str],
+    include_total: Optional[bool],
+) -> MentorListWithPagination:
+    query = db.query(Profile).outerjoin(
+        MentorStats, MentorStats.profile_id == Profile.id
+    ).filter(Profile.is_mentor == True)
 
-    if language:
-        # languages is JSON array, use contains for JSON
-        from sqlalchemy.dialects.postgresql import ARRAY
-        # For SQLite compatibility, we'll use a simple filter
-        query = query.filter(func.json_array_length(Profile.languages) > 0)
+    # Apply filters
+    query = _apply_mentor_filters(db, query, category, min_price, max_price, language)
 
     if available_now:
         # For now, assume all mentors are available (no is_available field in Profile)
         pass
 
     if rating_min is not None:
-        # Rating calculation would need to be done via subquery from MentorReview
-        # For now, skip this filter
-        pass
+        query = query.filter(MentorStats.avg_rating >= rating_min)
+
+    use_cursor = paginate == "cursor" or cursor is not None
+    if include_total is None:
+        include_total = not use_cursor
 
-    # Count total before pagination
-    total = query.count()
-
-    # Apply sorting
-    if sort_by == "rating":
-        # Would need subquery for rating, use created_at for now
-        query = query.order_by(Profile.created_at.desc())
-    elif sort_by == "price":
-        query = query.order_by(Profile.hourly_rate.asc())
-    elif sort_by == "sessions":
-        # Would need count from bookings, use created_at for now
-        query = query.order_by(Profile.created_at.desc())
-    elif sort_by == "created":
-        query = query.order_by(Profile.created_at.desc())
+    # Count total before pagination (optional in cursor mode)
+    total = query.count() if include_total else None
+
+    if use_cursor:
+        # Seek past the last (sort key, id) instead of OFFSET
+        try:
+            mentors, next_cursor = keyset_mentor_page(query, sort_by, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     else:
-        query = query.order_by(Profile.created_at.desc())
+        sort_by, key_column, descending = mentor_sort_key(sort_by)
+        query = order_by_key(query, key_column, Profile.id, descending)
 
-    # Apply pagination
-    offset = (page - 1) * limit
-    mentors = query.offset(offset).limit(limit).all()
-
-    # Build response with categories
-    mentor_responses = []
-    for mentor in mentors:
-        categories = db.query(Category).join(MentorCategory).filter(
-            MentorCategory.mentor_id == mentor.id
-        ).all()
-
-        # Calculate stats from reviews
-        avg_rating = db.query(func.avg(MentorReview.rating)).filter(
-            MentorReview.reviewee_id == mentor.id,
-            MentorReview.is_public == True
-        ).scalar() or 0.0
+        # Apply pagination
+        offset = (page - 1) * limit
+        mentors = query.offset(offset).limit(limit).all()
+        next_cursor = None
 
-        total_reviews = db.query(func.count(MentorReview.id)).filter(
-            MentorReview.reviewee_id == mentor.id,
-            MentorReview.is_public == True
-        ).scalar() or 0
-
-        mentor_dict = {
-            "id": mentor.id,
-            "user_id": mentor.user_id,
-            "headline": mentor.bio[:100] if mentor.bio else None,  # First 100 chars of bio
-            "languages": ",".join(mentor.languages) if mentor.languages else None,
-            "hourly_rate": float(mentor.hourly_rate) if mentor.hourly_rate else None,
-            "currency": "EUR",
-            "is_available": True,  # Default
-            "avg_rating": float(avg_rating),
-            "total_reviews": total_reviews,
-            "total_sessions": 0,  # Would need to count from Booking
-            "profile_image_url": mentor.avatar_url,
-            "is_verified": mentor.is_verified,
-            "categories": [cat.name for cat in categories]
-        }
-        mentor_responses.append(MentorListResponse(**mentor_dict))
+    # Build response cards (categories + review stats batched per page)
+    mentor_responses = build_mentor_cards(db, mentors)
 
     # Build pagination metadata
-    total_pages = ceil(total / limit) if total > 0 else 0
+    total_pages = None
+    if total is not None:
+        total_pages = ceil(total / limit) if total > 0 else 0
     pagination = PaginationMetadata(
         page=page,
         limit=limit,
         total=total,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None if use_cursor else page < (total_pages or 0)
     )
 
     return MentorListWithPagination(mentors=mentor_responses, pagination=pagination)
 
 
+@router.get("/search", response_model=MentorSearchResponse)
+def search_mentors(
+    q: str = Query(..., min_length=2, max_length=200, description="Search keywords"),
+    category: Optional[str] = Query(None, description="Filter by category slug"),
+    min_price: Optional[float] = Query(None, description="Minimum hourly rate"),
+    max_price: Optional[float] = Query(None, description="Maximum hourly rate"),
+    language: Optional[str] = Query(None, description="Filter by language code"),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(10, ge=1, le=100, description="Items per page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Keyword search across mentor names, bios, categories and expertise tags.
+
+    Results are ranked by relevance (Postgres full-text rank, or BM25 from
+    the in-process index on SQLite) and can be combined with the usual
+    category/price/language filters.
+    """
+    query = _apply_mentor_filters(
+        db, db.query(Profile).filter(Profile.is_mentor == True),
+        category, min_price, max_price, language
+    )
+    offset = (page - 1) * limit
+
+    if is_postgres(db):
+        search = postgres_search(q)
+        if search is None:
+            ranked, total = [], 0
+        else:
+            match, rank = search
+            query = query.join(
+                MentorSearchDocument, MentorSearchDocument.profile_id == Profile.id
+            ).filter(match)
+            total = query.count()
+            ranked = query.add_columns(rank).order_by(
+                rank.desc(), Profile.id
+            ).offset(offset).limit(limit).all()
+    else:
+        mentor_search_index.refresh(db)
+        scores = dict(mentor_search_index.search(q, MAX_SEARCH_CANDIDATES))
+        matches = query.filter(Profile.id.in_(list(scores))).all() if scores else []
+        matches.sort(key=lambda mentor: (-scores[mentor.id], mentor.id))
+        total = len(matches)
+        ranked = [(mentor, scores[mentor.id]) for mentor in matches[offset:offset + limit]]
+
+    cards = build_mentor_cards(db, [mentor for mentor, _ in ranked])
+    results = [
+        MentorSearchResult(**card.model_dump(), score=round(float(score), 4))
+        for card, (_, score) in zip(cards, ranked)
+    ]
+
+    total_pages = ceil(total / limit) if total > 0 else 0
+    return MentorSearchResponse(
+        query=q,
+        mentors=results,
+        pagination=PaginationMetadata(
+            page=page,
+            limit=limit,
+            total=total,
+            total_pages=total_pages,
+            has_more=page < total_pages
+        )
+    )
+
+
+@router.get("/available", response_model=MentorAvailabilitySearchResponse)
+def search_available_mentors_endpoint(
+    start: dt.datetime = Query(..., description="Window start (ISO 8601, UTC if no offset)"),
+    end: dt.datetime = Query(..., description="Window end (ISO 8601, UTC if no offset)"),
+    duration: int = Query(60, ge=15, le=180, description="Required free minutes in a row"),
+    category: Optional[str] = Query(None, description="Filter by category slug"),
+    min_price: Optional[float] = Query(None, description="Minimum hourly rate"),
+    max_price: Optional[float] = Query(None, description="Maximum hourly rate"),
+    language: Optional[str] = Query(None, description="Filter by language code"),
+    rating_min: Optional[float] = Query(None, description="Minimum rating (0-5)"),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(10, ge=1, le=100, description="Items per page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Find mentors who are free for `duration` minutes somewhere in a time window.
+
+    Accepts the usual list filters. Mentors are ordered by their earliest
+    free time, then rating; each comes with its free stretches in the window.
+    Only the MAX_AVAILABILITY_CANDIDATES best rated matching mentors are
+    checked, and full profiles are loaded only for the page returned.
+    """
+    start, end = as_naive_utc(start), as_naive_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    if end - start > MAX_AVAILABILITY_WINDOW:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Window must be at most 7 days")
+
+    query = db.query(Profile.id, Profile.timezone).outerjoin(
+        MentorStats, MentorStats.profile_id == Profile.id
+    ).filter(Profile.is_mentor == True)
+    query = _apply_mentor_filters(db, query, category, min_price, max_price, language)
+    if rating_min is not None:
+        query = query.filter(MentorStats.avg_rating >= rating_min)
+    query = order_by_key(query, MentorStats.avg_rating, Profile.id, descending=True)
+
+    matches = search_available_mentors(db, query, start, end, duration, max_candidates=MAX_AVAILABILITY_CANDIDATES)
+    # Stable sort keeps rating order among mentors free at the same time
+    matches.sort(key=lambda match: match[1][0][0])
+
+    total = len(matches)
+    offset = (page - 1) * limit
+    page_matches = matches[offset:offset + limit]
+
+    page_ids = [mentor_id for mentor_id, _ in page_matches]
+    mentors = {mentor.id: mentor for mentor in db.query(Profile).filter(Profile.id.in_(page_ids))} if page_ids else {}
+    cards = build_mentor_cards(db, [mentors[mentor_id] for mentor_id in page_ids])
+    results = [
+        MentorAvailabilityResult(
+            **card.model_dump(),
+            free_windows=[TimeWindow(start=begin, end=finish) for begin, finish in windows]
+        )
+        for card, (_, windows) in zip(cards, page_matches)
+    ]
+
+    total_pages = ceil(total / limit) if total > 0 else 0
+    return MentorAvailabilitySearchResponse(
+        start=start,
+        end=end,
+        duration_minutes=duration,
+        mentors=results,
+        pagination=PaginationMetadata(
+            page=page,
+            limit=limit,
+            total=total,
+            total_pages=total_pages,
+            has_more=page < total_pages
+        )
+    )
+
+
 @router.get("/{mentor_id}", response_model=MentorDetailResponse)
-def get_mentor_detail(
+async def get_mentor_detail(
     mentor_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get detailed mentor profile including reviews, categories, and availability.
     """
-    mentor = db.query(Profile).filter(Profile.id == mentor_id, Profile.is_mentor == True).first()
+    mentor = (await db.execute(
+        select(Profile).where(Profile.id == mentor_id, Profile.is_mentor == True)
+    )).scalar_one_or_none()
     if not mentor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mentor not found")
 
     # Get categories
-    categories = db.query(Category).join(MentorCategory).filter(
-        MentorCategory.mentor_id == mentor.id
-    ).all()
+    categories = (await db.execute(
+        select(Category).join(MentorCategory).where(MentorCategory.mentor_id == mentor.id)
+    )).scalars().all()
 
     # Get reviews
-    reviews = db.query(MentorReview).filter(
-        MentorReview.reviewee_id == mentor_id,
-        MentorReview.is_public == True
-    ).order_by(MentorReview.created_at.desc()).limit(20).all()
+    reviews = (await db.execute(
+        select(MentorReview).where(
+            MentorReview.reviewee_id == mentor_id,
+            MentorReview.is_public == True
+        ).order_by(MentorReview.created_at.desc()).limit(20)
+    )).scalars().all()
 
     # Get availability slots
-    availability = db.query(AvailabilitySlot).filter(
-        AvailabilitySlot.mentor_id == mentor_id,
-        AvailabilitySlot.is_active == True
-    ).all()
-
-    # Calculate stats
-    avg_rating = db.query(func.avg(MentorReview.rating)).filter(
-        MentorReview.reviewee_id == mentor.id,
-        MentorReview.is_public == True
-    ).scalar() or 0.0
+    availability = (await db.execute(
+        select(AvailabilitySlot).where(
+            AvailabilitySlot.mentor_id == mentor_id,
+            AvailabilitySlot.is_active == True
+        )
+    )).scalars().all()
 
-    total_reviews = len(reviews)
+    # Stats are denormalized into MentorStats
+    stats = await db.get(MentorStats, mentor.id)
 
     # Build response
     return MentorDetailResponse(
@@ -187,9 +364,9 @@ def get_mentor_detail(
         currency="EUR",
         is_available=True,  # Default
         timezone=mentor.timezone,
-        avg_rating=float(avg_rating),
-        total_reviews=total_reviews,
-        total_sessions=0,  # Would need to count from Booking
+        avg_rating=float(stats.avg_rating) if stats else 0.0,
+        total_reviews=stats.review_count if stats else 0,
+        total_sessions=stats.completed_sessions if stats else 0,
         profile_image_url=mentor.avatar_url,
         video_intro_url=None,  # Not in Profile model
         is_verified=mentor.is_verified,
@@ -211,67 +388,92 @@ def get_mentor_detail(
     )
 
 
+@router.get("/{mentor_id}/similar", response_model=List[MentorListResponse])
+def get_similar_mentors(
+    mentor_id: int,
+    limit: int = Query(10, ge=1, le=20, description="Number of similar mentors"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get mentors that mentees who liked, saved or booked this mentor also engaged with.
+
+    Reads neighbour lists precomputed by the collaborative-filtering batch job
+    (python -m app.services.collaborative); new mentors have none until the next run.
+    """
+    mentor = db.query(Profile.id).filter(Profile.id == mentor_id, Profile.is_mentor == True).first()
+    if not mentor:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mentor not found")
+
+    return build_mentor_cards(db, similar_mentors(db, mentor_id, limit))
+
+
 @router.get("/{mentor_id}/availability")
 def get_mentor_availability(
     mentor_id: int,
     days: int = Query(14, ge=1, le=30, description="Number of days ahead to check"),
+    slot_minutes: int = Query(60, ge=5, le=240, description="Spacing between slot start times"),
+    duration: int = Query(60, ge=15, le=180, description="Length of each slot in minutes"),
+    tz: Optional[str] = Query(None, description="IANA timezone to return slots in (default: mentor's timezone)"),
     db: Session = Depends(get_db)
 ):
     """
     Get mentor's available time slots for the next N days.
 
-    Returns a list of available datetime slots based on mentor's weekly availability.
+    Weekly availability, date overrides and pending/confirmed bookings are
+    combined, so every returned slot can actually be booked. Availability is
+    evaluated in the mentor's timezone and slots are returned with a UTC
+    offset in the requested timezone.
     """
+    if tz is not None and not is_valid_zone(tz):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown timezone")
+
     mentor = db.query(Profile).filter(Profile.id == mentor_id, Profile.is_mentor == True).first()
     if not mentor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mentor not found")
 
-    # Get mentor's availability slots
-    slots = db.query(AvailabilitySlot).filter(
-        AvailabilitySlot.mentor_id == mentor_id,
-        AvailabilitySlot.is_active == True
-    ).all()
-
-    if not slots:
+    slots = get_free_slots(
+        db, mentor_id, days, granularity=slot_minutes, duration=duration,
+        mentor_tz=mentor.timezone, output_tz=tz
+    )
+    if slots is None:
         return {"available_slots": [], "message": "No availability configured"}
 
-    # Generate available datetime slots for next N days
-    available_slots = []
-    today = dt.date.today()
-
-    for day_offset in range(days):
-        check_date = today + dt.timedelta(days=day_offset)
-        day_of_week = check_date.weekday()  # 0=Monday, 6=Sunday
-
-        # Find slots for this day of week
-        day_slots = [s for s in slots if s.day_of_week == day_of_week]
-
-        for slot in day_slots:
-            # start_time and end_time are already time objects
-            slot_start = dt.datetime.combine(check_date, slot.start_time)
-            slot_end = dt.datetime.combine(check_date, slot.end_time)
-
-            # For simplicity, create 1-hour blocks within the slot
-            current = slot_start
-            while current + dt.timedelta(hours=1) <= slot_end:
-                if current >= dt.datetime.now():  # Only future slots
-                    available_slots.append({
-                        "start": current.isoformat(),
-                        "end": (current + dt.timedelta(hours=1)).isoformat()
-                    })
-                current += dt.timedelta(hours=1)
-
     return {
         "mentor_id": mentor_id,
-        "timezone": mentor.timezone or "UTC",
-        "available_slots": available_slots[:100]  # Limit to 100 slots
+        "timezone": tz or get_zone(mentor.timezone).key,
+        "mentor_timezone": mentor.timezone or "UTC",
+        "available_slots": [
+            {"start": start.isoformat(), "end": end.isoformat()}
+            for start, end in slots
+        ]
     }
 
 
+def _get_or_create_profile_id(db: Session, principal: Principal) -> int:
+    """The principal's profile id, creating a basic mentee profile if there is none"""
+    if principal.profile_id is not None:
+        return principal.profile_id
+
+    profile = Profile(
+        user_id=principal.user_id,
+        display_name=principal.email.split('@')[0],
+        is_mentor=False
+    )
+    db.add(profile)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Created concurrently (or the cached principal was stale)
+        db.rollback()
+        profile = db.query(Profile).filter(Profile.user_id == principal.user_id).one()
+    principal_cache.invalidate_user(principal.user_id)
+    return profile.id
+
+
 @router.post("/{mentor_id}/like", response_model=LikeResponse)
 def like_mentor(
     mentor_id: int,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -285,20 +487,11 @@ def like_mentor(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mentor not found")
 
     # Get or create user's profile
-    user_profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-    if not user_profile:
-        user_profile = Profile(
-            user_id=user.id,
-            display_name=user.email.split('@')[0],
-            is_mentor=False
-        )
-        db.add(user_profile)
-        db.commit()
-        db.refresh(user_profile)
+    profile_id = _get_or_create_profile_id(db, principal)
 
     # Check if already liked
     existing_like = db.query(MentorLike).filter(
-        MentorLike.mentee_id == user_profile.id,
+        MentorLike.mentee_id == profile_id,
         MentorLike.mentor_id == mentor_id
     ).first()
 
@@ -310,13 +503,13 @@ def like_mentor(
         )
 
     # Create like
-    new_like = MentorLike(mentee_id=user_profile.id, mentor_id=mentor_id)
+    new_like = MentorLike(mentee_id=profile_id, mentor_id=mentor_id)
     db.add(new_like)
 
     # Check for mutual like (if mentor has a user profile and liked back)
     # For simplicity, we'll just check if a match already exists
     existing_match = db.query(Match).filter(
-        Match.mentee_id == user_profile.id,
+        Match.mentee_id == profile_id,
         Match.mentor_id == mentor_id
     ).first()
 
@@ -339,7 +532,7 @@ def like_mentor(
 @router.post("/{mentor_id}/save", response_model=SaveResponse)
 def save_mentor(
     mentor_id: int,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -353,20 +546,11 @@ def save_mentor(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mentor not found")
 
     # Get or create user's profile
-    user_profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-    if not user_profile:
-        user_profile = Profile(
-            user_id=user.id,
-            display_name=user.email.split('@')[0],
-            is_mentor=False
-        )
-        db.add(user_profile)
-        db.commit()
-        db.refresh(user_profile)
+    profile_id = _get_or_create_profile_id(db, principal)
 
     # Check if already saved
     existing = db.query(MentorSave).filter(
-        MentorSave.mentee_id == user_profile.id,
+        MentorSave.mentee_id == profile_id,
         MentorSave.mentor_id == mentor_id
     ).first()
 
@@ -378,7 +562,7 @@ def save_mentor(
         )
 
     # Save mentor
-    saved = MentorSave(mentee_id=user_profile.id, mentor_id=mentor_id)
+    saved = MentorSave(mentee_id=profile_id, mentor_id=mentor_id)
     db.add(saved)
     db.commit()
 
@@ -392,7 +576,7 @@ def save_mentor(
 @router.delete("/{mentor_id}/save", response_model=SaveResponse)
 def unsave_mentor(
     mentor_id: int,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -401,8 +585,8 @@ def unsave_mentor(
     Requires authentication.
     """
     # Get user's profile
-    user_profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-    if not user_profile:
+    profile_id = principal.profile_id
+    if profile_id is None:
         return SaveResponse(
             success=True,
             saved=False,
@@ -410,7 +594,7 @@ def unsave_mentor(
         )
 
     saved = db.query(MentorSave).filter(
-        MentorSave.mentee_id == user_profile.id,
+        MentorSave.mentee_id == profile_id,
         MentorSave.mentor_id == mentor_id
     ).first()
 
@@ -433,7 +617,7 @@ def unsave_mentor(
 
 @router.get("/saved/list", response_model=List[MentorListResponse])
 def get_saved_mentors(
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -442,12 +626,12 @@ def get_saved_mentors(
     Requires authentication.
     """
     # Get user's profile
-    user_profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-    if not user_profile:
+    profile_id = principal.profile_id
+    if profile_id is None:
         return []
 
     saved_ids = db.query(MentorSave.mentor_id).filter(
-        MentorSave.mentee_id == user_profile.id
+        MentorSave.mentee_id == profile_id
     ).all()
 
     mentor_ids = [s[0] for s in saved_ids]
@@ -458,111 +642,36 @@ def get_saved_mentors(
     mentors = db.query(Profile).filter(Profile.id.in_(mentor_ids), Profile.is_mentor == True).all()
 
     # Build responses with categories
-    responses = []
-    for mentor in mentors:
-        categories = db.query(Category).join(MentorCategory).filter(
-            MentorCategory.mentor_id == mentor.id
-        ).all()
-
-        # Calculate stats
-        avg_rating = db.query(func.avg(MentorReview.rating)).filter(
-            MentorReview.reviewee_id == mentor.id,
-            MentorReview.is_public == True
-        ).scalar() or 0.0
-
-        total_reviews = db.query(func.count(MentorReview.id)).filter(
-            MentorReview.reviewee_id == mentor.id,
-            MentorReview.is_public == True
-        ).scalar() or 0
-
-        mentor_dict = {
-            "id": mentor.id,
-            "user_id": mentor.user_id,
-            "headline": mentor.bio[:100] if mentor.bio else None,
-            "languages": ",".join(mentor.languages) if mentor.languages else None,
-            "hourly_rate": float(mentor.hourly_rate) if mentor.hourly_rate else None,
-            "currency": "EUR",
-            "is_available": True,
-            "avg_rating": float(avg_rating),
-            "total_reviews": total_reviews,
-            "total_sessions": 0,
-            "profile_image_url": mentor.avatar_url,
-            "is_verified": mentor.is_verified,
-            "categories": [cat.name for cat in categories]
-        }
-        responses.append(MentorListResponse(**mentor_dict))
-
-    return responses
+    return build_mentor_cards(db, mentors)
 
 
 @router.get("/recommended/list", response_model=List[MentorListResponse])
 def get_recommended_mentors(
     limit: int = Query(10, ge=1, le=50, description="Number of recommendations"),
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Get recommended mentors based on user preferences.
 
-    Simple algorithm: matches categories of interest and prioritizes high ratings.
+    Mentors are scored against the categories, tags and price bands of the
+    mentors the user has liked, saved or booked, restricted to shared languages and
+    weighted by rating and engagement. Falls back to the newest mentors
+    when nothing matches.
     Requires authentication.
     """
-    # Get user profile
-    user_profile = db.query(Profile).filter(Profile.user_id == user.id).first()
-
-    query = db.query(Profile).filter(Profile.is_mentor == True)
-
-    # If user has preferred languages, filter by those
-    if user_profile and user_profile.languages:
-        user_langs = user_profile.languages if isinstance(user_profile.languages, list) else []
-        if user_langs:
-            # Filter mentors who have at least one language in common
-            # For JSON array, we'd need a more complex query
-            # For simplicity, just get all mentors for now
-            pass
-
-    # Order by created_at (since we don't have avg_rating readily available)
-    mentors = query.order_by(Profile.created_at.desc()).limit(limit).all()
+    # Get user profile (languages are needed, so load it by primary key)
+    user_profile = db.get(Profile, principal.profile_id) if principal.profile_id is not None else None
 
-    # If no matches, just get recent mentors
-    if not mentors:
+    mentor_ids = recommendation_engine.recommend(db, user_profile, limit)
+    if mentor_ids:
+        by_id = {mentor.id: mentor for mentor in db.query(Profile).filter(Profile.id.in_(mentor_ids)).all()}
+        mentors = [by_id[mentor_id] for mentor_id in mentor_ids if mentor_id in by_id]
+    else:
+        # If no matches, just get recent mentors
         mentors = db.query(Profile).filter(
             Profile.is_mentor == True
         ).order_by(Profile.created_at.desc()).limit(limit).all()
 
     # Build responses
-    responses = []
-    for mentor in mentors:
-        categories = db.query(Category).join(MentorCategory).filter(
-            MentorCategory.mentor_id == mentor.id
-        ).all()
-
-        # Calculate stats
-        avg_rating = db.query(func.avg(MentorReview.rating)).filter(
-            MentorReview.reviewee_id == mentor.id,
-            MentorReview.is_public == True
-        ).scalar() or 0.0
-
-        total_reviews = db.query(func.count(MentorReview.id)).filter(
-            MentorReview.reviewee_id == mentor.id,
-            MentorReview.is_public == True
-        ).scalar() or 0
-
-        mentor_dict = {
-            "id": mentor.id,
-            "user_id": mentor.user_id,
-            "headline": mentor.bio[:100] if mentor.bio else None,
-            "languages": ",".join(mentor.languages) if mentor.languages else None,
-            "hourly_rate": float(mentor.hourly_rate) if mentor.hourly_rate else None,
-            "currency": "EUR",
-            "is_available": True,
-            "avg_rating": float(avg_rating),
-            "total_reviews": total_reviews,
-            "total_sessions": 0,
-            "profile_image_url": mentor.avatar_url,
-            "is_verified": mentor.is_verified,
-            "categories": [cat.name for cat in categories]
-        }
-        responses.append(MentorListResponse(**mentor_dict))
-
-    return responses
+    return build_mentor_cards(db, mentors)
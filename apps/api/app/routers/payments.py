@@ -1,43 +1,69 @@
 """Payment and transaction endpoints for MentorMatch"""
 
-from datetime import datetime
+from decimal import Decimal
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from sqlalchemy import or_
 from sqlalchemy.orm import Session as DBSession
 
-from ..database import get_db, User, get_current_user
+from ..database import get_db, get_current_principal
 from ..models import (
     PaymentAccount,
+    PaymentStatusEnum,
+    Profile,
     Transaction,
     Booking,
-    Subscription,
     Tip,
-    Payout,
-    MentorProfile,
 )
 from ..schemas.payment import (
-    PaymentAccountResponse,
     ConnectOnboardingResponse,
     ConnectStatusResponse,
     CheckoutSessionCreate,
     CheckoutSessionResponse,
     TransactionResponse,
-    SubscriptionCreate,
-    SubscriptionResponse,
+    TransactionType,
     TipCreate,
     TipResponse,
     PayoutResponse,
 )
+from ..services.principal_cache import Principal
+from ..services.stripe_inbox import record_event
 from ..services.stripe_service import stripe_service
+from ..services.threadpool import run_blocking
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
+# Share of each booking payment kept by the platform
+PLATFORM_FEE_RATE = Decimal("0.10")
+CURRENCY = "usd"
+
+
+def to_cents(amount: Optional[Decimal]) -> int:
+    return int((amount or 0) * 100)
+
+
+def get_mentor_payment_account(db: DBSession, mentor_id: int) -> PaymentAccount:
+    """The Connect account of a mentor (by profile id), if it can take payments"""
+    payment_account = (
+        db.query(PaymentAccount)
+        .join(Profile, Profile.user_id == PaymentAccount.user_id)
+        .filter(Profile.id == mentor_id)
+        .first()
+    )
+
+    if not payment_account or not payment_account.onboarding_complete:
+        raise HTTPException(
+            status_code=400, detail="Mentor cannot accept payments at this time"
+        )
+
+    return payment_account
+
 
 @router.post("/connect/onboard", response_model=ConnectOnboardingResponse)
-async def start_connect_onboarding(
+def start_connect_onboarding(
     refresh_url: str,
     return_url: str,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """
@@ -47,13 +73,7 @@ async def start_connect_onboarding(
     then returns an onboarding URL.
     """
     # Check if user has a mentor profile
-    mentor_profile = (
-        db.query(MentorProfile)
-        .filter(MentorProfile.user_id == current_user.id)
-        .first()
-    )
-
-    if not mentor_profile:
+    if not principal.is_mentor:
         raise HTTPException(
             status_code=400, detail="Must create mentor profile before onboarding"
         )
@@ -61,7 +81,7 @@ async def start_connect_onboarding(
     # Check if payment account already exists
     payment_account = (
         db.query(PaymentAccount)
-        .filter(PaymentAccount.user_id == current_user.id)
+        .filter(PaymentAccount.user_id == principal.user_id)
         .first()
     )
 
@@ -85,18 +105,14 @@ async def start_connect_onboarding(
     # Create new Stripe Connect account
     try:
         account = stripe_service.create_connect_account(
-            email=current_user.email, country="US"
+            email=principal.email, country="US"
         )
 
         # Save to database
         payment_account = PaymentAccount(
-            user_id=current_user.id,
+            user_id=principal.user_id,
             stripe_account_id=account["account_id"],
-            is_active=account["charges_enabled"] and account["payouts_enabled"],
-            payouts_enabled=account["payouts_enabled"],
-            charges_enabled=account["charges_enabled"],
-            details_submitted=account["details_submitted"],
-            default_currency="USD",
+            onboarding_complete=account["charges_enabled"] and account["payouts_enabled"],
         )
 
         db.add(payment_account)
@@ -120,14 +136,14 @@ async def start_connect_onboarding(
 
 
 @router.get("/connect/status", response_model=ConnectStatusResponse)
-async def get_connect_status(
-    current_user: User = Depends(get_current_user),
+def get_connect_status(
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """Check Stripe Connect account status"""
     payment_account = (
         db.query(PaymentAccount)
-        .filter(PaymentAccount.user_id == current_user.id)
+        .filter(PaymentAccount.user_id == principal.user_id)
         .first()
     )
 
@@ -138,10 +154,7 @@ async def get_connect_status(
         status = stripe_service.get_account_status(payment_account.stripe_account_id)
 
         # Update local database
-        payment_account.is_active = status["is_active"]
-        payment_account.payouts_enabled = status["payouts_enabled"]
-        payment_account.charges_enabled = status["charges_enabled"]
-        payment_account.details_submitted = status["details_submitted"]
+        payment_account.onboarding_complete = status["is_active"]
         db.commit()
 
         return ConnectStatusResponse(
@@ -159,15 +172,17 @@ async def get_connect_status(
 
 
 @router.post("/checkout", response_model=CheckoutSessionResponse)
-async def create_checkout_session(
+def create_checkout_session(
     checkout_data: CheckoutSessionCreate,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """
     Create a Stripe checkout session for a booking
 
-    Returns a checkout URL that the user can be redirected to.
+    Returns a checkout URL that the user can be redirected to. The booking's
+    transaction stays pending until the checkout.session.completed webhook
+    is applied by the inbox worker.
     """
     # Get booking
     booking = (
@@ -178,68 +193,52 @@ async def create_checkout_session(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check authorization
-    if booking.mentee_id != current_user.id:
+    if principal.profile_id is None or booking.mentee_id != principal.profile_id:
         raise HTTPException(
             status_code=403, detail="Not authorized to pay for this booking"
         )
 
     # Check if already paid
-    existing_transaction = (
+    transaction = (
         db.query(Transaction)
-        .filter(
-            Transaction.booking_id == booking.id,
-            Transaction.status == "succeeded",
-        )
+        .filter(Transaction.booking_id == booking.id)
         .first()
     )
 
-    if existing_transaction:
+    if transaction and transaction.status == PaymentStatusEnum.completed:
         raise HTTPException(status_code=400, detail="Booking already paid")
 
     # Get mentor's payment account
-    payment_account = (
-        db.query(PaymentAccount)
-        .filter(PaymentAccount.user_id == booking.mentor_id)
-        .first()
-    )
-
-    if not payment_account or not payment_account.charges_enabled:
-        raise HTTPException(
-            status_code=400, detail="Mentor cannot accept payments at this time"
-        )
+    payment_account = get_mentor_payment_account(db, booking.mentor_id)
 
-    # Calculate platform fee (e.g., 10%)
-    platform_fee_cents = int(booking.price_cents * 0.10)
+    # Calculate platform fee
+    platform_fee = (booking.price * PLATFORM_FEE_RATE).quantize(Decimal("0.01"))
 
     try:
         # Create checkout session
         result = stripe_service.create_checkout_session(
-            amount_cents=booking.price_cents,
-            currency=booking.currency.lower(),
+            amount_cents=to_cents(booking.price),
+            currency=CURRENCY,
             success_url=checkout_data.success_url,
             cancel_url=checkout_data.cancel_url,
             metadata={
                 "booking_id": str(booking.id),
-                "user_id": str(current_user.id),
+                "user_id": str(principal.user_id),
                 "mentor_id": str(booking.mentor_id),
             },
             connected_account_id=payment_account.stripe_account_id,
-            application_fee_cents=platform_fee_cents,
+            application_fee_cents=to_cents(platform_fee),
         )
 
-        # Create pending transaction
-        transaction = Transaction(
-            user_id=current_user.id,
-            type="booking",
-            status="pending",
-            amount_cents=booking.price_cents,
-            currency=booking.currency,
-            booking_id=booking.id,
-            description=f"Booking #{booking.id}",
-            metadata={"checkout_session_id": result["checkout_session_id"]},
-        )
+        # Create the pending transaction, or reuse the one of an abandoned checkout
+        if transaction is None:
+            transaction = Transaction(booking_id=booking.id)
+            db.add(transaction)
+        transaction.amount = booking.price
+        transaction.platform_fee = platform_fee
+        transaction.mentor_payout = booking.price - platform_fee
+        transaction.status = PaymentStatusEnum.pending
 
-        db.add(transaction)
         db.commit()
 
         return CheckoutSessionResponse(
@@ -261,139 +260,37 @@ async def handle_stripe_webhook(
     """
     Handle Stripe webhooks
 
-    Processes events like:
-    - payment_intent.succeeded
-    - payment_intent.failed
-    - checkout.session.completed
-    - customer.subscription.created
-    - customer.subscription.updated
-    - customer.subscription.deleted
+    Verified events are stored in the webhook inbox and acknowledged right
+    away; the inbox worker applies them (see services/stripe_inbox.py).
+    Redelivered events are acknowledged without being stored again.
     """
     # Get raw body
     payload = await request.body()
 
+    # Signature verification and the insert block, so they run on the worker pool
     try:
-        event = stripe_service.handle_webhook(payload, stripe_signature)
+        event = await run_blocking(stripe_service.handle_webhook, payload, stripe_signature)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    event_type = event["event_type"]
-    event_data = event["data"]
-
-    # Handle different event types
-    if event_type == "checkout.session.completed":
-        # Update transaction status
-        checkout_session_id = event_data["id"]
-
-        transaction = (
-            db.query(Transaction)
-            .filter(Transaction.metadata["checkout_session_id"].astext == checkout_session_id)
-            .first()
-        )
-
-        if transaction:
-            transaction.status = "succeeded"
-            transaction.stripe_payment_intent_id = event_data.get("payment_intent")
-
-            # Update booking status
-            if transaction.booking_id:
-                booking = (
-                    db.query(Booking)
-                    .filter(Booking.id == transaction.booking_id)
-                    .first()
-                )
-                if booking:
-                    booking.status = "confirmed"
-
-            db.commit()
-
-    elif event_type == "payment_intent.succeeded":
-        payment_intent_id = event_data["id"]
-
-        transaction = (
-            db.query(Transaction)
-            .filter(Transaction.stripe_payment_intent_id == payment_intent_id)
-            .first()
-        )
-
-        if transaction:
-            transaction.status = "succeeded"
-            transaction.stripe_charge_id = event_data.get("latest_charge")
-            db.commit()
-
-    elif event_type == "payment_intent.payment_failed":
-        payment_intent_id = event_data["id"]
-
-        transaction = (
-            db.query(Transaction)
-            .filter(Transaction.stripe_payment_intent_id == payment_intent_id)
-            .first()
-        )
-
-        if transaction:
-            transaction.status = "failed"
-            db.commit()
-
-    elif event_type == "customer.subscription.created":
-        # Handle subscription creation
-        stripe_subscription_id = event_data["id"]
-
-        subscription = (
-            db.query(Subscription)
-            .filter(Subscription.stripe_subscription_id == stripe_subscription_id)
-            .first()
-        )
-
-        if subscription:
-            subscription.status = event_data["status"]
-            db.commit()
-
-    elif event_type == "customer.subscription.updated":
-        # Handle subscription updates
-        stripe_subscription_id = event_data["id"]
-
-        subscription = (
-            db.query(Subscription)
-            .filter(Subscription.stripe_subscription_id == stripe_subscription_id)
-            .first()
-        )
-
-        if subscription:
-            subscription.status = event_data["status"]
-            subscription.current_period_start = datetime.utcfromtimestamp(
-                event_data["current_period_start"]
-            )
-            subscription.current_period_end = datetime.utcfromtimestamp(
-                event_data["current_period_end"]
-            )
-            db.commit()
-
-    elif event_type == "customer.subscription.deleted":
-        # Handle subscription cancellation
-        stripe_subscription_id = event_data["id"]
-
-        subscription = (
-            db.query(Subscription)
-            .filter(Subscription.stripe_subscription_id == stripe_subscription_id)
-            .first()
-        )
-
-        if subscription:
-            subscription.status = "cancelled"
-            db.commit()
+    await run_blocking(record_event, db, event)
 
     return {"status": "success"}
 
 
 @router.get("/transactions", response_model=List[TransactionResponse])
-async def get_transactions(
-    current_user: User = Depends(get_current_user),
+def get_transactions(
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
-    """Get user's transaction history"""
+    """Get user's transaction history (bookings they paid for or were paid for)"""
+    if principal.profile_id is None:
+        return []
+
     transactions = (
         db.query(Transaction)
-        .filter(Transaction.user_id == current_user.id)
+        .join(Booking, Booking.id == Transaction.booking_id)
+        .filter(or_(Booking.mentee_id == principal.profile_id, Booking.mentor_id == principal.profile_id))
         .order_by(Transaction.created_at.desc())
         .all()
     )
@@ -401,57 +298,59 @@ async def get_transactions(
     return [
         TransactionResponse(
             id=t.id,
-            user_id=t.user_id,
-            type=t.type,
-            status=t.status,
-            amount_cents=t.amount_cents,
-            currency=t.currency,
-            stripe_payment_intent_id=t.stripe_payment_intent_id,
-            stripe_charge_id=t.stripe_charge_id,
             booking_id=t.booking_id,
-            subscription_id=t.subscription_id,
-            description=t.description,
-            metadata=t.metadata,
+            type=TransactionType.BOOKING,
+            status=t.status,
+            amount_cents=to_cents(t.amount),
+            platform_fee_cents=to_cents(t.platform_fee),
+            mentor_payout_cents=to_cents(t.mentor_payout),
+            currency=CURRENCY,
+            stripe_payment_intent_id=t.stripe_payment_id,
             created_at=t.created_at,
-            updated_at=t.updated_at,
         )
         for t in transactions
     ]
 
 
 @router.get("/payouts", response_model=List[PayoutResponse])
-async def get_payouts(
-    current_user: User = Depends(get_current_user),
+def get_payouts(
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
-    """Get mentor's payout history"""
+    """
+    Get mentor's payout history
+
+    Booking payments are destination charges, so Stripe moves each mentor's
+    share to their Connect account; this lists those shares per paid booking.
+    """
     # Check if user is a mentor
     payment_account = (
         db.query(PaymentAccount)
-        .filter(PaymentAccount.user_id == current_user.id)
+        .filter(PaymentAccount.user_id == principal.user_id)
         .first()
     )
 
-    if not payment_account:
+    if not payment_account or principal.profile_id is None:
         raise HTTPException(status_code=404, detail="No payment account found")
 
     payouts = (
-        db.query(Payout)
-        .filter(Payout.mentor_id == current_user.id)
-        .order_by(Payout.created_at.desc())
+        db.query(Transaction)
+        .join(Booking, Booking.id == Transaction.booking_id)
+        .filter(Booking.mentor_id == principal.profile_id, Transaction.status == PaymentStatusEnum.completed)
+        .order_by(Transaction.created_at.desc())
         .all()
     )
 
     return [
         PayoutResponse(
             id=p.id,
-            mentor_id=p.mentor_id,
-            amount_cents=p.amount_cents,
-            currency=p.currency,
-            stripe_payout_id=p.stripe_payout_id,
-            status=p.status,
-            arrival_date=p.arrival_date,
-            description=p.description,
+            mentor_id=principal.profile_id,
+            amount_cents=to_cents(p.mentor_payout),
+            currency=CURRENCY,
+            stripe_payout_id=None,
+            status=p.status.value,
+            arrival_date=None,
+            description=f"Booking #{p.booking_id}",
             created_at=p.created_at,
         )
         for p in payouts
@@ -459,16 +358,16 @@ async def get_payouts(
 
 
 @router.post("/tip", response_model=TipResponse)
-async def send_tip(
+def send_tip(
     tip_data: TipCreate,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """Send a tip to a mentor"""
     # Check if mentor exists
     mentor_profile = (
-        db.query(MentorProfile)
-        .filter(MentorProfile.user_id == tip_data.mentor_id)
+        db.query(Profile)
+        .filter(Profile.id == tip_data.mentor_id, Profile.is_mentor == True)
         .first()
     )
 
@@ -476,25 +375,16 @@ async def send_tip(
         raise HTTPException(status_code=404, detail="Mentor not found")
 
     # Get mentor's payment account
-    payment_account = (
-        db.query(PaymentAccount)
-        .filter(PaymentAccount.user_id == tip_data.mentor_id)
-        .first()
-    )
-
-    if not payment_account or not payment_account.charges_enabled:
-        raise HTTPException(
-            status_code=400, detail="Mentor cannot accept payments at this time"
-        )
+    payment_account = get_mentor_payment_account(db, tip_data.mentor_id)
 
     try:
         # Create payment intent
         result = stripe_service.create_payment_intent(
             amount_cents=tip_data.amount_cents,
-            currency="usd",
+            currency=CURRENCY,
             metadata={
                 "type": "tip",
-                "from_user_id": str(current_user.id),
+                "from_user_id": str(principal.user_id),
                 "to_mentor_id": str(tip_data.mentor_id),
                 "session_id": str(tip_data.session_id) if tip_data.session_id else None,
             },
@@ -504,14 +394,10 @@ async def send_tip(
 
         # Create tip record
         tip = Tip(
-            from_user_id=current_user.id,
-            to_mentor_id=tip_data.mentor_id,
-            amount_cents=tip_data.amount_cents,
-            currency="USD",
+            from_user_id=principal.user_id,
+            to_user_id=mentor_profile.user_id,
+            amount=Decimal(tip_data.amount_cents) / 100,
             message=tip_data.message,
-            session_id=tip_data.session_id,
-            stripe_payment_intent_id=result["payment_intent_id"],
-            status="pending",
         )
 
         db.add(tip)
@@ -521,13 +407,13 @@ async def send_tip(
         return TipResponse(
             id=tip.id,
             from_user_id=tip.from_user_id,
-            to_mentor_id=tip.to_mentor_id,
-            amount_cents=tip.amount_cents,
-            currency=tip.currency,
+            to_mentor_id=tip_data.mentor_id,
+            amount_cents=tip_data.amount_cents,
+            currency=CURRENCY,
             message=tip.message,
-            session_id=tip.session_id,
-            stripe_payment_intent_id=tip.stripe_payment_intent_id,
-            status=tip.status,
+            session_id=tip_data.session_id,
+            stripe_payment_intent_id=result["payment_intent_id"],
+            status=PaymentStatusEnum.pending.value,
             created_at=tip.created_at,
         )
 
@@ -7,11 +7,16 @@ import datetime as dt
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db, get_current_user, User
+from ..database import get_db, get_current_principal
 from ..models.mentoring import (
     Profile, MentorCategory, AvailabilitySlot, Category,
     ExpertiseLevelEnum
 )
+from ..services.availability import refresh_weekly_bitmap
+from ..services.languages import parse_languages, sync_profile_languages
+from ..services.mentor_search import refresh_search_documents
+from ..services.mentor_stats import get_or_create_stats
+from ..services.principal_cache import Principal, principal_cache
 from ..schemas.mentoring import (
     ProfileResponse, ProfileUpdate, BecomeMentorRequest,
     MentorProfileUpdate, AvailabilityUpdate, AvailabilitySlot as AvailabilitySlotSchema
@@ -21,9 +26,16 @@ from ..schemas.mentoring import (
 router = APIRouter(prefix="/profiles", tags=["Profiles"])
 
 
+def _load_profile(db: Session, principal: Principal) -> Optional[Profile]:
+    """The principal's profile: by primary key when known, else by user id"""
+    if principal.profile_id is not None:
+        return db.get(Profile, principal.profile_id)
+    return db.query(Profile).filter(Profile.user_id == principal.user_id).first()
+
+
 @router.get("/me", response_model=ProfileResponse)
 def get_my_profile(
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -32,18 +44,19 @@ def get_my_profile(
     Creates a basic profile if one doesn't exist.
     Requires authentication.
     """
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    profile = _load_profile(db, principal)
 
     if not profile:
         # Create a basic profile
         profile = Profile(
-            user_id=user.id,
-            display_name=user.email.split('@')[0],  # Use email prefix as default
+            user_id=principal.user_id,
+            display_name=principal.email.split('@')[0],  # Use email prefix as default
             is_mentor=False
         )
         db.add(profile)
         db.commit()
         db.refresh(profile)
+        principal_cache.invalidate_user(principal.user_id)
 
     # Map to response schema
     # Note: ProfileResponse expects different fields, so we'll adapt
@@ -67,7 +80,7 @@ def get_my_profile(
 @router.put("/me", response_model=ProfileResponse)
 def update_my_profile(
     profile_data: ProfileUpdate,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -75,7 +88,7 @@ def update_my_profile(
 
     Requires authentication.
     """
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    profile = _load_profile(db, principal)
 
     if not profile:
         raise HTTPException(
@@ -98,12 +111,17 @@ def update_my_profile(
 
     if profile_data.preferred_languages is not None:
         # Convert comma-separated string to JSON array
-        langs = [lang.strip() for lang in profile_data.preferred_languages.split(',')]
-        profile.languages = langs
+        profile.languages = parse_languages(profile_data.preferred_languages)
+        sync_profile_languages(db, profile)
+
+    if profile.is_mentor:
+        db.flush()
+        refresh_search_documents(db, [profile.id])
 
     profile.updated_at = dt.datetime.utcnow()
     db.commit()
     db.refresh(profile)
+    principal_cache.invalidate_user(principal.user_id)
 
     return {
         "id": profile.id,
@@ -125,7 +143,7 @@ def update_my_profile(
 @router.post("/me/become-mentor", response_model=ProfileResponse)
 def become_mentor(
     mentor_data: BecomeMentorRequest,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -134,13 +152,13 @@ def become_mentor(
     Sets is_mentor=True and adds initial mentor profile data.
     Requires authentication.
     """
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    profile = _load_profile(db, principal)
 
     if not profile:
         # Create profile with mentor status
         profile = Profile(
-            user_id=user.id,
-            display_name=user.email.split('@')[0],
+            user_id=principal.user_id,
+            display_name=principal.email.split('@')[0],
             is_mentor=True
         )
         db.add(profile)
@@ -160,12 +178,16 @@ def become_mentor(
 
     if mentor_data.languages:
         # Convert comma-separated string to JSON array
-        langs = [lang.strip() for lang in mentor_data.languages.split(',')]
-        profile.languages = langs
+        profile.languages = parse_languages(mentor_data.languages)
 
     profile.updated_at = dt.datetime.utcnow()
     db.commit()
     db.refresh(profile)
+    principal_cache.invalidate_user(principal.user_id)
+
+    # Ensure mentors always have a stats row for rating/session sorting
+    get_or_create_stats(db, profile.id)
+    sync_profile_languages(db, profile)
 
     # Add categories if provided
     if mentor_data.category_ids:
@@ -187,7 +209,10 @@ def become_mentor(
                     )
                     db.add(mentor_cat)
 
-        db.commit()
+    # Index name, bio and categories for keyword search
+    db.flush()
+    refresh_search_documents(db, [profile.id])
+    db.commit()
 
     return {
         "id": profile.id,
@@ -209,7 +234,7 @@ def become_mentor(
 @router.put("/me/availability")
 def update_availability(
     availability_data: AvailabilityUpdate,
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -218,7 +243,7 @@ def update_availability(
     Replaces all existing availability with the new slots.
     Requires authentication and mentor status.
     """
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    profile = _load_profile(db, principal)
 
     if not profile:
         raise HTTPException(
@@ -252,6 +277,9 @@ def update_availability(
         )
         db.add(slot)
 
+    # Keep the bitmap used by the multi-mentor availability search in sync
+    db.flush()
+    refresh_weekly_bitmap(db, profile.id)
     db.commit()
 
     # Return updated availability
@@ -277,7 +305,7 @@ def update_availability(
 
 @router.get("/me/availability")
 def get_my_availability(
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -285,7 +313,7 @@ def get_my_availability(
 
     Requires authentication and mentor status.
     """
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    profile = _load_profile(db, principal)
 
     if not profile:
         raise HTTPException(
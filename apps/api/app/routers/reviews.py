@@ -3,11 +3,14 @@
 from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session as DBSession
 from pydantic import BaseModel, Field
 
-from ..database import get_db, User, get_current_user
-from ..models import Review, Session as SessionModel, Booking, MentorProfile
+from ..database import get_db, get_read_db, get_current_principal
+from ..models import MentorReview, Session as SessionModel, Booking, BookingStatusEnum, Profile
+from ..services.mentor_stats import apply_review
+from ..services.principal_cache import Principal
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
@@ -24,7 +27,7 @@ class ReviewCreate(BaseModel):
 class ReviewResponse(BaseModel):
     """Review response"""
     id: int
-    session_id: int
+    session_id: Optional[int]
     mentor_id: int
     reviewer_id: int
     reviewer_name: Optional[str] = None
@@ -32,7 +35,7 @@ class ReviewResponse(BaseModel):
     comment: Optional[str]
     is_public: bool
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # no such column on reviews; kept for existing clients
 
     class Config:
         from_attributes = True
@@ -47,10 +50,32 @@ class MentorReviewsResponse(BaseModel):
     reviews: List[ReviewResponse]
 
 
+def _reviewer_names(db: DBSession, reviews: List[MentorReview]) -> dict:
+    """Display names of the reviewers of a page of reviews, in one query"""
+    reviewer_ids = {review.reviewer_id for review in reviews}
+    if not reviewer_ids:
+        return {}
+    return dict(db.query(Profile.id, Profile.display_name).filter(Profile.id.in_(reviewer_ids)).all())
+
+
+def _review_response(review: MentorReview, session_id: int, reviewer_name: Optional[str]) -> ReviewResponse:
+    return ReviewResponse(
+        id=review.id,
+        session_id=session_id,
+        mentor_id=review.reviewee_id,
+        reviewer_id=review.reviewer_id,
+        reviewer_name=reviewer_name or "Anonymous",
+        rating=review.rating,
+        comment=review.content,
+        is_public=review.is_public,
+        created_at=review.created_at,
+    )
+
+
 @router.post("", response_model=ReviewResponse, status_code=201)
-async def create_review(
+def create_review(
     review_data: ReviewCreate,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """
@@ -82,14 +107,14 @@ async def create_review(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check if user was the mentee
-    if booking.mentee_id != current_user.id:
+    if principal.profile_id is None or booking.mentee_id != principal.profile_id:
         raise HTTPException(
             status_code=403,
             detail="Only the mentee can review the session"
         )
 
     # Check if session is completed
-    if session.status != "completed":
+    if booking.status != BookingStatusEnum.completed:
         raise HTTPException(
             status_code=400,
             detail="Can only review completed sessions"
@@ -97,10 +122,10 @@ async def create_review(
 
     # Check if user already reviewed this session
     existing_review = (
-        db.query(Review)
+        db.query(MentorReview.id)
         .filter(
-            Review.session_id == review_data.session_id,
-            Review.reviewer_id == current_user.id,
+            MentorReview.booking_id == booking.id,
+            MentorReview.reviewer_id == principal.profile_id,
         )
         .first()
     )
@@ -112,63 +137,34 @@ async def create_review(
         )
 
     # Create review
-    review = Review(
-        session_id=review_data.session_id,
-        mentor_id=booking.mentor_id,
-        reviewer_id=current_user.id,
+    review = MentorReview(
+        booking_id=booking.id,
+        reviewer_id=principal.profile_id,
+        reviewee_id=booking.mentor_id,
         rating=review_data.rating,
-        comment=review_data.comment,
+        content=review_data.comment,
         is_public=review_data.is_public,
     )
 
     db.add(review)
 
-    # Update mentor profile stats
-    mentor_profile = (
-        db.query(MentorProfile)
-        .filter(MentorProfile.user_id == booking.mentor_id)
-        .first()
-    )
-
-    if mentor_profile:
-        # Recalculate average rating
-        all_reviews = (
-            db.query(Review)
-            .filter(Review.mentor_id == booking.mentor_id)
-            .all()
-        )
-
-        total_rating = sum(r.rating for r in all_reviews) + review_data.rating
-        total_count = len(all_reviews) + 1
-
-        mentor_profile.average_rating = total_rating / total_count
-        mentor_profile.total_reviews = total_count
+    # Keep the mentor's denormalized rating stats in the same transaction
+    apply_review(db, booking.mentor_id, review_data.rating, review_data.is_public)
 
     db.commit()
     db.refresh(review)
 
-    return ReviewResponse(
-        id=review.id,
-        session_id=review.session_id,
-        mentor_id=review.mentor_id,
-        reviewer_id=review.reviewer_id,
-        reviewer_name=current_user.email,
-        rating=review.rating,
-        comment=review.comment,
-        is_public=review.is_public,
-        created_at=review.created_at,
-        updated_at=review.updated_at,
-    )
+    return _review_response(review, session.id, _reviewer_names(db, [review]).get(review.reviewer_id))
 
 
 @router.get("/mentor/{mentor_id}", response_model=MentorReviewsResponse)
-async def get_mentor_reviews(
+def get_mentor_reviews(
     mentor_id: int,
     include_private: bool = Query(False, description="Include private reviews (mentor only)"),
     limit: int = Query(10, ge=1, le=100, description="Number of reviews to return"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
-    current_user: Optional[User] = Depends(get_current_user),
-    db: DBSession = Depends(get_db),
+    principal: Principal = Depends(get_current_principal),
+    db: DBSession = Depends(get_read_db),
 ):
     """
     Get public reviews for a mentor
@@ -176,66 +172,64 @@ async def get_mentor_reviews(
     Returns aggregated stats and list of reviews.
     """
     # Check if mentor exists
-    mentor_profile = (
-        db.query(MentorProfile)
-        .filter(MentorProfile.user_id == mentor_id)
+    mentor_exists = (
+        db.query(Profile.id)
+        .filter(Profile.id == mentor_id, Profile.is_mentor == True)
         .first()
     )
 
-    if not mentor_profile:
+    if not mentor_exists:
         raise HTTPException(status_code=404, detail="Mentor not found")
 
-    # Build query
-    query = db.query(Review).filter(Review.mentor_id == mentor_id)
-
     # Only show public reviews unless user is the mentor
-    if not include_private or (current_user and current_user.id != mentor_id):
-        query = query.filter(Review.is_public == True)
+    filters = [MentorReview.reviewee_id == mentor_id]
+    if not include_private or principal.profile_id != mentor_id:
+        filters.append(MentorReview.is_public == True)
 
-    # Get all reviews for stats
-    all_reviews = query.all()
-
-    # Calculate rating distribution
+    # Rating distribution and totals in one grouped query
     rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    for review in all_reviews:
-        rating_distribution[review.rating] += 1
-
-    # Get paginated reviews
-    reviews = query.order_by(Review.created_at.desc()).offset(offset).limit(limit).all()
-
-    # Get reviewer names
-    review_responses = []
-    for review in reviews:
-        reviewer = db.query(User).filter(User.id == review.reviewer_id).first()
-
-        review_responses.append(
-            ReviewResponse(
-                id=review.id,
-                session_id=review.session_id,
-                mentor_id=review.mentor_id,
-                reviewer_id=review.reviewer_id,
-                reviewer_name=reviewer.email if reviewer else "Anonymous",
-                rating=review.rating,
-                comment=review.comment,
-                is_public=review.is_public,
-                created_at=review.created_at,
-                updated_at=review.updated_at,
-            )
-        )
+    for rating, count in (
+        db.query(MentorReview.rating, func.count(MentorReview.id))
+        .filter(*filters)
+        .group_by(MentorReview.rating)
+        .all()
+    ):
+        rating_distribution[rating] = count
+    total_reviews = sum(rating_distribution.values())
+    rating_sum = sum(rating * count for rating, count in rating_distribution.items())
+
+    # Get paginated reviews, with their sessions and reviewer names
+    reviews = (
+        db.query(MentorReview)
+        .filter(*filters)
+        .order_by(MentorReview.created_at.desc(), MentorReview.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    names = _reviewer_names(db, reviews)
+    session_ids = dict(
+        db.query(SessionModel.booking_id, SessionModel.id)
+        .filter(SessionModel.booking_id.in_([review.booking_id for review in reviews]))
+        .all()
+    ) if reviews else {}
 
     return MentorReviewsResponse(
         mentor_id=mentor_id,
-        average_rating=mentor_profile.average_rating,
-        total_reviews=mentor_profile.total_reviews,
+        average_rating=rating_sum / total_reviews if total_reviews else 0.0,
+        total_reviews=total_reviews,
         rating_distribution=rating_distribution,
-        reviews=review_responses,
+        reviews=[
+            _review_response(review, session_ids.get(review.booking_id), names.get(review.reviewer_id))
+            for review in reviews
+        ],
     )
 
 
 @router.get("/session/{session_id}", response_model=ReviewResponse)
-async def get_session_review(
+def get_session_review(
     session_id: int,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """Get review for a specific session"""
@@ -260,10 +254,7 @@ async def get_session_review(
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Check authorization
-    if (
-        booking.mentor_id != current_user.id
-        and booking.mentee_id != current_user.id
-    ):
+    if principal.profile_id is None or principal.profile_id not in (booking.mentor_id, booking.mentee_id):
         raise HTTPException(
             status_code=403,
             detail="Not authorized to view this review"
@@ -271,77 +262,39 @@ async def get_session_review(
 
     # Get review
     review = (
-        db.query(Review)
-        .filter(Review.session_id == session_id)
+        db.query(MentorReview)
+        .filter(MentorReview.booking_id == booking.id)
         .first()
     )
 
     if not review:
         raise HTTPException(status_code=404, detail="No review found for this session")
 
-    # Get reviewer name
-    reviewer = db.query(User).filter(User.id == review.reviewer_id).first()
-
-    return ReviewResponse(
-        id=review.id,
-        session_id=review.session_id,
-        mentor_id=review.mentor_id,
-        reviewer_id=review.reviewer_id,
-        reviewer_name=reviewer.email if reviewer else "Anonymous",
-        rating=review.rating,
-        comment=review.comment,
-        is_public=review.is_public,
-        created_at=review.created_at,
-        updated_at=review.updated_at,
-    )
+    return _review_response(review, session.id, _reviewer_names(db, [review]).get(review.reviewer_id))
 
 
 @router.delete("/{review_id}")
-async def delete_review(
+def delete_review(
     review_id: int,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: DBSession = Depends(get_db),
 ):
     """Delete a review (only by the reviewer)"""
-    review = db.query(Review).filter(Review.id == review_id).first()
+    review = db.query(MentorReview).filter(MentorReview.id == review_id).first()
 
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
 
     # Check authorization
-    if review.reviewer_id != current_user.id:
+    if principal.profile_id is None or review.reviewer_id != principal.profile_id:
         raise HTTPException(
             status_code=403,
             detail="Only the reviewer can delete this review"
         )
 
-    # Update mentor profile stats
-    mentor_profile = (
-        db.query(MentorProfile)
-        .filter(MentorProfile.user_id == review.mentor_id)
-        .first()
-    )
-
-    if mentor_profile and mentor_profile.total_reviews > 0:
-        # Recalculate average rating
-        all_reviews = (
-            db.query(Review)
-            .filter(
-                Review.mentor_id == review.mentor_id,
-                Review.id != review_id,
-            )
-            .all()
-        )
-
-        if all_reviews:
-            total_rating = sum(r.rating for r in all_reviews)
-            mentor_profile.average_rating = total_rating / len(all_reviews)
-            mentor_profile.total_reviews = len(all_reviews)
-        else:
-            mentor_profile.average_rating = 0.0
-            mentor_profile.total_reviews = 0
-
+    mentor_id, rating, is_public = review.reviewee_id, review.rating, review.is_public
     db.delete(review)
+    apply_review(db, mentor_id, rating, is_public, removed=True)
     db.commit()
 
     return {"status": "success", "message": "Review deleted"}
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session as DBSession
 
 from ..database import get_db, User, get_current_user
 from ..models import Booking, Session as SessionModel
+from ..services.mentor_stats import record_completed_session
 from ..schemas.booking import (
     SessionResponse,
     SessionStartResponse,
@@ -41,7 +42,7 @@ def get_video_room_url(room_id: str) -> str:
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
-async def get_session(
+def get_session(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: DBSession = Depends(get_db),
@@ -78,7 +79,7 @@ async def get_session(
 
 
 @router.post("/{booking_id}/start", response_model=SessionStartResponse)
-async def start_session(
+def start_session(
     booking_id: int,
     current_user: User = Depends(get_current_user),
     db: DBSession = Depends(get_db),
@@ -157,7 +158,7 @@ async def start_session(
 
 
 @router.post("/{session_id}/end", response_model=SessionResponse)
-async def end_session(
+def end_session(
     session_id: int,
     notes: Optional[str] = None,
     current_user: User = Depends(get_current_user),
@@ -203,6 +204,7 @@ async def end_session(
 
     # Update booking status
     booking.status = "completed"
+    record_completed_session(db, booking.mentor_id)
 
     db.commit()
     db.refresh(session)
@@ -223,7 +225,7 @@ async def end_session(
 
 
 @router.get("/{session_id}/token", response_model=SessionTokenResponse)
-async def get_session_token(
+def get_session_token(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: DBSession = Depends(get_db),
@@ -1,6 +1,6 @@
 """Booking and availability schemas for MentorMatch"""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List
 from pydantic import BaseModel, Field, validator
 from enum import Enum
@@ -8,9 +8,9 @@ from enum import Enum
 
 class SessionType(str, Enum):
     """Types of mentoring sessions"""
-    ONE_ON_ONE = "one_on_one"
-    GROUP = "group"
-    TRIAL = "trial"
+    VIDEO = "video"
+    AUDIO = "audio"
+    CHAT = "chat"
 
 
 class BookingStatus(str, Enum):
@@ -68,17 +68,25 @@ class AvailabilitySlotResponse(BaseModel):
 
 
 # Booking Schemas
+def _naive_utc(value: datetime) -> datetime:
+    """Booking times are stored as naive UTC; convert offset-aware input"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class BookingCreate(BaseModel):
     """Create a new booking"""
-    mentor_id: int = Field(..., description="ID of the mentor to book")
+    mentor_id: int = Field(..., description="Profile ID of the mentor to book")
     scheduled_at: datetime = Field(..., description="Scheduled start time")
     duration_minutes: int = Field(default=60, ge=15, le=180, description="Session duration in minutes")
-    session_type: SessionType = Field(default=SessionType.ONE_ON_ONE)
+    session_type: SessionType = Field(default=SessionType.VIDEO)
     notes: Optional[str] = Field(None, max_length=1000, description="Optional notes for the mentor")
 
     @validator('scheduled_at')
     def validate_future_date(cls, v):
-        """Ensure booking is in the future"""
+        """Ensure booking is in the future, stored as naive UTC"""
+        v = _naive_utc(v)
         if v <= datetime.utcnow():
             raise ValueError('Scheduled time must be in the future')
         return v
@@ -92,7 +100,8 @@ class BookingUpdate(BaseModel):
 
     @validator('scheduled_at')
     def validate_future_date(cls, v):
-        """Ensure booking is in the future"""
+        """Ensure booking is in the future, stored as naive UTC"""
+        v = _naive_utc(v) if v else v
         if v and v <= datetime.utcnow():
             raise ValueError('Scheduled time must be in the future')
         return v
@@ -111,12 +120,88 @@ class BookingResponse(BaseModel):
     payment_required: bool
     notes: Optional[str]
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class RecurrenceFrequency(str, Enum):
+    """How often a booking series repeats"""
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+
+class BookingSeriesCreate(BookingCreate):
+    """Create a recurring series of bookings, starting at scheduled_at"""
+    frequency: RecurrenceFrequency = Field(default=RecurrenceFrequency.WEEKLY)
+    interval: int = Field(default=1, ge=1, le=4, description="Repeat every N days or weeks")
+    count: Optional[int] = Field(None, ge=1, le=52, description="Number of occurrences")
+    until: Optional[datetime] = Field(None, description="Last possible start time (inclusive)")
+    by_weekday: Optional[List[int]] = Field(
+        None, max_length=7, description="Weekdays for weekly series, 0=Monday, 6=Sunday"
+    )
+
+    @validator('by_weekday')
+    def validate_weekdays(cls, v):
+        """Ensure weekdays are in range"""
+        if v and any(day < 0 or day > 6 for day in v):
+            raise ValueError('Weekdays must be between 0 (Monday) and 6 (Sunday)')
+        return v
+
+
+class SeriesOccurrenceResult(BaseModel):
+    """Outcome for one occurrence of a booking series"""
+    scheduled_at: datetime
+    booking_id: Optional[int] = None
+    conflict: Optional[str] = None
+
+
+class BookingSeriesResponse(BaseModel):
+    """Bookings created for a series, with the occurrences that conflicted"""
+    mentor_id: int
+    created: int
+    conflicts: int
+    occurrences: List[SeriesOccurrenceResult]
+
+
+class BulkBookingAction(str, Enum):
+    """Actions available to the bulk booking endpoint"""
+    CONFIRM = "confirm"
+    CANCEL = "cancel"
+
+
+class BulkBookingRequest(BaseModel):
+    """Apply one action to many bookings"""
+    action: BulkBookingAction
+    booking_ids: List[int] = Field(..., min_length=1, max_length=500)
+    reason: Optional[str] = Field(None, max_length=1000, description="Cancellation reason")
+
+
+class BulkBookingItemResult(BaseModel):
+    """Outcome for one booking of a bulk request"""
+    booking_id: int
+    success: bool
+    status: Optional[BookingStatus] = None
+    error: Optional[str] = None
+
+
+class BulkBookingResponse(BaseModel):
+    """Per-booking results of a bulk request"""
+    action: BulkBookingAction
+    succeeded: int
+    failed: int
+    results: List[BulkBookingItemResult]
+
+
+class BookingListItem(BookingResponse):
+    """Booking in a list, with participants embedded on request"""
+    mentor_name: Optional[str] = None
+    mentee_name: Optional[str] = None
+    session_id: Optional[int] = None
+    video_room_url: Optional[str] = None
+
+
 class BookingDetailResponse(BookingResponse):
     """Detailed booking response with related data"""
     mentor_name: Optional[str] = None
@@ -216,8 +216,10 @@ class MatchResponse(BaseModel):
 class PaginationMetadata(BaseModel):
     page: int
     limit: int
-    total: int
-    total_pages: int
+    total: Optional[int] = None  # Omitted in cursor mode unless requested
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class MentorListWithPagination(BaseModel):
@@ -225,5 +227,34 @@ class MentorListWithPagination(BaseModel):
     pagination: PaginationMetadata
 
 
+class MentorSearchResult(MentorListResponse):
+    """Mentor card with its relevance score"""
+    score: float = 0.0
+
+
+class MentorSearchResponse(BaseModel):
+    query: str
+    mentors: List[MentorSearchResult]
+    pagination: PaginationMetadata
+
+
+class TimeWindow(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class MentorAvailabilityResult(MentorListResponse):
+    """Mentor card with the mentor's free stretches in the searched window"""
+    free_windows: List[TimeWindow] = []
+
+
+class MentorAvailabilitySearchResponse(BaseModel):
+    start: datetime
+    end: datetime
+    duration_minutes: int
+    mentors: List[MentorAvailabilityResult]
+    pagination: PaginationMetadata
+
+
 # Update forward references
 CategoryWithMentorsResponse.model_rebuild()
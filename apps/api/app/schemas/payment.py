@@ -9,11 +9,9 @@ from enum import Enum
 class PaymentStatus(str, Enum):
     """Payment status"""
     PENDING = "pending"
-    PROCESSING = "processing"
-    SUCCEEDED = "succeeded"
+    COMPLETED = "completed"
     FAILED = "failed"
     REFUNDED = "refunded"
-    PARTIALLY_REFUNDED = "partially_refunded"
 
 
 class TransactionType(str, Enum):
@@ -94,21 +92,17 @@ class CheckoutSessionResponse(BaseModel):
 
 # Transaction Schemas
 class TransactionResponse(BaseModel):
-    """Transaction response"""
+    """Payment for a booking, as seen by its mentee or mentor"""
     id: int
-    user_id: int
+    booking_id: int
     type: TransactionType
     status: PaymentStatus
     amount_cents: int
+    platform_fee_cents: int
+    mentor_payout_cents: int
     currency: str
     stripe_payment_intent_id: Optional[str]
-    stripe_charge_id: Optional[str]
-    booking_id: Optional[int]
-    subscription_id: Optional[int]
-    description: Optional[str]
-    metadata: Optional[dict]
     created_at: datetime
-    updated_at: datetime
 
     class Config:
         from_attributes = True
@@ -145,7 +139,7 @@ class SubscriptionResponse(BaseModel):
 # Tip Schemas
 class TipCreate(BaseModel):
     """Create a tip"""
-    mentor_id: int = Field(..., description="ID of the mentor to tip")
+    mentor_id: int = Field(..., description="Profile ID of the mentor to tip")
     amount_cents: int = Field(..., ge=100, description="Amount in cents (minimum $1)")
     message: Optional[str] = Field(None, max_length=500, description="Optional message")
     session_id: Optional[int] = Field(None, description="Related session ID")
@@ -170,12 +164,12 @@ class TipResponse(BaseModel):
 
 # Payout Schemas
 class PayoutResponse(BaseModel):
-    """Payout response"""
+    """A mentor's share of a paid booking, paid out by Stripe to their Connect account"""
     id: int
     mentor_id: int
     amount_cents: int
     currency: str
-    stripe_payout_id: str
+    stripe_payout_id: Optional[str]
     status: str
     arrival_date: Optional[datetime]
     description: Optional[str]
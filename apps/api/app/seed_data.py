@@ -17,6 +17,10 @@ from app.models.mentoring import (
     Profile, Category, MentorCategory, ExpertiseTag, MentorTag,
     AvailabilitySlot, ExpertiseLevelEnum as ExpertiseLevel
 )
+from app.services.availability import rebuild_weekly_bitmaps
+from app.services.languages import rebuild_profile_languages
+from app.services.mentor_search import rebuild_search_documents
+from app.services.mentor_stats import rebuild_mentor_stats
 
 
 def create_categories(db: Session) -> dict:
@@ -345,6 +349,12 @@ def seed_database():
         print("\n3. Creating sample mentors...")
         create_sample_mentors(db, categories, tags)
 
+        print("\n4. Building mentor stats, language, search and availability indexes...")
+        rebuild_mentor_stats(db)
+        rebuild_profile_languages(db)
+        rebuild_search_documents(db)
+        rebuild_weekly_bitmaps(db)
+
         print("\n" + "=" * 50)
         print("Seeding complete!")
         print("=" * 50)
@@ -0,0 +1,509 @@
+"""
+Mentor availability engine
+
+A mentor's availability over a window is computed as a minute-resolution
+boolean array. Weekly slots, date overrides and existing bookings arrive
+as interval arrays (start/end minute offsets) and are painted onto the
+array with difference arrays, so each step is a handful of NumPy
+operations instead of per-day, per-slot Python loops.
+
+Override semantics for a date:
+- is_available=False without times: the whole day is closed
+- is_available=False with times: that range is removed from the weekly hours
+- is_available=True with times: that range is added to the weekly hours
+
+For searching many mentors at once, each mentor's weekly hours are also
+kept as a precomputed bitmap of 15-minute buckets (MentorWeeklyAvailability).
+A search unpacks the bitmaps of all filtered mentors into one matrix and
+clears overridden and booked buckets before looking for free runs.
+
+Weekly slots and overrides are wall-clock times in the mentor's zone
+(Profile.timezone); bookings and search windows are naive UTC, like
+Booking.scheduled_at. Zone conversion uses the cached offset tables in
+services.timezones rather than converting slot by slot.
+
+Rebuild the weekly bitmaps with: python -m app.services.availability
+"""
+import datetime as dt
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Date, Integer, cast, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import (
+    Profile, AvailabilitySlot, AvailabilityOverride, Booking, BookingStatusEnum, MentorWeeklyAvailability
+)
+from .timezones import fixed_offset, get_zone, local_to_utc, utc_offsets, utc_to_local
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Bookings in these states occupy the mentor's time
+BLOCKING_STATUSES = (BookingStatusEnum.pending, BookingStatusEnum.confirmed)
+
+# Longest bookable session; bounds the booking lookback before the window start
+MAX_BOOKING_MINUTES = 180
+
+# Weekly bitmap resolution
+BUCKET_MINUTES = 15
+BUCKETS_PER_DAY = MINUTES_PER_DAY // BUCKET_MINUTES
+BUCKETS_PER_WEEK = 7 * BUCKETS_PER_DAY
+
+WeeklyRule = Tuple[int, int, int]                  # (day_of_week, start_minute, end_minute)
+OverrideRule = Tuple[dt.date, bool, Optional[int], Optional[int]]  # (date, is_available, start, end)
+Interval = Tuple[dt.datetime, dt.datetime]
+
+
+def _minute_of_day(value: Optional[dt.time], is_end: bool = False) -> Optional[int]:
+    if value is None:
+        return None
+    minute = value.hour * 60 + value.minute
+    # An end time of 00:00 means midnight at the end of the day
+    if is_end and minute == 0:
+        return MINUTES_PER_DAY
+    return minute
+
+
+def as_naive_utc(value: dt.datetime) -> dt.datetime:
+    """Convert an aware datetime to naive UTC; naive values are assumed to be UTC already"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+
+
+def minute_offset(origin: dt.datetime, value: dt.datetime, round_up: bool = False) -> int:
+    """Whole minutes from origin to value, rounded down (or up)"""
+    if round_up:
+        return -((origin - value) // dt.timedelta(minutes=1))
+    return (value - origin) // dt.timedelta(minutes=1)
+
+
+def load_availability_rules(
+    db: Session, mentor_ids: Sequence[int], start_date: dt.date, end_date: dt.date
+) -> Tuple[Dict[int, List[WeeklyRule]], Dict[int, List[OverrideRule]]]:
+    """
+    Load active weekly slots and the overrides dated in [start_date, end_date).
+
+    Both come back from a single UNION ALL query.
+    """
+    weekly = select(
+        literal("weekly").label("kind"),
+        AvailabilitySlot.mentor_id,
+        AvailabilitySlot.day_of_week,
+        cast(null(), Date).label("date"),
+        literal(True).label("is_available"),
+        AvailabilitySlot.start_time,
+        AvailabilitySlot.end_time,
+    ).where(
+        AvailabilitySlot.mentor_id.in_(mentor_ids),
+        AvailabilitySlot.is_active == True,
+    )
+    overrides = select(
+        literal("override").label("kind"),
+        AvailabilityOverride.mentor_id,
+        cast(null(), Integer).label("day_of_week"),
+        AvailabilityOverride.date,
+        AvailabilityOverride.is_available,
+        AvailabilityOverride.start_time,
+        AvailabilityOverride.end_time,
+    ).where(
+        AvailabilityOverride.mentor_id.in_(mentor_ids),
+        AvailabilityOverride.date >= start_date,
+        AvailabilityOverride.date < end_date,
+    )
+
+    weekly_rules: Dict[int, List[WeeklyRule]] = defaultdict(list)
+    override_rules: Dict[int, List[OverrideRule]] = defaultdict(list)
+    for kind, mentor_id, day_of_week, date, is_available, start_time, end_time in db.execute(
+        union_all(weekly, overrides)
+    ):
+        start = _minute_of_day(start_time)
+        end = _minute_of_day(end_time, is_end=True)
+        if kind == "weekly":
+            weekly_rules[mentor_id].append((day_of_week, start, end))
+        else:
+            # SQLite hands back dates from a UNION as strings
+            if isinstance(date, str):
+                date = dt.date.fromisoformat(date)
+            override_rules[mentor_id].append((date, bool(is_available), start, end))
+
+    return weekly_rules, override_rules
+
+
+def load_busy_intervals(
+    db: Session, mentor_ids: Sequence[int], window_start: dt.datetime, window_end: dt.datetime
+) -> Dict[int, List[Interval]]:
+    """Pending/confirmed bookings overlapping the window, in one query"""
+    busy: Dict[int, List[Interval]] = defaultdict(list)
+    lookback = window_start - dt.timedelta(minutes=MAX_BOOKING_MINUTES)
+    for mentor_id, scheduled_at, ends_at in db.query(
+        Booking.mentor_id, Booking.scheduled_at, Booking.ends_at
+    ).filter(
+        Booking.mentor_id.in_(mentor_ids),
+        Booking.scheduled_at >= lookback,
+        Booking.scheduled_at < window_end,
+        Booking.ends_at > window_start,
+        Booking.status.in_(BLOCKING_STATUSES),
+    ):
+        busy[mentor_id].append((scheduled_at, ends_at))
+    return busy
+
+
+def _paint(length: int, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Boolean mask of `length` minutes covered by any [start, end) interval"""
+    diff = np.zeros(length + 1, dtype=np.int32)
+    starts = np.clip(starts, 0, length)
+    ends = np.clip(ends, 0, length)
+    keep = ends > starts
+    np.add.at(diff, starts[keep], 1)
+    np.add.at(diff, ends[keep], -1)
+    return np.cumsum(diff[:-1]) > 0
+
+
+def _week_mask(weekly: Sequence[WeeklyRule]) -> np.ndarray:
+    """Boolean mask of the free minutes of one week, Monday 00:00 first"""
+    if not weekly:
+        return np.zeros(MINUTES_PER_WEEK, dtype=bool)
+    rules = np.array(weekly, dtype=np.int64)
+    day_offsets = rules[:, 0] * MINUTES_PER_DAY
+    return _paint(MINUTES_PER_WEEK, day_offsets + rules[:, 1], day_offsets + rules[:, 2])
+
+
+def free_minute_mask(
+    window_start: dt.datetime,
+    days: int,
+    weekly: Sequence[WeeklyRule],
+    overrides: Sequence[OverrideRule] = (),
+) -> np.ndarray:
+    """
+    Free wall-clock minutes of one mentor over `days` days from window_start (a local midnight).
+
+    Returns a boolean array with one entry per minute of the window.
+    """
+    length = days * MINUTES_PER_DAY
+
+    # Weekly hours: paint one week, then lay it over the window
+    week = _week_mask(weekly)
+    week_offset = window_start.weekday() * MINUTES_PER_DAY
+    free = week[(week_offset + np.arange(length)) % MINUTES_PER_WEEK]
+
+    if overrides:
+        first_day = window_start.date()
+        closed, added = [], []
+        for date, is_available, start, end in overrides:
+            day_start = (date - first_day).days * MINUTES_PER_DAY
+            if start is None or end is None:
+                if not is_available:
+                    closed.append((day_start, day_start + MINUTES_PER_DAY))
+            elif is_available:
+                added.append((day_start + start, day_start + end))
+            else:
+                closed.append((day_start + start, day_start + end))
+        if closed:
+            bounds = np.array(closed, dtype=np.int64)
+            free &= ~_paint(length, bounds[:, 0], bounds[:, 1])
+        if added:
+            bounds = np.array(added, dtype=np.int64)
+            free |= _paint(length, bounds[:, 0], bounds[:, 1])
+
+    return free
+
+
+def busy_minute_mask(window_start: dt.datetime, length: int, busy: Sequence[Interval]) -> np.ndarray:
+    """Minutes of a UTC window covered by any busy interval"""
+    if not busy:
+        return np.zeros(length, dtype=bool)
+    offsets = np.array(
+        [(minute_offset(window_start, start), minute_offset(window_start, end, round_up=True)) for start, end in busy],
+        dtype=np.int64,
+    )
+    return _paint(length, offsets[:, 0], offsets[:, 1])
+
+
+def slot_starts(free: np.ndarray, duration: int, granularity: int, not_before: int = 0) -> np.ndarray:
+    """
+    Minute offsets where a `duration`-minute slot fits entirely in free time.
+
+    Candidates are spaced `granularity` minutes apart from the start of each
+    free run, so a 09:30-12:30 window yields 09:30, 10:30, 11:30 for hourly slots.
+    """
+    length = len(free)
+    if not length or not free.any():
+        return np.zeros(0, dtype=np.int64)
+
+    index = np.arange(length)
+    run_starts = free & ~np.concatenate([[False], free[:-1]])
+    run_start_of = np.maximum.accumulate(np.where(run_starts, index, 0))
+
+    prefix = np.concatenate([[0], np.cumsum(free, dtype=np.int64)])
+    fits = np.zeros(length, dtype=bool)
+    if duration <= length:
+        fits[:length - duration + 1] = (prefix[duration:] - prefix[:-duration]) == duration
+
+    candidates = free & fits & ((index - run_start_of) % granularity == 0) & (index >= not_before)
+    return np.flatnonzero(candidates)
+
+
+def get_free_slots(
+    db: Session,
+    mentor_id: int,
+    days: int,
+    granularity: int = 60,
+    duration: int = 60,
+    now: Optional[dt.datetime] = None,
+    mentor_tz: Optional[str] = None,
+    output_tz: Optional[str] = None,
+) -> Optional[List[Interval]]:
+    """
+    Free (start, end) slots for one mentor over the next `days` days.
+
+    Weekly hours and overrides are read as wall-clock times in the mentor's
+    zone; the window runs from the mentor's local midnight today. Slots come
+    back as aware datetimes in output_tz (default: the mentor's zone).
+
+    Uses two queries: availability rules and overlapping bookings.
+    Returns None if the mentor has no availability configured.
+    """
+    now = now or dt.datetime.utcnow()
+    zone = get_zone(mentor_tz)
+    local_origin = dt.datetime.combine(utc_to_local(now, zone).date(), dt.time())
+    window_start = local_to_utc(local_origin, zone)
+    length = days * MINUTES_PER_DAY
+
+    # One spare local day absorbs DST days longer than 24 hours
+    weekly, overrides = load_availability_rules(
+        db, [mentor_id], local_origin.date(), local_origin.date() + dt.timedelta(days=days + 1)
+    )
+    if not weekly.get(mentor_id) and not overrides.get(mentor_id):
+        return None
+    busy = load_busy_intervals(db, [mentor_id], window_start, window_start + dt.timedelta(minutes=length))
+
+    # Map every UTC minute of the window to the mentor's wall-clock minute
+    local_free = free_minute_mask(local_origin, days + 1, weekly[mentor_id], overrides[mentor_id])
+    offsets = utc_offsets(zone.key, window_start, length)
+    free = local_free[np.arange(length) + offsets - offsets[0]]
+    free &= ~busy_minute_mask(window_start, length, busy[mentor_id])
+
+    # Only slots that start in the future
+    not_before = minute_offset(window_start, now, round_up=True)
+    starts = slot_starts(free, duration, granularity, not_before)
+
+    output_zone = get_zone(output_tz) if output_tz else zone
+    output_offsets = utc_offsets(output_zone.key, window_start, length)[starts]
+    slot_length = dt.timedelta(minutes=duration)
+    slots = []
+    for start, offset in zip(starts.tolist(), output_offsets.tolist()):
+        local_start = (window_start + dt.timedelta(minutes=start + offset)).replace(tzinfo=fixed_offset(offset))
+        slots.append((local_start, local_start + slot_length))
+    return slots
+
+
+# Weekly bitmap index
+
+def weekly_bitmap(weekly: Sequence[WeeklyRule]) -> bytes:
+    """Pack weekly hours into one bit per 15-minute bucket; partly covered buckets count as busy"""
+    buckets = _week_mask(weekly).reshape(BUCKETS_PER_WEEK, BUCKET_MINUTES).all(axis=1)
+    return np.packbits(buckets).tobytes()
+
+
+def _load_weekly_rules(db: Session, mentor_ids: Optional[Sequence[int]] = None) -> Dict[int, List[WeeklyRule]]:
+    query = db.query(
+        AvailabilitySlot.mentor_id, AvailabilitySlot.day_of_week,
+        AvailabilitySlot.start_time, AvailabilitySlot.end_time,
+    ).filter(AvailabilitySlot.is_active == True)
+    if mentor_ids is not None:
+        query = query.filter(AvailabilitySlot.mentor_id.in_(mentor_ids))
+
+    rules: Dict[int, List[WeeklyRule]] = defaultdict(list)
+    for mentor_id, day_of_week, start_time, end_time in query.all():
+        rules[mentor_id].append((day_of_week, _minute_of_day(start_time), _minute_of_day(end_time, is_end=True)))
+    return rules
+
+
+def _store_bitmaps(db: Session, mentor_ids: Sequence[int], rules: Dict[int, List[WeeklyRule]]):
+    existing = {
+        row.profile_id: row
+        for row in db.query(MentorWeeklyAvailability).filter(
+            MentorWeeklyAvailability.profile_id.in_(mentor_ids)
+        ).all()
+    }
+    for mentor_id in mentor_ids:
+        bitmap = weekly_bitmap(rules.get(mentor_id, ()))
+        row = existing.get(mentor_id)
+        if row is None:
+            db.add(MentorWeeklyAvailability(profile_id=mentor_id, bitmap=bitmap))
+        elif row.bitmap != bitmap:
+            row.bitmap = bitmap
+
+
+def refresh_weekly_bitmap(db: Session, mentor_id: int):
+    """Recompute one mentor's weekly bitmap from their active slots. Does not commit."""
+    _store_bitmaps(db, [mentor_id], _load_weekly_rules(db, [mentor_id]))
+
+
+def rebuild_weekly_bitmaps(db: Session) -> int:
+    """Recompute the weekly bitmap of every mentor. Returns the number of mentors."""
+    mentor_ids = [row[0] for row in db.query(Profile.id).filter(Profile.is_mentor == True).all()]
+    _store_bitmaps(db, mentor_ids, _load_weekly_rules(db))
+    db.commit()
+    return len(mentor_ids)
+
+
+def _paint_rows(shape: Tuple[int, int], rows: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Like _paint, with each interval painted onto its own row of a matrix"""
+    diff = np.zeros((shape[0], shape[1] + 1), dtype=np.int32)
+    starts = np.clip(starts, 0, shape[1])
+    ends = np.clip(ends, 0, shape[1])
+    keep = ends > starts
+    np.add.at(diff, (rows[keep], starts[keep]), 1)
+    np.add.at(diff, (rows[keep], ends[keep]), -1)
+    return np.cumsum(diff[:, :-1], axis=1) > 0
+
+
+def _has_run(free: np.ndarray, length: int) -> np.ndarray:
+    """Per row of a boolean matrix, whether it has `length` consecutive True values"""
+    prefix = np.zeros((free.shape[0], free.shape[1] + 1), dtype=np.int32)
+    np.cumsum(free, axis=1, out=prefix[:, 1:])
+    return ((prefix[:, length:] - prefix[:, :-length]) == length).any(axis=1)
+
+
+def search_available_mentors(
+    db: Session, query, start: dt.datetime, end: dt.datetime, duration: int,
+    max_candidates: Optional[int] = None,
+) -> List[Tuple[int, List[Interval]]]:
+    """
+    Mentors that have `duration` free minutes in a row within [start, end).
+
+    `query` selects (Profile.id, Profile.timezone) of the candidates; only
+    the first `max_candidates` rows in its order are considered. Returns
+    (profile id, free windows) pairs in query order, where free windows
+    are maximal free stretches of at least `duration` minutes, aligned to
+    15-minute buckets. start, end and the windows are naive UTC; weekly
+    hours and overrides are read in each mentor's zone. Uses three queries:
+    candidates with their bitmaps, overrides dated in the window, and
+    bookings of the remaining candidates; plus one for the weekly slots of
+    mentors without a stored bitmap, which is computed on the fly.
+    """
+    day_zero = dt.datetime.combine(start.date(), dt.time())
+    first = -(-minute_offset(day_zero, start, round_up=True) // BUCKET_MINUTES)
+    last = minute_offset(day_zero, end) // BUCKET_MINUTES
+    needed = -(-duration // BUCKET_MINUTES)
+    if last - first < needed:
+        return []
+
+    rows = query.outerjoin(
+        MentorWeeklyAvailability, MentorWeeklyAvailability.profile_id == Profile.id
+    ).add_columns(MentorWeeklyAvailability.bitmap).limit(max_candidates).all()
+    if not rows:
+        return []
+
+    mentor_ids = [mentor_id for mentor_id, _, _ in rows]
+    zones = [get_zone(timezone) for _, timezone, _ in rows]
+    bitmaps = [bitmap for _, _, bitmap in rows]
+    missing = [mentor_id for mentor_id, _, bitmap in rows if bitmap is None]
+    if missing:
+        # Mentors whose bitmap was never built: compute it from their slots
+        rules = _load_weekly_rules(db, missing)
+        bitmaps = [
+            weekly_bitmap(rules.get(mentor_id, ())) if bitmap is None else bitmap
+            for mentor_id, bitmap in zip(mentor_ids, bitmaps)
+        ]
+    packed = np.frombuffer(b"".join(bitmaps), dtype=np.uint8).reshape(len(rows), -1)
+    week = np.unpackbits(packed, axis=1)[:, :BUCKETS_PER_WEEK].astype(bool)
+
+    # Bitmaps are wall-clock weeks in each mentor's zone: find the local bucket
+    # of every UTC bucket in the window once per zone, then gather
+    window_start = day_zero + dt.timedelta(minutes=first * BUCKET_MINUTES)
+    width = last - first
+    utc_minutes = day_zero.weekday() * MINUTES_PER_DAY + (first + np.arange(width)) * BUCKET_MINUTES
+    rows_by_zone: Dict[str, List[int]] = defaultdict(list)
+    for row, zone in enumerate(zones):
+        rows_by_zone[zone.key].append(row)
+
+    free = np.empty((len(rows), width), dtype=bool)
+    for zone_name, zone_rows in rows_by_zone.items():
+        offsets = utc_offsets(zone_name, window_start, width * BUCKET_MINUTES)[::BUCKET_MINUTES]
+        local_buckets = ((utc_minutes + offsets) % MINUTES_PER_WEEK) // BUCKET_MINUTES
+        free[zone_rows] = week[np.ix_(zone_rows, local_buckets)]
+
+    # Date overrides are local dates; convert each to UTC minutes from the window start
+    row_of = {mentor_id: row for row, mentor_id in enumerate(mentor_ids)}
+    closed, added = [], []
+    for mentor_id, date, is_available, start_time, end_time in db.query(
+        AvailabilityOverride.mentor_id, AvailabilityOverride.date, AvailabilityOverride.is_available,
+        AvailabilityOverride.start_time, AvailabilityOverride.end_time,
+    ).filter(
+        AvailabilityOverride.date >= start.date() - dt.timedelta(days=1),
+        AvailabilityOverride.date <= end.date() + dt.timedelta(days=1),
+        AvailabilityOverride.mentor_id.in_(list(row_of)),
+    ):
+        row = row_of[mentor_id]
+        midnight = dt.datetime.combine(date, dt.time())
+        begin, finish = _minute_of_day(start_time), _minute_of_day(end_time, is_end=True)
+        if begin is None or finish is None:
+            if is_available:
+                continue
+            begin, finish = 0, MINUTES_PER_DAY
+        interval = (
+            row,
+            minute_offset(window_start, local_to_utc(midnight + dt.timedelta(minutes=begin), zones[row])),
+            minute_offset(window_start, local_to_utc(midnight + dt.timedelta(minutes=finish), zones[row])),
+        )
+        (added if is_available else closed).append(interval)
+    if closed:
+        # Partly closed buckets are busy
+        bounds = np.array(closed, dtype=np.int64)
+        free &= ~_paint_rows(free.shape, bounds[:, 0], bounds[:, 1] // BUCKET_MINUTES, -(-bounds[:, 2] // BUCKET_MINUTES))
+    if added:
+        # Only fully covered buckets become free
+        bounds = np.array(added, dtype=np.int64)
+        free |= _paint_rows(free.shape, bounds[:, 0], -(-bounds[:, 1] // BUCKET_MINUTES), bounds[:, 2] // BUCKET_MINUTES)
+
+    candidates = np.flatnonzero(_has_run(free, needed))
+    if not candidates.size:
+        return []
+
+    # Bookings only for mentors still in the running; any overlap makes a bucket busy
+    busy = load_busy_intervals(
+        db, [mentor_ids[row] for row in candidates], window_start, day_zero + dt.timedelta(minutes=last * BUCKET_MINUTES)
+    )
+    booked = [
+        (row_of[mentor_id], minute_offset(window_start, begin), minute_offset(window_start, finish, round_up=True))
+        for mentor_id, intervals in busy.items()
+        for begin, finish in intervals
+    ]
+    if booked:
+        bounds = np.array(booked, dtype=np.int64)
+        free &= ~_paint_rows(
+            free.shape, bounds[:, 0], bounds[:, 1] // BUCKET_MINUTES, -(-bounds[:, 2] // BUCKET_MINUTES)
+        )
+
+    results = []
+    for row in candidates:
+        edges = np.diff(np.concatenate([[0], free[row].astype(np.int8), [0]]))
+        run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        long_enough = run_ends - run_starts >= needed
+        windows = [
+            (
+                window_start + dt.timedelta(minutes=int(begin) * BUCKET_MINUTES),
+                window_start + dt.timedelta(minutes=int(finish) * BUCKET_MINUTES),
+            )
+            for begin, finish in zip(run_starts[long_enough], run_ends[long_enough])
+        ]
+        if windows:
+            results.append((mentor_ids[row], windows))
+    return results
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_weekly_bitmaps(db)
+        print(f"Rebuilt weekly availability bitmaps for {count} mentors")
+    finally:
+        db.close()
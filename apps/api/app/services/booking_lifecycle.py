@@ -0,0 +1,213 @@
+"""
+Booking and subscription lifecycle sweeps
+
+Moves records whose time has passed into their next state:
+
+- expire_pending: pending bookings still unconfirmed PENDING_CONFIRM_LEAD
+  before their start are cancelled, freeing the slot, once they have been
+  pending for PENDING_MIN_AGE (a late booking gets that long to be
+  confirmed, or until its start).
+- mark_no_shows: confirmed bookings whose session never started
+  NO_SHOW_GRACE after the scheduled start become no_show.
+- complete_sessions: confirmed bookings with a started session
+  COMPLETE_GRACE after their end become completed (and count towards the
+  mentor's completed sessions).
+- expire_subscriptions: active subscriptions past expires_at become expired.
+
+Each sweep seeks a status/time index (idx_booking_status_scheduled,
+idx_subscription_expires) and works in bounded batches: rows are claimed
+with SELECT ... FOR UPDATE SKIP LOCKED, so several workers can sweep at
+once, and each batch is its own short transaction.
+
+Metrics per sweep: lifecycle.<sweep>.batch_size, .processed and
+.lag_seconds (how long the oldest claimed row had been due).
+
+The sweeps run in-process with the API (see app.main) or in a standalone
+worker: python -m app.services.booking_lifecycle [--once]
+"""
+import datetime as dt
+import os
+from collections import Counter
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import Select, exists, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import Booking, BookingStatusEnum, Session as SessionModel, Subscription, SubscriptionStatusEnum
+from .mentor_stats import record_completed_session
+from .metrics import metrics
+from .scheduler import Job, Scheduler
+
+PENDING_CONFIRM_LEAD = dt.timedelta(hours=1)
+PENDING_MIN_AGE = dt.timedelta(minutes=30)
+NO_SHOW_GRACE = dt.timedelta(minutes=30)
+COMPLETE_GRACE = dt.timedelta(minutes=30)
+
+EXPIRED_PENDING_REASON = "Not confirmed before the session start"
+
+# Rows per batch, and batches per sweep run (the rest waits for the next run)
+BATCH_SIZE = int(os.getenv("LIFECYCLE_BATCH_SIZE", "500"))
+MAX_BATCHES = int(os.getenv("LIFECYCLE_MAX_BATCHES", "20"))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("LIFECYCLE_INTERVAL_SECONDS", "60"))
+
+BATCH_SIZE_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 5000)
+
+# Claimed rows are (id, due_at, ...); apply stages the transition and returns the rows changed
+Apply = Callable[[Session, Sequence], int]
+
+
+def _sweep(db: Session, name: str, claim: Select, cutoff: dt.datetime, apply: Apply) -> int:
+    """Claim and apply batches of due rows, one transaction per batch"""
+    batch_sizes = metrics.histogram(f"lifecycle.{name}.batch_size", buckets=BATCH_SIZE_BUCKETS)
+    processed = metrics.counter(f"lifecycle.{name}.processed")
+    lag = metrics.gauge(f"lifecycle.{name}.lag_seconds")
+
+    total = 0
+    for batch in range(MAX_BATCHES):
+        rows = db.execute(claim.limit(BATCH_SIZE).with_for_update(skip_locked=True)).all()
+        if batch == 0:
+            oldest = min((row[1] for row in rows), default=cutoff)
+            lag.set(max(0.0, (cutoff - oldest).total_seconds()))
+        if not rows:
+            db.rollback()
+            break
+
+        changed = apply(db, rows)
+        db.commit()
+
+        batch_sizes.observe(len(rows))
+        processed.inc(changed)
+        total += changed
+        if len(rows) < BATCH_SIZE:
+            break
+    return total
+
+
+def _session_started():
+    return exists().where(SessionModel.booking_id == Booking.id, SessionModel.started_at.isnot(None))
+
+
+def expire_pending_bookings(db: Session, now: Optional[dt.datetime] = None) -> int:
+    """Cancel pending bookings that were not confirmed in time"""
+    now = now or dt.datetime.utcnow()
+    cutoff = now + PENDING_CONFIRM_LEAD
+    claim = (
+        select(Booking.id, Booking.scheduled_at)
+        .where(
+            Booking.status == BookingStatusEnum.pending,
+            Booking.scheduled_at < cutoff,
+            or_(Booking.created_at < now - PENDING_MIN_AGE, Booking.scheduled_at <= now),
+        )
+        .order_by(Booking.scheduled_at)
+    )
+
+    def apply(db: Session, rows) -> int:
+        return db.execute(
+            update(Booking)
+            .where(Booking.id.in_([row.id for row in rows]), Booking.status == BookingStatusEnum.pending)
+            .values(status=BookingStatusEnum.cancelled, cancelled_at=now, cancel_reason=EXPIRED_PENDING_REASON)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    return _sweep(db, "expire_pending", claim, cutoff, apply)
+
+
+def mark_no_shows(db: Session, now: Optional[dt.datetime] = None) -> int:
+    """Mark confirmed bookings whose session never started as no-shows"""
+    now = now or dt.datetime.utcnow()
+    cutoff = now - NO_SHOW_GRACE
+    claim = (
+        select(Booking.id, Booking.scheduled_at)
+        .where(
+            Booking.status == BookingStatusEnum.confirmed,
+            Booking.scheduled_at < cutoff,
+            ~_session_started(),
+        )
+        .order_by(Booking.scheduled_at)
+    )
+
+    def apply(db: Session, rows) -> int:
+        return db.execute(
+            update(Booking)
+            .where(Booking.id.in_([row.id for row in rows]), Booking.status == BookingStatusEnum.confirmed)
+            .values(status=BookingStatusEnum.no_show)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    return _sweep(db, "mark_no_shows", claim, cutoff, apply)
+
+
+def complete_sessions(db: Session, now: Optional[dt.datetime] = None) -> int:
+    """Complete confirmed bookings whose session ran and has ended"""
+    now = now or dt.datetime.utcnow()
+    cutoff = now - COMPLETE_GRACE
+    claim = (
+        select(Booking.id, Booking.ends_at)
+        .where(
+            Booking.status == BookingStatusEnum.confirmed,
+            # scheduled_at <= ends_at, so this bound keeps the status index seek short
+            Booking.scheduled_at < cutoff,
+            Booking.ends_at < cutoff,
+            _session_started(),
+        )
+        .order_by(Booking.scheduled_at)
+    )
+
+    def apply(db: Session, rows) -> int:
+        mentor_ids = db.execute(
+            update(Booking)
+            .where(Booking.id.in_([row.id for row in rows]), Booking.status == BookingStatusEnum.confirmed)
+            .values(status=BookingStatusEnum.completed)
+            .returning(Booking.mentor_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        for mentor_id, count in Counter(mentor_ids).items():
+            record_completed_session(db, mentor_id, count)
+        return len(mentor_ids)
+
+    return _sweep(db, "complete_sessions", claim, cutoff, apply)
+
+
+def expire_subscriptions(db: Session, now: Optional[dt.datetime] = None) -> int:
+    """Expire active subscriptions past their expiry time"""
+    now = now or dt.datetime.utcnow()
+    claim = (
+        select(Subscription.id, Subscription.expires_at)
+        .where(Subscription.expires_at < now, Subscription.status == SubscriptionStatusEnum.active)
+        .order_by(Subscription.expires_at)
+    )
+
+    def apply(db: Session, rows) -> int:
+        return db.execute(
+            update(Subscription)
+            .where(Subscription.id.in_([row.id for row in rows]), Subscription.status == SubscriptionStatusEnum.active)
+            .values(status=SubscriptionStatusEnum.expired)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    return _sweep(db, "expire_subscriptions", claim, now, apply)
+
+
+def lifecycle_jobs(interval: float = SWEEP_INTERVAL_SECONDS) -> List[Job]:
+    return [
+        Job("expire_pending", interval, expire_pending_bookings),
+        Job("mark_no_shows", interval, mark_no_shows),
+        Job("complete_sessions", interval, complete_sessions),
+        Job("expire_subscriptions", interval, expire_subscriptions),
+    ]
+
+
+if __name__ == "__main__":
+    import asyncio
+    import logging
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    scheduler = Scheduler(lifecycle_jobs())
+    if "--once" in sys.argv:
+        print(f"Lifecycle sweeps updated {scheduler.run_once()} rows")
+    else:
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,213 @@
+"""
+Recurring booking series
+
+A series is expanded from an RRULE-like pattern (daily or weekly, every N
+days/weeks, optionally on given weekdays, bounded by a count or an end time)
+into occurrences at the same wall-clock time in the mentor's zone, so a
+weekly 18:00 slot stays at 18:00 across DST changes.
+
+All occurrences are checked in one query: they are sent as a derived table
+and joined against the mentor's active bookings (interval overlap on
+idx_booking_mentor_interval) and closing availability overrides on the
+occurrence's local date. Occurrences that conflict are reported; the rest
+are inserted with one bulk INSERT under the mentor's slot lock.
+"""
+import datetime as dt
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, String, Time, and_, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import AvailabilityOverride, Booking, BookingStatusEnum
+from .booking_slots import ACTIVE_STATUSES, MAX_BOOKING_MINUTES, commit_with_slot_lock
+from .mentor_stats import record_booking
+from .timezones import get_zone, local_to_utc, utc_to_local
+
+DAILY = "daily"
+WEEKLY = "weekly"
+
+# Upper bound on occurrences per series, whatever the pattern asks for
+MAX_OCCURRENCES = 52
+
+CONFLICT_BOOKED = "Overlaps an existing booking"
+CONFLICT_UNAVAILABLE = "Mentor is unavailable at this time"
+
+
+class Occurrence(NamedTuple):
+    starts_at: dt.datetime      # naive UTC
+    ends_at: dt.datetime        # naive UTC
+    local_date: dt.date         # mentor's wall-clock date of the start
+    local_start: dt.time
+    local_end: dt.time          # time.max if the occurrence runs past local midnight
+
+
+def _local_dates(
+    first: dt.date,
+    frequency: str,
+    interval: int,
+    by_weekday: Optional[Sequence[int]],
+):
+    """Candidate local dates in order, starting at `first`"""
+    if frequency == DAILY:
+        step = dt.timedelta(days=interval)
+        current = first
+        while True:
+            yield current
+            current += step
+
+    weekdays = sorted(set(by_weekday)) if by_weekday else [first.weekday()]
+    week_start = first - dt.timedelta(days=first.weekday())
+    while True:
+        for weekday in weekdays:
+            date = week_start + dt.timedelta(days=weekday)
+            if date >= first:
+                yield date
+        week_start += dt.timedelta(weeks=interval)
+
+
+def expand_occurrences(
+    first_start: dt.datetime,
+    duration_minutes: int,
+    frequency: str = WEEKLY,
+    interval: int = 1,
+    count: Optional[int] = None,
+    until: Optional[dt.datetime] = None,
+    by_weekday: Optional[Sequence[int]] = None,
+    mentor_tz: Optional[str] = None,
+) -> List[Occurrence]:
+    """
+    Expand a recurrence pattern starting at first_start (naive UTC).
+
+    Occurrences keep first_start's wall-clock time in the mentor's zone.
+    The series stops after `count` occurrences, after `until` (naive UTC,
+    inclusive) or at MAX_OCCURRENCES, whichever comes first.
+    """
+    zone = get_zone(mentor_tz)
+    local_first = utc_to_local(first_start, zone)
+    limit = min(count or MAX_OCCURRENCES, MAX_OCCURRENCES)
+    length = dt.timedelta(minutes=duration_minutes)
+
+    occurrences = []
+    for date in _local_dates(local_first.date(), frequency, interval, by_weekday):
+        local_start = dt.datetime.combine(date, local_first.time())
+        starts_at = local_to_utc(local_start, zone)
+        if len(occurrences) >= limit or (until is not None and starts_at > until):
+            break
+        local_end = local_start + length
+        occurrences.append(Occurrence(
+            starts_at=starts_at,
+            ends_at=starts_at + length,
+            local_date=date,
+            local_start=local_start.time(),
+            local_end=local_end.time() if local_end.date() == date else dt.time.max,
+        ))
+    return occurrences
+
+
+def find_series_conflicts(db: Session, mentor_id: int, occurrences: Sequence[Occurrence]) -> Dict[int, str]:
+    """
+    Conflicting occurrences of a series, by index, with the reason.
+
+    Uses one query: the occurrences as a derived table, joined against
+    active bookings and closing overrides (UNION ALL).
+    """
+    if not occurrences:
+        return {}
+
+    rows = [
+        select(
+            literal(index, Integer).label("idx"),
+            literal(occurrence.starts_at, DateTime).label("starts_at"),
+            literal(occurrence.ends_at, DateTime).label("ends_at"),
+            # Lower bound on scheduled_at, so the booking join is a range seek
+            literal(occurrence.starts_at - dt.timedelta(minutes=MAX_BOOKING_MINUTES), DateTime).label("lookback"),
+            literal(occurrence.local_date, Date).label("local_date"),
+            literal(occurrence.local_start, Time).label("local_start"),
+            literal(occurrence.local_end, Time).label("local_end"),
+        )
+        for index, occurrence in enumerate(occurrences)
+    ]
+    occ = (union_all(*rows) if len(rows) > 1 else rows[0]).subquery("occurrences")
+
+    booked = select(occ.c.idx, literal(CONFLICT_BOOKED, String).label("reason")).join(
+        Booking,
+        and_(
+            Booking.mentor_id == mentor_id,
+            Booking.scheduled_at > occ.c.lookback,
+            Booking.scheduled_at < occ.c.ends_at,
+            Booking.ends_at > occ.c.starts_at,
+            Booking.status.in_(ACTIVE_STATUSES),
+        ),
+    )
+    # Closed all day, or a closed range overlapping the occurrence (an end of 00:00 means midnight)
+    closed = select(occ.c.idx, literal(CONFLICT_UNAVAILABLE, String).label("reason")).join(
+        AvailabilityOverride,
+        and_(
+            AvailabilityOverride.mentor_id == mentor_id,
+            AvailabilityOverride.date == occ.c.local_date,
+            AvailabilityOverride.is_available.is_(False),
+            or_(
+                AvailabilityOverride.start_time.is_(None),
+                AvailabilityOverride.end_time.is_(None),
+                and_(
+                    AvailabilityOverride.start_time < occ.c.local_end,
+                    or_(
+                        AvailabilityOverride.end_time > occ.c.local_start,
+                        AvailabilityOverride.end_time == dt.time(0, 0),
+                    ),
+                ),
+            ),
+        ),
+    )
+
+    conflicts: Dict[int, str] = {}
+    for index, reason in db.execute(union_all(booked, closed)):
+        conflicts.setdefault(index, reason)
+    return conflicts
+
+
+def book_series(
+    db: Session,
+    mentor_id: int,
+    mentee_id: int,
+    occurrences: Sequence[Occurrence],
+    duration_minutes: int,
+    session_type: str,
+    price: Decimal,
+    notes: Optional[str] = None,
+) -> Tuple[Dict[int, int], Dict[int, str]]:
+    """
+    Book every non-conflicting occurrence and commit.
+
+    Returns (booking ids by occurrence index, conflict reasons by index).
+    The conflict check and the insert run under the mentor's slot lock.
+    """
+    def stage() -> Tuple[Dict[int, int], Dict[int, str]]:
+        conflicts = find_series_conflicts(db, mentor_id, occurrences)
+        free = [index for index in range(len(occurrences)) if index not in conflicts]
+        if not free:
+            return {}, conflicts
+
+        # Bulk inserts skip mapper events, so ends_at is set here rather than by _set_booking_end
+        rows = [
+            {
+                "mentor_id": mentor_id,
+                "mentee_id": mentee_id,
+                "scheduled_at": occurrences[index].starts_at,
+                "duration_minutes": duration_minutes,
+                "ends_at": occurrences[index].ends_at,
+                "status": BookingStatusEnum.pending,
+                "price": price,
+                "session_type": session_type,
+                "notes": notes,
+            }
+            for index in free
+        ]
+        booking_ids = db.scalars(
+            insert(Booking).returning(Booking.id, sort_by_parameter_order=True), rows
+        ).all()
+        record_booking(db, mentor_id)
+        return dict(zip(free, booking_ids)), conflicts
+
+    return commit_with_slot_lock(db, mentor_id, stage)
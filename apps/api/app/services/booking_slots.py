@@ -0,0 +1,172 @@
+"""
+Race-free booking slot claims
+
+Checking a slot and then inserting is not atomic: two requests for the
+same slot can both pass the check. Writes that claim a slot therefore go
+through commit_booking_slot, which serializes per mentor only:
+
+- Postgres: a transaction-scoped advisory lock keyed by mentor id, backed
+  by the booking_no_overlap exclusion constraint as the last line of defence.
+- SQLite: the transaction starts with BEGIN IMMEDIATE, taking the
+  database write lock before the slot is checked, so claims from other
+  processes wait (up to the driver's busy timeout, then retry). pysqlite
+  would otherwise defer BEGIN to the first INSERT, after the check. An
+  in-process lock stripe per mentor keeps threads of one process from
+  contending for the write lock.
+
+Bookings for different mentors never wait on each other (beyond SQLite's
+own single-writer lock).
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import Booking, BookingStatusEnum
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Bookings in these states hold their slot
+ACTIVE_STATUSES = (BookingStatusEnum.pending, BookingStatusEnum.confirmed)
+
+# Longest bookable session (BookingCreate.duration_minutes)
+MAX_BOOKING_MINUTES = 180
+
+# First key of the two-key advisory lock, so booking locks don't collide with other users
+ADVISORY_LOCK_NAMESPACE = 0x626B  # "bk"
+
+# In-process lock stripes for databases without advisory locks
+LOCK_STRIPES = 64
+_stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+# Retries after a write conflict, with jittered backoff
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 0.02
+
+# Postgres SQLSTATEs
+EXCLUSION_VIOLATION = "23P01"
+RETRYABLE_SQLSTATES = {"40001", "40P01"}  # serialization_failure, deadlock_detected
+
+
+class SlotUnavailableError(Exception):
+    """The requested slot overlaps another active booking of the mentor"""
+
+
+def check_slot_available(
+    db: Session,
+    mentor_id: int,
+    scheduled_at: datetime,
+    duration_minutes: int,
+    exclude_booking_id: Optional[int] = None,
+) -> bool:
+    """Check if a time slot is available for booking"""
+    end_time = scheduled_at + timedelta(minutes=duration_minutes)
+
+    # Two intervals overlap when each starts before the other ends. The lower
+    # bound on scheduled_at keeps the idx_booking_mentor_interval range scan
+    # short; ends_at is then checked from the same index entries.
+    query = db.query(Booking.id).filter(
+        Booking.mentor_id == mentor_id,
+        Booking.scheduled_at > scheduled_at - timedelta(minutes=MAX_BOOKING_MINUTES),
+        Booking.scheduled_at < end_time,
+        Booking.ends_at > scheduled_at,
+        Booking.status.in_(ACTIVE_STATUSES),
+    )
+    if exclude_booking_id is not None:
+        query = query.filter(Booking.id != exclude_booking_id)
+
+    return query.first() is None
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _sqlstate(error) -> Optional[str]:
+    return getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+
+
+def _is_retryable(error: OperationalError) -> bool:
+    return _sqlstate(error) in RETRYABLE_SQLSTATES or "database is locked" in str(error.orig)
+
+
+def _begin_immediate(db: Session):
+    """Take SQLite's write lock now, unless the transaction already wrote (and so holds it)"""
+    dbapi_connection = db.connection().connection.dbapi_connection
+    if not dbapi_connection.in_transaction:
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+
+
+@contextmanager
+def mentor_slot_lock(db: Session, mentor_id: int):
+    """Serialize slot claims for one mentor until the transaction ends"""
+    if _is_postgres(db):
+        # Released automatically on commit/rollback
+        db.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, mentor_id)))
+        yield
+    else:
+        with _stripes[mentor_id % LOCK_STRIPES]:
+            _begin_immediate(db)
+            yield
+
+
+def commit_with_slot_lock(db: Session, mentor_id: int, stage: Callable[[], T]) -> T:
+    """
+    Run `stage` under the mentor's slot lock and commit, retrying write conflicts.
+
+    `stage` checks the slots it claims (raising SlotUnavailableError if one is
+    taken) and stages its writes from scratch, since it is re-run after a
+    rolled-back conflict. Its return value is passed through.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with mentor_slot_lock(db, mentor_id):
+                result = stage()
+                db.commit()
+                return result
+        except SlotUnavailableError:
+            db.rollback()
+            raise
+        except IntegrityError as e:
+            db.rollback()
+            if _sqlstate(e) == EXCLUSION_VIOLATION:
+                raise SlotUnavailableError() from e
+            raise
+        except OperationalError as e:
+            db.rollback()
+            if attempt == MAX_ATTEMPTS or not _is_retryable(e):
+                raise
+            logger.info(f"Booking write conflict for mentor {mentor_id}, retry {attempt}")
+            time.sleep(RETRY_BACKOFF * attempt * (1 + random.random()))
+
+
+def commit_booking_slot(
+    db: Session,
+    mentor_id: int,
+    scheduled_at: datetime,
+    duration_minutes: int,
+    apply: Callable[[], T],
+    exclude_booking_id: Optional[int] = None,
+) -> T:
+    """
+    Atomically claim a slot: check it, stage the write with `apply`, commit.
+
+    `apply` must stage everything it needs from scratch (it is re-run after a
+    rolled-back conflict) and may return a value, which is passed through.
+    Raises SlotUnavailableError if the slot is taken.
+    """
+    def stage() -> T:
+        if not check_slot_available(db, mentor_id, scheduled_at, duration_minutes, exclude_booking_id):
+            raise SlotUnavailableError()
+        return apply()
+
+    return commit_with_slot_lock(db, mentor_id, stage)
@@ -0,0 +1,176 @@
+"""
+Collaborative filtering ("mentees like you also booked")
+
+Likes, saves and bookings form an implicit-feedback matrix of mentees x
+mentors. A batch job turns it into item-item cosine similarities with
+sparse matrix products and stores the top neighbours of every mentor in
+MentorNeighbor, so request handlers only read precomputed rows by
+primary key.
+
+Rebuild with: python -m app.services.collaborative
+"""
+import datetime as dt
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import Profile, MentorLike, MentorSave, Booking, MentorNeighbor
+
+logger = logging.getLogger(__name__)
+
+# Implicit feedback weight per interaction
+INTERACTION_WEIGHTS = (
+    (MentorLike, 1.0),
+    (MentorSave, 1.0),
+    (Booking, 2.0),
+)
+
+# Neighbours stored per mentor
+TOP_K = 20
+
+# Similarities backed by few shared mentees are shrunk toward zero:
+# sim * shared / (shared + SHRINKAGE)
+SHRINKAGE = 2.0
+
+
+def build_interaction_matrix(db: Session):
+    """
+    Load all interactions into a sparse mentee x mentor matrix.
+
+    Returns (matrix, mentor_ids) where column j belongs to mentor_ids[j].
+    Repeated interactions of one mentee with one mentor are summed.
+    """
+    mentees: List[int] = []
+    mentors: List[int] = []
+    weights: List[float] = []
+    for model, weight in INTERACTION_WEIGHTS:
+        for mentee_id, mentor_id in db.query(model.mentee_id, model.mentor_id).all():
+            mentees.append(mentee_id)
+            mentors.append(mentor_id)
+            weights.append(weight)
+
+    mentee_ids, rows = np.unique(np.array(mentees, dtype=np.int64), return_inverse=True)
+    mentor_ids, cols = np.unique(np.array(mentors, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.array(weights, dtype=np.float32), (rows, cols)),
+        shape=(len(mentee_ids), len(mentor_ids)),
+    )
+    matrix.sum_duplicates()
+    return matrix, mentor_ids
+
+
+def item_similarities(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Shrunk cosine similarity between mentor columns, zero diagonal"""
+    norms = np.sqrt(np.asarray(matrix.power(2).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    normalized = matrix @ sparse.diags(1.0 / norms)
+
+    similarity = (normalized.T @ normalized).tocsr()
+
+    # Shrink by the number of mentees each pair shares
+    binary = (matrix > 0).astype(np.float32)
+    shrink = (binary.T @ binary).tocsr()
+    shrink.data = shrink.data / (shrink.data + SHRINKAGE)
+    similarity = similarity.multiply(shrink).tocsr()
+
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def top_neighbors(similarity: sparse.csr_matrix, top_k: int = TOP_K):
+    """Yield (row, [(col, score), ...]) with the top_k columns of every row"""
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        cols = similarity.indices[start:end]
+        scores = similarity.data[start:end]
+        if len(scores) > top_k:
+            keep = np.argpartition(-scores, top_k - 1)[:top_k]
+            cols, scores = cols[keep], scores[keep]
+        order = np.lexsort((cols, -scores))
+        yield row, list(zip(cols[order].tolist(), scores[order].tolist()))
+
+
+def rebuild_mentor_neighbors(db: Session, top_k: int = TOP_K) -> int:
+    """Recompute and replace every neighbour list. Returns rows written."""
+    started = time.perf_counter()
+    matrix, mentor_ids = build_interaction_matrix(db)
+
+    active = {row[0] for row in db.query(Profile.id).filter(Profile.is_mentor == True).all()}
+
+    rows = []
+    now = dt.datetime.utcnow()
+    if matrix.nnz:
+        for col, neighbors in top_neighbors(item_similarities(matrix), top_k):
+            mentor_id = int(mentor_ids[col])
+            if mentor_id not in active:
+                continue
+            rank = 0
+            for neighbor_col, score in neighbors:
+                neighbor_id = int(mentor_ids[neighbor_col])
+                if neighbor_id not in active:
+                    continue
+                rank += 1
+                rows.append({
+                    "mentor_id": mentor_id,
+                    "rank": rank,
+                    "neighbor_id": neighbor_id,
+                    "score": float(score),
+                    "computed_at": now,
+                })
+
+    db.query(MentorNeighbor).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(MentorNeighbor), rows)
+    db.commit()
+
+    logger.info(
+        f"Mentor neighbours rebuilt: {matrix.shape[0]} mentees x {matrix.shape[1]} mentors, "
+        f"{len(rows)} rows in {(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    return len(rows)
+
+
+def similar_mentors(db: Session, mentor_id: int, limit: int) -> List[Profile]:
+    """Precomputed neighbours of a mentor, best first"""
+    return (
+        db.query(Profile)
+        .join(MentorNeighbor, MentorNeighbor.neighbor_id == Profile.id)
+        .filter(MentorNeighbor.mentor_id == mentor_id, Profile.is_mentor == True)
+        .order_by(MentorNeighbor.rank)
+        .limit(limit)
+        .all()
+    )
+
+
+def neighbor_scores(db: Session, mentor_ids: Sequence[int]) -> Dict[int, float]:
+    """Sum of neighbour similarities over the given mentors (one query)"""
+    if not mentor_ids:
+        return {}
+
+    scores: Dict[int, float] = defaultdict(float)
+    for neighbor_id, score in db.query(MentorNeighbor.neighbor_id, MentorNeighbor.score).filter(
+        MentorNeighbor.mentor_id.in_(mentor_ids)
+    ).all():
+        scores[neighbor_id] += score
+    return scores
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_mentor_neighbors(db)
+        print(f"Stored {count} mentor neighbours")
+    finally:
+        db.close()
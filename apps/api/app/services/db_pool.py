@@ -0,0 +1,111 @@
+"""
+Connection pool configuration and instrumentation
+
+Pool sizing comes from the environment so it can be tuned per replica:
+
+- DB_POOL_SIZE (5), DB_MAX_OVERFLOW (10): persistent and burst connections
+- DB_POOL_TIMEOUT (30): seconds to wait for a free connection before failing
+- DB_POOL_RECYCLE (1800): seconds before a connection is replaced
+- DB_POOL_PRE_PING (true): test connections on checkout
+- DB_STATEMENT_TIMEOUT_MS (0 = off): per-statement limit on Postgres
+
+Each engine's pool reports, under db.pool.<name>.: size, checked_out and
+overflow (gauges), checkout_wait_seconds (histogram), checkout_timeouts,
+connect_errors and connections_created (counters).
+"""
+import os
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import metrics
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _instrumented(base, name: str):
+    """Subclass of a queue pool that times checkouts and counts failures"""
+    prefix = f"db.pool.{name}"
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                metrics.counter(f"{prefix}.checkout_timeouts").inc()
+                raise
+            except Exception:
+                metrics.counter(f"{prefix}.connect_errors").inc()
+                raise
+            finally:
+                metrics.histogram(f"{prefix}.checkout_wait_seconds", buckets=WAIT_BUCKETS).observe(
+                    time.perf_counter() - started
+                )
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def engine_options(url: str, name: str, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for a database URL"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options: Dict[str, Any] = {"pool_pre_ping": POOL_PRE_PING}
+    connect_args: Dict[str, Any] = {}
+
+    if backend == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection; keep SQLAlchemy's default pool
+            options["connect_args"] = connect_args
+            return options
+
+    options.update(
+        poolclass=_instrumented(AsyncAdaptedQueuePool if is_async else QueuePool, name),
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+    )
+
+    if backend == "postgresql" and STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+
+    options["connect_args"] = connect_args
+    return options
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Count new connections and report pool occupancy for an engine (sync or async)"""
+    engine = getattr(engine, "sync_engine", engine)
+    prefix = f"db.pool.{name}"
+    created = metrics.counter(f"{prefix}.connections_created")
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        created.inc()
+
+    def collect():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            metrics.gauge(f"{prefix}.size").set(pool.size())
+            metrics.gauge(f"{prefix}.checked_out").set(pool.checkedout())
+            metrics.gauge(f"{prefix}.overflow").set(max(0, pool.overflow()))
+
+    metrics.register_collector(collect)
@@ -0,0 +1,139 @@
+"""
+Google ID token verification with cached signing keys
+
+Google signs ID tokens with rotating RSA keys published as a JWKS at
+GOOGLE_JWKS_URL. Instead of fetching the keys on every sign-in, they are
+cached for the max-age of the response's Cache-Control header and
+refreshed by a background task shortly before they expire, so
+verification is a local signature check. A token signed with a key id the
+cache does not know (keys rotated early) triggers one synchronous refetch,
+at most every MIN_REFETCH_SECONDS. If a refresh fails, the previous keys
+stay in use for up to STALE_KEYS_GRACE seconds past their expiry.
+
+Metrics: google_jwks.fetches, .fetch_errors and .unknown_kid (counters),
+google_jwks.fetch_seconds and google_id_token.verify_seconds (histograms).
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from jose import JWTError, jwt
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_JWKS_URL = os.getenv("GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Cache lifetime when the response has no usable max-age
+DEFAULT_MAX_AGE = 300
+# Refresh this long before the cached keys expire
+REFRESH_MARGIN = 60
+# Minimum delay between refetches triggered by unknown key ids or failures
+MIN_REFETCH_SECONDS = 30
+# How long expired keys are still accepted when refreshing fails
+STALE_KEYS_GRACE = 3600
+FETCH_TIMEOUT = 5.0
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def cache_lifetime(headers) -> int:
+    """Seconds a JWKS response may be cached: Cache-Control max-age minus Age"""
+    match = _MAX_AGE_RE.search(headers.get("cache-control", ""))
+    if not match:
+        return DEFAULT_MAX_AGE
+    age = headers.get("age", "0")
+    return max(0, int(match.group(1)) - (int(age) if age.isdigit() else 0))
+
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens against a cached JWKS"""
+
+    def __init__(self, jwks_url: str = GOOGLE_JWKS_URL):
+        self.jwks_url = jwks_url
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+
+    def fetch_keys(self):
+        """Download the JWKS and replace the cached keys"""
+        started = time.perf_counter()
+        metrics.counter("google_jwks.fetches").inc()
+        try:
+            response = httpx.get(self.jwks_url, timeout=FETCH_TIMEOUT)
+            response.raise_for_status()
+            keys = {key["kid"]: key for key in response.json()["keys"]}
+        except (httpx.HTTPError, ValueError, KeyError):
+            metrics.counter("google_jwks.fetch_errors").inc()
+            raise
+        finally:
+            metrics.histogram("google_jwks.fetch_seconds").observe(time.perf_counter() - started)
+        self._keys = keys
+        self._expires_at = time.monotonic() + cache_lifetime(response.headers)
+
+    def _refetch(self, reason: str):
+        """Fetch now unless another thread just did; keep the old keys on failure"""
+        with self._lock:
+            now = time.monotonic()
+            if self._last_fetch and now - self._last_fetch < MIN_REFETCH_SECONDS:
+                return
+            self._last_fetch = now
+            try:
+                self.fetch_keys()
+            except Exception as e:
+                logger.warning(f"Could not fetch Google signing keys ({reason}): {e}")
+
+    def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        if not self._keys or now >= self._expires_at:
+            self._refetch("expired")
+        elif kid not in self._keys:
+            metrics.counter("google_jwks.unknown_kid").inc()
+            self._refetch("unknown key id")
+        if time.monotonic() >= self._expires_at + STALE_KEYS_GRACE:
+            return None
+        return self._keys.get(kid)
+
+    def verify(self, token: str, client_id: str) -> Dict[str, Any]:
+        """Claims of a valid ID token for client_id; raises ValueError otherwise"""
+        started = time.perf_counter()
+        try:
+            try:
+                kid = jwt.get_unverified_header(token).get("kid")
+            except JWTError as e:
+                raise ValueError(f"Malformed token: {e}")
+            key = self.get_key(kid) if kid else None
+            if key is None:
+                raise ValueError("Token signed with an unknown key")
+            try:
+                claims = jwt.decode(
+                    token, key, algorithms=["RS256"], audience=client_id,
+                    options={"verify_at_hash": False}
+                )
+            except JWTError as e:
+                raise ValueError(str(e))
+            if claims.get("iss") not in GOOGLE_ISSUERS:
+                raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+            return claims
+        finally:
+            metrics.histogram("google_id_token.verify_seconds").observe(time.perf_counter() - started)
+
+    async def refresh_in_background(self):
+        """Keep the keys fresh until cancelled"""
+        while True:
+            if not self._keys or time.monotonic() >= self._expires_at - REFRESH_MARGIN:
+                await asyncio.to_thread(self._refetch, "scheduled refresh")
+            delay = self._expires_at - REFRESH_MARGIN - time.monotonic()
+            await asyncio.sleep(max(MIN_REFETCH_SECONDS, delay))
+
+
+# Singleton instance
+google_token_verifier = GoogleTokenVerifier()
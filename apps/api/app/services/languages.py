@@ -0,0 +1,110 @@
+"""
+Profile language index
+
+Profile.languages keeps whatever the user typed ("English", "de", ...)
+for display. For filtering, languages are normalized to lowercase codes
+and mirrored into ProfileLanguage rows, so a language filter is an
+indexed lookup on (language, profile_id) instead of a scan over JSON.
+
+Rebuild with: python -m app.services.languages
+"""
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import Profile, ProfileLanguage
+
+
+# Common language names -> ISO 639-1 codes
+LANGUAGE_ALIASES = {
+    "arabic": "ar",
+    "bengali": "bn",
+    "chinese": "zh",
+    "mandarin": "zh",
+    "english": "en",
+    "french": "fr",
+    "german": "de",
+    "deutsch": "de",
+    "gujarati": "gu",
+    "hindi": "hi",
+    "italian": "it",
+    "japanese": "ja",
+    "korean": "ko",
+    "malayalam": "ml",
+    "polish": "pl",
+    "portuguese": "pt",
+    "russian": "ru",
+    "spanish": "es",
+    "tamil": "ta",
+    "telugu": "te",
+    "turkish": "tr",
+    "urdu": "ur",
+}
+
+
+def normalize_language(language: str) -> Optional[str]:
+    """Normalize a language name or code to its lookup key"""
+    key = language.strip().lower()
+    if not key:
+        return None
+    return LANGUAGE_ALIASES.get(key, key)
+
+
+def normalize_languages(languages: Optional[Iterable[str]]) -> Set[str]:
+    """Normalize a list of languages, dropping blanks and duplicates"""
+    if not languages or not isinstance(languages, (list, tuple, set)):
+        return set()
+    normalized = (normalize_language(lang) for lang in languages if isinstance(lang, str))
+    return {lang for lang in normalized if lang}
+
+
+def parse_languages(value: str) -> List[str]:
+    """Split a comma-separated languages string into a list"""
+    return [lang.strip() for lang in value.split(',') if lang.strip()]
+
+
+def sync_profile_languages(db: Session, profile: Profile):
+    """
+    Bring a profile's ProfileLanguage rows in line with Profile.languages.
+
+    Only inserts/deletes the difference. Does not commit.
+    """
+    wanted = normalize_languages(profile.languages)
+
+    existing = {
+        row.language: row
+        for row in db.query(ProfileLanguage).filter(ProfileLanguage.profile_id == profile.id).all()
+    }
+
+    for language, row in existing.items():
+        if language not in wanted:
+            db.delete(row)
+
+    for language in wanted - set(existing):
+        db.add(ProfileLanguage(profile_id=profile.id, language=language))
+
+
+def rebuild_profile_languages(db: Session) -> int:
+    """Rebuild the whole language index from Profile.languages. Returns rows written."""
+    db.query(ProfileLanguage).delete(synchronize_session=False)
+
+    rows = 0
+    for profile_id, languages in db.query(Profile.id, Profile.languages).all():
+        for language in normalize_languages(languages):
+            db.add(ProfileLanguage(profile_id=profile_id, language=language))
+            rows += 1
+
+    db.commit()
+    return rows
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_profile_languages(db)
+        print(f"Indexed {count} profile languages")
+    finally:
+        db.close()
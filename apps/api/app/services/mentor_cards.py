@@ -0,0 +1,79 @@
+"""
+Mentor card assembly for list views
+
+Builds MentorListResponse objects for a whole page of mentors using a
+fixed number of grouped queries instead of per-mentor lookups.
+"""
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import Profile, Category, MentorCategory, MentorStats
+from ..schemas.mentoring import MentorListResponse
+
+
+def load_category_names(db: Session, mentor_ids: Sequence[int]) -> Dict[int, List[str]]:
+    """Map mentor id -> category names, loaded with a single IN-list query"""
+    names: Dict[int, List[str]] = {mentor_id: [] for mentor_id in mentor_ids}
+    if not mentor_ids:
+        return names
+
+    rows = (
+        db.query(MentorCategory.mentor_id, Category.name)
+        .join(Category, Category.id == MentorCategory.category_id)
+        .filter(MentorCategory.mentor_id.in_(mentor_ids))
+        .all()
+    )
+    for mentor_id, name in rows:
+        names[mentor_id].append(name)
+
+    return names
+
+
+def load_mentor_stats(db: Session, mentor_ids: Sequence[int]) -> Dict[int, MentorStats]:
+    """Map mentor id -> denormalized MentorStats row, loaded with a single IN-list query"""
+    if not mentor_ids:
+        return {}
+
+    rows = db.query(MentorStats).filter(MentorStats.profile_id.in_(mentor_ids)).all()
+    return {stats.profile_id: stats for stats in rows}
+
+
+def build_mentor_card(
+    mentor: Profile,
+    categories: List[str],
+    stats: Optional[MentorStats] = None,
+) -> MentorListResponse:
+    """Build a single list card from a profile and prefetched data"""
+    return MentorListResponse(
+        id=mentor.id,
+        user_id=mentor.user_id,
+        headline=mentor.bio[:100] if mentor.bio else None,  # First 100 chars of bio
+        languages=",".join(mentor.languages) if mentor.languages else None,
+        hourly_rate=float(mentor.hourly_rate) if mentor.hourly_rate else None,
+        currency="EUR",
+        is_available=True,  # Default
+        avg_rating=float(stats.avg_rating or 0.0) if stats else 0.0,
+        total_reviews=stats.review_count or 0 if stats else 0,
+        total_sessions=stats.completed_sessions or 0 if stats else 0,
+        profile_image_url=mentor.avatar_url,
+        is_verified=mentor.is_verified,
+        categories=categories,
+    )
+
+
+def build_mentor_cards(db: Session, mentors: Sequence[Profile]) -> List[MentorListResponse]:
+    """
+    Build list cards for a page of mentors.
+
+    Issues two queries regardless of page size (categories + mentor stats)
+    and preserves the order of the given mentors.
+    """
+    mentor_ids = [mentor.id for mentor in mentors]
+    categories = load_category_names(db, mentor_ids)
+    stats = load_mentor_stats(db, mentor_ids)
+
+    return [
+        build_mentor_card(mentor, categories.get(mentor.id, []), stats.get(mentor.id))
+        for mentor in mentors
+    ]
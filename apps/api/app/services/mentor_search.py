@@ -0,0 +1,260 @@
+"""
+Mentor keyword search
+
+Each mentor gets a flattened MentorSearchDocument (display name, bio,
+category and tag names). On Postgres the documents are searched with
+to_tsvector/to_tsquery backed by a GIN index; elsewhere (SQLite) an
+in-process BM25 inverted index is built from the same documents and kept
+current by re-reading documents whose updated_at moved past a watermark.
+Documents of profiles that are no longer mentors are left out of the index.
+
+Rebuild with: python -m app.services.mentor_search
+"""
+import datetime as dt
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import (
+    Profile, Category, MentorCategory, ExpertiseTag, MentorTag, MentorSearchDocument
+)
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "i", "in",
+    "is", "it", "my", "of", "on", "or", "the", "to", "with", "you", "your",
+    "der", "die", "das", "und", "ich", "mit",
+}
+
+# Name tokens count double so name matches outrank passing mentions in bios
+NAME_WEIGHT = 2
+
+# Documents committed slightly out of updated_at order are re-read within this window
+REFRESH_SLACK = dt.timedelta(seconds=30)
+
+# How often refresh drops indexed profiles that stopped being mentors
+MENTOR_CHECK_INTERVAL = dt.timedelta(seconds=60)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Lowercase word tokens without stop words or single characters"""
+    if not value:
+        return []
+    return [
+        token for token in TOKEN_RE.findall(value.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def build_document(display_name: str, bio: Optional[str], categories: Sequence[str], tags: Sequence[str]) -> str:
+    """Flatten the searchable fields of a mentor into one document"""
+    parts = [display_name or ""] * NAME_WEIGHT
+    parts.append(bio or "")
+    parts.extend(categories)
+    parts.extend(tags)
+    return " ".join(part for part in parts if part)
+
+
+def refresh_search_documents(db: Session, profile_ids: Sequence[int]):
+    """
+    Rebuild the search documents for the given profiles.
+
+    Loads names, categories and tags in three queries. Does not commit.
+    """
+    if not profile_ids:
+        return
+
+    profiles = db.query(Profile.id, Profile.display_name, Profile.bio).filter(
+        Profile.id.in_(profile_ids)
+    ).all()
+
+    categories = defaultdict(list)
+    for mentor_id, name in (
+        db.query(MentorCategory.mentor_id, Category.name)
+        .join(Category, Category.id == MentorCategory.category_id)
+        .filter(MentorCategory.mentor_id.in_(profile_ids))
+        .all()
+    ):
+        categories[mentor_id].append(name)
+
+    tags = defaultdict(list)
+    for mentor_id, name in (
+        db.query(MentorTag.mentor_id, ExpertiseTag.name)
+        .join(ExpertiseTag, ExpertiseTag.id == MentorTag.tag_id)
+        .filter(MentorTag.mentor_id.in_(profile_ids))
+        .all()
+    ):
+        tags[mentor_id].append(name)
+
+    existing = {
+        doc.profile_id: doc
+        for doc in db.query(MentorSearchDocument).filter(MentorSearchDocument.profile_id.in_(profile_ids)).all()
+    }
+
+    now = dt.datetime.utcnow()
+    for profile_id, display_name, bio in profiles:
+        document = build_document(display_name, bio, categories[profile_id], tags[profile_id])
+        doc = existing.get(profile_id)
+        if doc is None:
+            db.add(MentorSearchDocument(profile_id=profile_id, document=document, updated_at=now))
+        elif doc.document != document:
+            doc.document = document
+            doc.updated_at = now
+
+
+def rebuild_search_documents(db: Session) -> int:
+    """Rebuild search documents for every mentor. Returns the number of mentors."""
+    mentor_ids = [row[0] for row in db.query(Profile.id).filter(Profile.is_mentor == True).all()]
+    refresh_search_documents(db, mentor_ids)
+    db.commit()
+    return len(mentor_ids)
+
+
+class MentorSearchIndex:
+    """In-process BM25 inverted index over MentorSearchDocument rows"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Counter] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._watermark: Optional[dt.datetime] = None
+        self._mentors_checked: Optional[dt.datetime] = None
+
+    def _remove_doc(self, profile_id: int):
+        terms = self._doc_terms.pop(profile_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(profile_id, 0)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(profile_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def _add_doc(self, profile_id: int, document: str):
+        terms = Counter(tokenize(document))
+        self._doc_terms[profile_id] = terms
+        self._doc_lengths[profile_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[profile_id]
+        for term, tf in terms.items():
+            self._postings[term][profile_id] = tf
+
+    def refresh(self, db: Session):
+        """
+        Apply documents changed since the last refresh (all of them on first use).
+
+        Documents of profiles that are not mentors are removed instead, and
+        every MENTOR_CHECK_INTERVAL the index drops profiles that stopped
+        being mentors, so they don't take candidate slots from mentors.
+        """
+        query = db.query(
+            MentorSearchDocument.profile_id,
+            MentorSearchDocument.document,
+            MentorSearchDocument.updated_at,
+            Profile.is_mentor,
+        ).join(Profile, Profile.id == MentorSearchDocument.profile_id)
+        if self._watermark is not None:
+            query = query.filter(MentorSearchDocument.updated_at >= self._watermark - REFRESH_SLACK)
+
+        rows = query.all()
+        if rows:
+            with self._lock:
+                for profile_id, document, updated_at, is_mentor in rows:
+                    self._remove_doc(profile_id)
+                    if is_mentor:
+                        self._add_doc(profile_id, document)
+                    if self._watermark is None or updated_at > self._watermark:
+                        self._watermark = updated_at
+
+            logger.debug(f"Search index refreshed with {len(rows)} documents")
+
+        now = dt.datetime.utcnow()
+        if self._mentors_checked is None or now - self._mentors_checked >= MENTOR_CHECK_INTERVAL:
+            self._mentors_checked = now
+            former = [
+                row[0] for row in db.query(MentorSearchDocument.profile_id)
+                .join(Profile, Profile.id == MentorSearchDocument.profile_id)
+                .filter(Profile.is_mentor.isnot(True))
+                .all()
+            ]
+            if former:
+                with self._lock:
+                    for profile_id in former:
+                        self._remove_doc(profile_id)
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """Return up to `limit` (profile_id, score) pairs ranked by BM25"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for profile_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[profile_id] / avg_length)
+                    scores[profile_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+def is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def postgres_search(query: str):
+    """
+    Return (match predicate, rank expression) for a Postgres full-text search.
+
+    Terms are OR'ed to match the in-process index. Returns None when the
+    query has no searchable terms.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return None
+    # Inline the config so the expression matches idx_search_document_tsv
+    config = literal_column("'simple'::regconfig")
+    tsvector = func.to_tsvector(config, MentorSearchDocument.document)
+    tsquery = func.to_tsquery(config, " | ".join(terms))
+    return tsvector.op("@@")(tsquery), func.ts_rank_cd(tsvector, tsquery)
+
+
+# Singleton instance
+mentor_search_index = MentorSearchIndex()
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_search_documents(db)
+        print(f"Rebuilt search documents for {count} mentors")
+    finally:
+        db.close()
@@ -0,0 +1,185 @@
+"""
+Mentor stats maintenance
+
+Keeps the denormalized MentorStats rows in sync with reviews and bookings.
+Writes are applied incrementally inside the caller's transaction, as
+single UPDATE ... SET x = x + delta statements so concurrent writers don't
+lose each other's updates; a full rebuild is available for backfills and
+drift repair.
+
+Rebuild with: python -m app.services.mentor_stats
+"""
+import datetime as dt
+from typing import Optional
+
+from sqlalchemy import Float, case, cast, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import (
+    Profile, MentorStats, MentorReview, Booking, BookingStatusEnum
+)
+
+
+def _seed_stats(db: Session, profile_id: int) -> MentorStats:
+    """A stats row for one mentor computed from the source tables"""
+    avg_rating, review_count = (
+        db.query(func.avg(MentorReview.rating), func.count(MentorReview.id))
+        .filter(MentorReview.reviewee_id == profile_id, MentorReview.is_public == True)
+        .one()
+    )
+    completed_sessions = (
+        db.query(func.count(Booking.id))
+        .filter(Booking.mentor_id == profile_id, Booking.status == BookingStatusEnum.completed)
+        .scalar()
+    )
+    last_booking_at = db.query(func.max(Booking.created_at)).filter(Booking.mentor_id == profile_id).scalar()
+    return MentorStats(
+        profile_id=profile_id,
+        avg_rating=float(avg_rating or 0.0),
+        review_count=review_count or 0,
+        completed_sessions=completed_sessions or 0,
+        last_booking_at=last_booking_at,
+    )
+
+
+def ensure_stats(db: Session, profile_id: int) -> bool:
+    """
+    Make sure a mentor has a stats row; True if it had to be created.
+
+    A missing row is seeded from the full aggregate, after flushing, so it
+    already counts the caller's pending change. If another transaction
+    seeds the row first, the caller's change is left to the increment.
+    """
+    db.flush()
+    if db.get(MentorStats, profile_id) is not None:
+        return False
+    try:
+        with db.begin_nested():
+            db.add(_seed_stats(db, profile_id))
+    except IntegrityError:
+        return False
+    return True
+
+
+def get_or_create_stats(db: Session, profile_id: int) -> MentorStats:
+    """Get the stats row for a mentor, seeding it from the source tables if missing"""
+    ensure_stats(db, profile_id)
+    return db.get(MentorStats, profile_id)
+
+
+def _update_stats(db: Session, profile_id: int, **values):
+    # Column expressions on the right read the row's current values, so concurrent
+    # updates serialize on the row lock instead of overwriting each other
+    db.execute(
+        update(MentorStats)
+        .where(MentorStats.profile_id == profile_id)
+        .values(updated_at=dt.datetime.utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_review(db: Session, mentor_id: int, rating: int, is_public: bool = True, removed: bool = False):
+    """
+    Fold a public review into the mentor's running average.
+
+    Call after staging the review's insert, or its delete with
+    removed=True. Does not commit.
+    """
+    if not is_public or ensure_stats(db, mentor_id):
+        return
+
+    delta, rating_delta = (-1, -rating) if removed else (1, rating)
+    count = MentorStats.review_count
+    new_count = count + delta
+    _update_stats(
+        db,
+        mentor_id,
+        review_count=case((new_count > 0, new_count), else_=0),
+        avg_rating=case(
+            (new_count > 0, (MentorStats.avg_rating * count + rating_delta) / cast(new_count, Float)),
+            else_=0.0,
+        ),
+    )
+
+
+def record_booking(db: Session, mentor_id: int, booked_at: Optional[dt.datetime] = None):
+    """Record that a booking was made with a mentor. Does not commit."""
+    booked_at = booked_at or dt.datetime.utcnow()
+    if ensure_stats(db, mentor_id):
+        return
+    last = MentorStats.last_booking_at
+    _update_stats(
+        db,
+        mentor_id,
+        last_booking_at=case((or_(last.is_(None), last < booked_at), booked_at), else_=last),
+    )
+
+
+def record_completed_session(db: Session, mentor_id: int, count: int = 1):
+    """Increment a mentor's completed session count. Does not commit."""
+    if ensure_stats(db, mentor_id):
+        return
+    _update_stats(db, mentor_id, completed_sessions=MentorStats.completed_sessions + count)
+
+
+def rebuild_mentor_stats(db: Session) -> int:
+    """
+    Recompute every mentor's stats from the source tables.
+
+    Uses three grouped queries and returns the number of rows written.
+    """
+    review_rows = (
+        db.query(
+            MentorReview.reviewee_id,
+            func.avg(MentorReview.rating),
+            func.count(MentorReview.id),
+        )
+        .filter(MentorReview.is_public == True)
+        .group_by(MentorReview.reviewee_id)
+        .all()
+    )
+    reviews = {row[0]: (float(row[1] or 0.0), row[2] or 0) for row in review_rows}
+
+    completed = dict(
+        db.query(Booking.mentor_id, func.count(Booking.id))
+        .filter(Booking.status == BookingStatusEnum.completed)
+        .group_by(Booking.mentor_id)
+        .all()
+    )
+
+    last_booked = dict(
+        db.query(Booking.mentor_id, func.max(Booking.created_at))
+        .group_by(Booking.mentor_id)
+        .all()
+    )
+
+    existing = {stats.profile_id: stats for stats in db.query(MentorStats).all()}
+    mentor_ids = [row[0] for row in db.query(Profile.id).filter(Profile.is_mentor == True).all()]
+
+    for mentor_id in mentor_ids:
+        stats = existing.get(mentor_id)
+        if stats is None:
+            stats = MentorStats(profile_id=mentor_id)
+            db.add(stats)
+
+        avg_rating, review_count = reviews.get(mentor_id, (0.0, 0))
+        stats.avg_rating = avg_rating
+        stats.review_count = review_count
+        stats.completed_sessions = completed.get(mentor_id, 0)
+        stats.last_booking_at = last_booked.get(mentor_id)
+
+    db.commit()
+    return len(mentor_ids)
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        count = rebuild_mentor_stats(db)
+        print(f"Rebuilt stats for {count} mentors")
+    finally:
+        db.close()
@@ -0,0 +1,146 @@
+"""
+In-process metrics
+
+A small registry of counters, gauges and histograms for internal
+instrumentation (background jobs, pools, caches). Metrics are created on
+first use by name and read as one JSON-friendly snapshot, served by
+GET /internal/metrics. Gauges that mirror state owned elsewhere are
+refreshed by collectors registered with register_collector. Values are
+per process.
+"""
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    def __init__(self, description: str = ""):
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self):
+        return self._value
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    def __init__(self, description: str = ""):
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self):
+        return self._value
+
+
+class Histogram:
+    """Distribution of observed values over fixed bucket upper bounds"""
+
+    def __init__(self, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {"count": self._count, "sum": round(self._sum, 6), "buckets": buckets}
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, kind, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = kind(**kwargs)
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metric {name} is a {type(metric).__name__}, not a {kind.__name__}")
+        return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get(name, Counter, description=description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get(name, Gauge, description=description)
+
+    def histogram(
+        self, name: str, description: str = "", buckets: Optional[Sequence[float]] = None
+    ) -> Histogram:
+        return self._get(name, Histogram, description=description, buckets=buckets or DEFAULT_BUCKETS)
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Call `collector` before every snapshot, to refresh gauges read from elsewhere"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, object]:
+        """Current value of every metric (optionally only names starting with prefix)"""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        with self._lock:
+            items = sorted(self._metrics.items())
+        return {name: metric.snapshot() for name, metric in items if name.startswith(prefix)}
+
+
+# Singleton instance
+metrics = MetricsRegistry()
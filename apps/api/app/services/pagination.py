@@ -0,0 +1,184 @@
+"""
+Keyset (cursor) pagination helpers
+
+Cursors are opaque, URL-safe tokens that encode the sort name plus the
+sort key and id of the last row on the previous page. The next page is
+fetched with a seek predicate on (key, id) instead of OFFSET, so deep
+pages cost the same as the first one.
+"""
+import base64
+import datetime as dt
+import json
+from decimal import Decimal
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, union_all
+
+from ..models.mentoring import Profile, MentorStats, Booking
+
+
+# Bookings are listed newest first by (scheduled_at, id)
+BOOKING_CURSOR_SORT = "scheduled"
+
+# sort_by -> (key column, descending)
+MENTOR_SORT_KEYS = {
+    "rating": (MentorStats.avg_rating, True),
+    "sessions": (MentorStats.completed_sessions, True),
+    "price": (Profile.hourly_rate, False),
+    "created": (Profile.created_at, True),
+}
+
+
+def mentor_sort_key(sort_by: str):
+    """Resolve a sort name to (name, key column, descending), defaulting to created"""
+    if sort_by not in MENTOR_SORT_KEYS:
+        sort_by = "created"
+    column, descending = MENTOR_SORT_KEYS[sort_by]
+    return sort_by, column, descending
+
+
+def order_by_key(query, key_column, id_column, descending: bool):
+    """Order by (key, id) with NULL keys last, matching seek_filter"""
+    if descending:
+        return query.order_by(key_column.desc().nullslast(), id_column.desc())
+    return query.order_by(key_column.asc().nullslast(), id_column.asc())
+
+
+def seek_filter(key_column, id_column, descending: bool, last_key: Any, last_id: int):
+    """
+    Predicate selecting rows strictly after (last_key, last_id).
+
+    NULL keys sort last, so a non-NULL cursor key still admits every NULL
+    row, and a NULL cursor key only advances on id.
+    """
+    id_after = id_column < last_id if descending else id_column > last_id
+
+    if last_key is None:
+        return and_(key_column.is_(None), id_after)
+
+    key_after = key_column < last_key if descending else key_column > last_key
+    return or_(
+        key_after,
+        and_(key_column == last_key, id_after),
+        key_column.is_(None),
+    )
+
+
+def _encode_value(value: Any):
+    if isinstance(value, dt.datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return dt.datetime.fromisoformat(value["dt"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(sort_by: str, last_key: Any, last_id: int) -> str:
+    """Build an opaque cursor for the row (last_key, last_id)"""
+    payload = {"s": sort_by, "k": _encode_value(last_key), "i": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Optional[Any], int]:
+    """
+    Decode a cursor into (sort_by, last_key, last_id).
+
+    Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload["s"], _decode_value(payload["k"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_mentor_page(query, sort_by: str, cursor: Optional[str], limit: int):
+    """
+    Fetch one keyset page of a Profile query.
+
+    Returns (mentors, next_cursor); next_cursor is None on the last page.
+    Raises ValueError if the cursor is malformed or was issued for a
+    different sort.
+    """
+    sort_by, key_column, descending = mentor_sort_key(sort_by)
+
+    if cursor:
+        cursor_sort, last_key, last_id = decode_cursor(cursor)
+        if cursor_sort != sort_by:
+            raise ValueError("Cursor does not match sort order")
+        query = query.filter(seek_filter(key_column, Profile.id, descending, last_key, last_id))
+
+    query = order_by_key(query, key_column, Profile.id, descending)
+    rows = query.add_columns(key_column).limit(limit + 1).all()
+
+    page = rows[:limit]
+    mentors = [mentor for mentor, _ in page]
+
+    next_cursor = None
+    if len(rows) > limit and page:
+        last_mentor, last_key = page[-1]
+        next_cursor = encode_cursor(sort_by, last_key, last_mentor.id)
+
+    return mentors, next_cursor
+
+
+def keyset_booking_page(db, user_id: int, role: Optional[str], filters, cursor: Optional[str], limit: int):
+    """
+    Fetch one keyset page of a user's bookings, newest first.
+
+    role is "mentor", "mentee" or None for both. For both roles each role is
+    fetched with its own seek on (mentor_id|mentee_id, scheduled_at) and the
+    two short arms are merged with UNION ALL, instead of an OR that can use
+    neither index. `filters` are extra predicates applied to every arm.
+
+    Returns (bookings, next_cursor). Raises ValueError for bad cursors.
+    """
+    predicates = list(filters)
+    if cursor:
+        cursor_sort, last_key, last_id = decode_cursor(cursor)
+        if cursor_sort != BOOKING_CURSOR_SORT or last_key is None:
+            raise ValueError("Invalid cursor")
+        predicates.append(seek_filter(Booking.scheduled_at, Booking.id, True, last_key, last_id))
+
+    role_columns = {"mentor": [Booking.mentor_id], "mentee": [Booking.mentee_id]}.get(
+        role, [Booking.mentor_id, Booking.mentee_id]
+    )
+    arms = [
+        select(Booking.id, Booking.scheduled_at)
+        .where(column == user_id, *predicates)
+        .order_by(Booking.scheduled_at.desc(), Booking.id.desc())
+        .limit(limit + 1)
+        .subquery()
+        for column in role_columns
+    ]
+    if len(arms) == 1:
+        page_keys = arms[0]
+    else:
+        page_keys = union_all(*(select(arm.c.id, arm.c.scheduled_at) for arm in arms)).subquery()
+
+    rows = (
+        db.query(Booking)
+        .join(page_keys, page_keys.c.id == Booking.id)
+        .order_by(page_keys.c.scheduled_at.desc(), page_keys.c.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    bookings = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and bookings:
+        last = bookings[-1]
+        next_cursor = encode_cursor(BOOKING_CURSOR_SORT, last.scheduled_at, last.id)
+
+    return bookings, next_cursor
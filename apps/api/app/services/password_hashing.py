@@ -0,0 +1,96 @@
+"""
+Bounded executor for password hashing
+
+bcrypt is deliberately slow (~250ms per hash at the default cost). Run on
+the shared worker pool, a burst of logins would occupy every thread and
+stall ordinary requests; run inline, it would block the event loop. Hashes
+and verifications therefore go to a small dedicated pool of
+PASSWORD_HASH_WORKERS threads (bcrypt releases the GIL) with at most
+PASSWORD_HASH_QUEUE_LIMIT calls waiting. When that queue is full, callers
+get PasswordHashingBusy immediately, which the auth endpoints turn into
+429 Too Many Requests, instead of queueing without bound.
+
+Metrics: password_hash.in_flight and .queue_depth (gauges), .rejected and
+.rehashed (counters), .wait_seconds and .run_seconds (histograms).
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+# Seconds clients are asked to wait before retrying when hashing is saturated
+RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full"""
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing calls on a bounded thread pool"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_limit: int = PASSWORD_HASH_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        self._rejected = metrics.counter("password_hash.rejected")
+        self._wait = metrics.histogram("password_hash.wait_seconds")
+        self._run = metrics.histogram("password_hash.run_seconds")
+        metrics.register_collector(self._collect)
+
+    def _collect(self):
+        metrics.gauge("password_hash.in_flight").set(self._in_flight)
+        metrics.gauge("password_hash.queue_depth").set(self.queue_depth)
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls accepted but not yet started"""
+        return max(0, self._in_flight - self.workers)
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Run func(*args) on the hashing pool, or raise PasswordHashingBusy if the queue is full"""
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self._rejected.inc()
+                raise PasswordHashingBusy()
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def call() -> T:
+            started = time.perf_counter()
+            self._wait.observe(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                self._run.observe(time.perf_counter() - started)
+
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            self._release(None)
+            raise
+        # Released when the work finishes, even if the awaiting request is cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+
+# Singleton instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,107 @@
+"""
+Authenticated principal cache
+
+Resolving a bearer token to a user and their profile costs two queries
+(users by email, then profiles by user_id) on every authenticated request.
+The result is small and rarely changes, so it is cached per process in an
+LRU with a TTL, keyed by the token subject (the user's email).
+
+Entries are invalidated when the user or their profile changes in this
+process; other processes pick changes up when the TTL expires, so the TTL
+bounds staleness of is_mentor / profile_id.
+
+Metrics: principal_cache.hits, .misses, .evictions, .invalidations
+(counters), .size and .hit_ratio (gauges).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+
+from .metrics import metrics
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+
+class Principal(NamedTuple):
+    """The authenticated user, with their profile id if they have one"""
+    user_id: int
+    email: str
+    profile_id: Optional[int]
+    is_mentor: bool
+
+
+class PrincipalCache:
+    """LRU + TTL map of token subject -> Principal"""
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # subject -> (principal, expires_at)
+        self._subjects_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self._hits = metrics.counter("principal_cache.hits")
+        self._misses = metrics.counter("principal_cache.misses")
+        self._evictions = metrics.counter("principal_cache.evictions")
+        self._invalidations = metrics.counter("principal_cache.invalidations")
+        metrics.register_collector(self._collect)
+
+    def _collect(self):
+        metrics.gauge("principal_cache.size").set(len(self._entries))
+        lookups = self._hits.value + self._misses.value
+        metrics.gauge("principal_cache.hit_ratio").set(round(self._hits.value / lookups, 4) if lookups else 0.0)
+
+    def _remove(self, subject: str):
+        entry = self._entries.pop(subject, None)
+        if entry is not None:
+            subjects = self._subjects_by_user.get(entry[0].user_id)
+            if subjects is not None:
+                subjects.discard(subject)
+                if not subjects:
+                    del self._subjects_by_user[entry[0].user_id]
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(subject)
+                self._hits.inc()
+                return entry[0]
+            if entry is not None:
+                self._remove(subject)
+        self._misses.inc()
+        return None
+
+    def put(self, subject: str, principal: Principal):
+        with self._lock:
+            self._remove(subject)
+            self._entries[subject] = (principal, time.monotonic() + self.ttl)
+            self._subjects_by_user.setdefault(principal.user_id, set()).add(subject)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions.inc()
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._remove(subject)
+        self._invalidations.inc()
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached principal of a user (call after changing the user or their profile)"""
+        with self._lock:
+            for subject in list(self._subjects_by_user.get(user_id, ())):
+                self._remove(subject)
+        self._invalidations.inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._subjects_by_user.clear()
+
+
+# Singleton instance
+principal_cache = PrincipalCache()
@@ -0,0 +1,344 @@
+"""
+Vectorized mentor recommendations
+
+Every mentor is encoded as a row of a dense feature matrix (categories,
+expertise tags, price band) plus a binary language matrix and a quality
+prior (smoothed rating and engagement from likes, saves and bookings).
+A mentee is encoded the same way from their languages and the mentors
+they have liked, saved or booked, and all mentors are scored in a single
+matrix-vector product, plus a boost for the precomputed collaborative
+neighbours of those mentors (see services.collaborative).
+
+The matrices are cached per process and maintained by a scheduler job
+(recommendation_jobs, started in every API process by app.main), so
+requests only read the cache. Changed profiles are folded in
+incrementally (Profile.updated_at watermark); the whole cache is rebuilt
+periodically so quality signals stay fresh.
+"""
+import datetime as dt
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models.mentoring import (
+    Profile, MentorCategory, MentorTag, MentorStats, MentorLike, MentorSave, Booking
+)
+from .collaborative import neighbor_scores
+from .languages import normalize_languages
+from .scheduler import Job
+
+logger = logging.getLogger(__name__)
+
+# Hourly rate band edges (EUR); mentors without a rate get their own band
+PRICE_BANDS = [30, 60, 100]
+
+# Score weights
+CONTENT_WEIGHT = 1.0
+LANGUAGE_WEIGHT = 0.5
+QUALITY_WEIGHT = 0.3
+COLLABORATIVE_WEIGHT = 0.8
+
+# Bayesian rating prior: averages are pulled toward PRIOR_RATING by PRIOR_REVIEWS pseudo-reviews
+PRIOR_RATING = 3.5
+PRIOR_REVIEWS = 5
+
+# How often to look for changed profiles, and how often to rebuild everything
+REFRESH_INTERVAL = 30.0
+REBUILD_INTERVAL = 600.0
+
+
+def _price_band(hourly_rate) -> int:
+    if hourly_rate is None:
+        return len(PRICE_BANDS) + 1
+    return int(np.searchsorted(PRICE_BANDS, float(hourly_rate), side="right"))
+
+
+class _Vocabulary:
+    """Column layout of the content matrix"""
+
+    def __init__(self, category_ids: Sequence[int], tag_ids: Sequence[int], languages: Sequence[str]):
+        self.category_col = {cid: i for i, cid in enumerate(sorted(category_ids))}
+        offset = len(self.category_col)
+        self.tag_col = {tid: offset + i for i, tid in enumerate(sorted(tag_ids))}
+        offset += len(self.tag_col)
+        self.price_offset = offset
+        self.width = offset + len(PRICE_BANDS) + 2
+        self.language_col = {lang: i for i, lang in enumerate(sorted(languages))}
+
+    def covers(self, category_ids, tag_ids, languages) -> bool:
+        return (
+            set(category_ids) <= self.category_col.keys()
+            and set(tag_ids) <= self.tag_col.keys()
+            and set(languages) <= self.language_col.keys()
+        )
+
+
+class RecommendationEngine:
+    """Per-process cache of mentor feature matrices with vectorized scoring"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._vocab: Optional[_Vocabulary] = None
+        self._mentor_ids = np.zeros(0, dtype=np.int64)
+        self._row_of: Dict[int, int] = {}
+        self._content = np.zeros((0, 0), dtype=np.float32)
+        self._languages = np.zeros((0, 0), dtype=np.float32)
+        self._quality = np.zeros(0, dtype=np.float32)
+        self._active = np.zeros(0, dtype=bool)
+        self._watermark: Optional[dt.datetime] = None
+        self._last_rebuild = 0.0
+
+    # Loading
+
+    def _load_features(self, db: Session, mentor_ids: Optional[Sequence[int]] = None):
+        """Load raw per-mentor features, optionally restricted to some mentors"""
+        profiles = db.query(
+            Profile.id, Profile.hourly_rate, Profile.languages, Profile.is_mentor, Profile.updated_at
+        )
+        categories = db.query(MentorCategory.mentor_id, MentorCategory.category_id)
+        tags = db.query(MentorTag.mentor_id, MentorTag.tag_id)
+
+        if mentor_ids is None:
+            profiles = profiles.filter(Profile.is_mentor == True)
+        else:
+            profiles = profiles.filter(Profile.id.in_(mentor_ids))
+            categories = categories.filter(MentorCategory.mentor_id.in_(mentor_ids))
+            tags = tags.filter(MentorTag.mentor_id.in_(mentor_ids))
+
+        mentor_categories = defaultdict(list)
+        for mentor_id, category_id in categories.all():
+            mentor_categories[mentor_id].append(category_id)
+
+        mentor_tags = defaultdict(list)
+        for mentor_id, tag_id in tags.all():
+            mentor_tags[mentor_id].append(tag_id)
+
+        return profiles.all(), mentor_categories, mentor_tags
+
+    def _load_quality(self, db: Session, mentor_ids: np.ndarray) -> np.ndarray:
+        """Smoothed rating plus log-scaled engagement, in [0, 1]"""
+        stats = {
+            profile_id: (avg_rating or 0.0, review_count or 0)
+            for profile_id, avg_rating, review_count in db.query(
+                MentorStats.profile_id, MentorStats.avg_rating, MentorStats.review_count
+            ).all()
+        }
+
+        engagement: Dict[int, int] = defaultdict(int)
+        for model in (MentorLike, MentorSave, Booking):
+            for mentor_id, count in db.query(model.mentor_id, func.count()).group_by(model.mentor_id).all():
+                engagement[mentor_id] += count
+
+        rating = np.empty(len(mentor_ids), dtype=np.float32)
+        activity = np.empty(len(mentor_ids), dtype=np.float32)
+        for row, mentor_id in enumerate(mentor_ids.tolist()):
+            avg_rating, review_count = stats.get(mentor_id, (0.0, 0))
+            rating[row] = (avg_rating * review_count + PRIOR_RATING * PRIOR_REVIEWS) / (review_count + PRIOR_REVIEWS) / 5.0
+            activity[row] = engagement.get(mentor_id, 0)
+
+        activity = np.log1p(activity)
+        if activity.size and activity.max() > 0:
+            activity /= activity.max()
+
+        return 0.7 * rating + 0.3 * activity
+
+    def _encode_rows(self, vocab: _Vocabulary, profiles, mentor_categories, mentor_tags):
+        """Encode profiles into (content, languages) matrices with L2-normalized content rows"""
+        content = np.zeros((len(profiles), vocab.width), dtype=np.float32)
+        languages = np.zeros((len(profiles), len(vocab.language_col)), dtype=np.float32)
+
+        for row, (mentor_id, hourly_rate, langs, _, _) in enumerate(profiles):
+            for category_id in mentor_categories.get(mentor_id, ()):
+                content[row, vocab.category_col[category_id]] = 1.0
+            for tag_id in mentor_tags.get(mentor_id, ()):
+                content[row, vocab.tag_col[tag_id]] = 1.0
+            content[row, vocab.price_offset + _price_band(hourly_rate)] = 1.0
+            for lang in normalize_languages(langs):
+                languages[row, vocab.language_col[lang]] = 1.0
+
+        norms = np.linalg.norm(content, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return content / norms, languages
+
+    def rebuild(self, db: Session) -> int:
+        """Rebuild every matrix from the database; returns the number of mentors"""
+        started = time.perf_counter()
+        profiles, mentor_categories, mentor_tags = self._load_features(db)
+
+        vocab = _Vocabulary(
+            {cid for cids in mentor_categories.values() for cid in cids},
+            {tid for tids in mentor_tags.values() for tid in tids},
+            {lang for profile in profiles for lang in normalize_languages(profile[2])},
+        )
+        content, languages = self._encode_rows(vocab, profiles, mentor_categories, mentor_tags)
+        mentor_ids = np.array([profile[0] for profile in profiles], dtype=np.int64)
+        quality = self._load_quality(db, mentor_ids)
+        watermark = max((profile[4] for profile in profiles if profile[4]), default=None)
+
+        with self._lock:
+            self._vocab = vocab
+            self._mentor_ids = mentor_ids
+            self._row_of = {mentor_id: row for row, mentor_id in enumerate(mentor_ids.tolist())}
+            self._content = content
+            self._languages = languages
+            self._quality = quality
+            self._active = np.ones(len(mentor_ids), dtype=bool)
+            self._watermark = watermark
+            self._last_rebuild = time.monotonic()
+
+        logger.info(
+            f"Recommendation matrix rebuilt: {len(mentor_ids)} mentors x {vocab.width} features "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return len(mentor_ids)
+
+    def _apply_changes(self, db: Session, changed_ids: List[int]) -> bool:
+        """Fold changed profiles into the cache. Returns False if a full rebuild is needed."""
+        profiles, mentor_categories, mentor_tags = self._load_features(db, changed_ids)
+        vocab = self._vocab
+
+        if not vocab.covers(
+            {cid for cids in mentor_categories.values() for cid in cids},
+            {tid for tids in mentor_tags.values() for tid in tids},
+            {lang for profile in profiles for lang in normalize_languages(profile[2])},
+        ):
+            return False
+
+        content, languages = self._encode_rows(vocab, profiles, mentor_categories, mentor_tags)
+
+        with self._lock:
+            new_rows = [row for row, profile in enumerate(profiles) if profile[3] and profile[0] not in self._row_of]
+            if new_rows:
+                start = len(self._mentor_ids)
+                self._mentor_ids = np.concatenate([self._mentor_ids, [profiles[row][0] for row in new_rows]])
+                self._content = np.vstack([self._content, content[new_rows]])
+                self._languages = np.vstack([self._languages, languages[new_rows]])
+                # New mentors get the average quality until the next rebuild
+                default_quality = self._quality.mean() if self._quality.size else 0.5
+                self._quality = np.concatenate([self._quality, np.full(len(new_rows), default_quality, dtype=np.float32)])
+                self._active = np.concatenate([self._active, np.ones(len(new_rows), dtype=bool)])
+                for offset, row in enumerate(new_rows):
+                    self._row_of[profiles[row][0]] = start + offset
+
+            for row, profile in enumerate(profiles):
+                if profile[4] and (self._watermark is None or profile[4] > self._watermark):
+                    self._watermark = profile[4]
+                target = self._row_of.get(profile[0])
+                if target is None:
+                    continue  # Mentee profile
+                self._content[target] = content[row]
+                self._languages[target] = languages[row]
+                self._active[target] = bool(profile[3])
+
+        return True
+
+    def refresh(self, db: Session) -> int:
+        """Rebuild the cache if it is empty or due, else fold in changed profiles; returns mentors updated"""
+        with self._refresh_lock:
+            if self._vocab is None or time.monotonic() - self._last_rebuild > REBUILD_INTERVAL:
+                return self.rebuild(db)
+
+            query = db.query(Profile.id)
+            if self._watermark is not None:
+                query = query.filter(Profile.updated_at > self._watermark)
+            changed_ids = [row[0] for row in query.all()]
+            if changed_ids and not self._apply_changes(db, changed_ids):
+                return self.rebuild(db)
+            return len(changed_ids)
+
+    # Scoring
+
+    def _load_interactions(self, db: Session, mentee: Optional[Profile]):
+        """Mentor ids the mentee has liked/saved/booked, and the booked subset"""
+        if mentee is None:
+            return set(), set()
+
+        interacted: Set[int] = set()
+        for model in (MentorLike, MentorSave):
+            interacted.update(row[0] for row in db.query(model.mentor_id).filter(model.mentee_id == mentee.id).all())
+        booked = {row[0] for row in db.query(Booking.mentor_id).filter(Booking.mentee_id == mentee.id).distinct().all()}
+        interacted.update(booked)
+        return interacted, booked
+
+    def _mentee_vectors(self, mentee: Optional[Profile], interacted: Set[int], booked: Set[int]):
+        """Encode a mentee as (content preference, language preference). Caller holds the lock."""
+        content = np.zeros(self._content.shape[1], dtype=np.float32)
+        languages = np.zeros(self._languages.shape[1], dtype=np.float32)
+
+        if mentee is not None:
+            for lang in normalize_languages(mentee.languages):
+                col = self._vocab.language_col.get(lang)
+                if col is not None:
+                    languages[col] = 1.0
+
+        rows = [self._row_of[mentor_id] for mentor_id in interacted if mentor_id in self._row_of]
+        if rows:
+            # Booked mentors count double in the taste centroid
+            weights = np.array([2.0 if int(self._mentor_ids[row]) in booked else 1.0 for row in rows], dtype=np.float32)
+            content = weights @ self._content[rows]
+            norm = np.linalg.norm(content)
+            if norm > 0:
+                content /= norm
+
+        return content, languages
+
+    def recommend(self, db: Session, mentee: Optional[Profile], limit: int, exclude: Sequence[int] = ()) -> List[int]:
+        """
+        Return up to `limit` mentor ids ranked for the mentee.
+
+        Mentors the mentee already liked, saved or booked are left out.
+        Only reads the cache, which is empty until the first refresh.
+        """
+        interacted, booked = self._load_interactions(db, mentee)
+        # "Mentees like you also booked": precomputed neighbours of the mentee's mentors
+        collaborative = neighbor_scores(db, list(interacted))
+
+        with self._lock:
+            if not len(self._mentor_ids):
+                return []
+
+            content_pref, language_pref = self._mentee_vectors(mentee, interacted, booked)
+            scores = CONTENT_WEIGHT * (self._content @ content_pref) + QUALITY_WEIGHT * self._quality
+
+            neighbors = [(self._row_of[mentor_id], score) for mentor_id, score in collaborative.items() if mentor_id in self._row_of]
+            if neighbors:
+                rows, values = zip(*neighbors)
+                values = np.array(values, dtype=np.float32)
+                scores[list(rows)] += COLLABORATIVE_WEIGHT * values / values.max()
+
+            if language_pref.any():
+                # Mentors sharing no language with the mentee are dropped
+                overlap = self._languages @ language_pref
+                scores += LANGUAGE_WEIGHT * (overlap > 0)
+                scores[overlap == 0] = -np.inf
+
+            scores[~self._active] = -np.inf
+            excluded = [self._row_of[mentor_id] for mentor_id in {*exclude, *interacted} if mentor_id in self._row_of]
+            if mentee is not None and mentee.id in self._row_of:
+                excluded.append(self._row_of[mentee.id])
+            if excluded:
+                scores[excluded] = -np.inf
+
+            candidates = np.flatnonzero(np.isfinite(scores))
+            if not candidates.size:
+                return []
+            if candidates.size > limit:
+                top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                candidates = candidates[top]
+            order = candidates[np.lexsort((self._mentor_ids[candidates], -scores[candidates]))]
+            return self._mentor_ids[order].tolist()
+
+
+def recommendation_jobs() -> List[Job]:
+    return [Job("recommendations_refresh", REFRESH_INTERVAL, recommendation_engine.refresh)]
+
+
+# Singleton instance
+recommendation_engine = RecommendationEngine()
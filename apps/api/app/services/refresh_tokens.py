@@ -0,0 +1,107 @@
+"""
+Refresh tokens and sessions
+
+A sign-in starts a session: a family of refresh tokens sharing a
+family_id, which is also the sid claim of every access token issued in
+that session. Refresh tokens are random, returned to the client once and
+stored only as a SHA-256 hash. Each use rotates the token: the presented
+one is revoked and a new one issued in the same family. Presenting an
+already rotated token means it leaked (or the client replayed it), so the
+whole session is revoked: its refresh tokens, and its sid in the access
+token revocation list, which ends the session's outstanding access tokens.
+"""
+import datetime as dt
+import hashlib
+import os
+import secrets
+import uuid
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from ..database import ACCESS_EXPIRES_MIN, RefreshToken, RevokedToken
+from .metrics import metrics
+from .scheduler import Job
+from .token_revocation import REVOCATION_SYNC_SECONDS, revocation_list
+
+REFRESH_EXPIRES_DAYS = int(os.getenv("REFRESH_EXPIRES_DAYS", "30"))
+
+# How often expired refresh tokens and revocations are deleted
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class InvalidRefreshToken(Exception):
+    """Raised for unknown, expired or reused refresh tokens"""
+    pass
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> Tuple[str, RefreshToken]:
+    """Stage a new refresh token (in a new session unless family_id is given); returns it and its row"""
+    token = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=dt.datetime.utcnow() + dt.timedelta(days=REFRESH_EXPIRES_DAYS),
+    )
+    db.add(row)
+    db.flush()
+    return token, row
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[str, RefreshToken]:
+    """Stage the exchange of a refresh token for a new one in the same session"""
+    now = dt.datetime.utcnow()
+    row = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == hash_refresh_token(token))
+        .with_for_update()
+        .first()
+    )
+    if row is None or row.expires_at <= now:
+        raise InvalidRefreshToken("Invalid or expired refresh token")
+    if row.revoked_at is not None:
+        revoke_session(db, row.family_id)
+        db.commit()
+        metrics.counter("auth.refresh_token_reuse").inc()
+        raise InvalidRefreshToken("Refresh token already used; session revoked")
+
+    row.revoked_at = now
+    return issue_refresh_token(db, row.user_id, row.family_id)
+
+
+def revoke_session(db: Session, family_id: str):
+    """Stage revocation of a session's refresh tokens and access tokens"""
+    now = dt.datetime.utcnow()
+    db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: now}, synchronize_session=False)
+    # Access tokens of the session carry its id as sid and live at most ACCESS_EXPIRES_MIN
+    revoke_access_token(db, family_id, now + dt.timedelta(minutes=ACCESS_EXPIRES_MIN))
+
+
+def revoke_access_token(db: Session, token_id: str, expires_at: dt.datetime):
+    """Stage revocation of an access token jti (or session id) until expires_at"""
+    db.merge(RevokedToken(token_id=token_id, revoked_at=dt.datetime.utcnow(), expires_at=expires_at))
+    revocation_list.add(token_id)
+
+
+def prune_expired_tokens(db: Session) -> int:
+    """Delete expired refresh tokens and revocations of expired access tokens"""
+    now = dt.datetime.utcnow()
+    deleted = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now)).rowcount
+    deleted += db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now)).rowcount
+    db.commit()
+    return deleted
+
+
+def token_jobs() -> List[Job]:
+    return [
+        Job("revocation_sync", REVOCATION_SYNC_SECONDS, revocation_list.sync),
+        Job("prune_auth_tokens", PRUNE_INTERVAL_SECONDS, prune_expired_tokens),
+    ]
@@ -0,0 +1,202 @@
+"""
+Read-replica routing
+
+Read-only requests (GET/HEAD) can be served from replicas listed in
+DATABASE_REPLICA_URLS (comma-separated); everything else uses the
+primary. Routing rules:
+
+- Read-your-writes: after a user's successful write, their reads go to the
+  primary for READ_YOUR_WRITES_SECONDS, longer than expected replica lag.
+  The end of that window is handed to the client, as the primary_until
+  cookie and the X-Primary-Until response header, and honoured when it
+  comes back with a read (either way; API clients without cookies echo
+  the header), so it holds whichever process serves the read. Writers are
+  also tracked per process by token subject, for clients that send neither.
+- Health: a replica that fails to hand out a connection is skipped for
+  REPLICA_RETRY_SECONDS and the read falls back to another replica or the
+  primary.
+
+Metrics: db.replica.reads, .primary_reads, .read_your_writes and
+.fallbacks (counters), and each replica's pool under db.pool.replica<N>.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from fastapi import Request, Response
+from jose import JWTError, jwt
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .db_pool import engine_options, instrument_engine
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+# Bound on tracked recent writers per process
+MAX_TRACKED_WRITERS = 100_000
+
+READ_METHODS = {"GET", "HEAD"}
+
+# Where the client carries the end of its read-your-writes window (unix time)
+PRIMARY_UNTIL_COOKIE = "primary_until"
+PRIMARY_UNTIL_HEADER = "X-Primary-Until"
+
+
+def token_subject(request: Request) -> Optional[str]:
+    """Subject of the request's bearer token, unverified (only used for routing)"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+
+def primary_until(request: Request) -> float:
+    """End of the read-your-writes window the client sent back, or 0"""
+    value = request.cookies.get(PRIMARY_UNTIL_COOKIE) or request.headers.get(PRIMARY_UNTIL_HEADER)
+    try:
+        until = float(value or 0)
+    except ValueError:
+        return 0.0
+    # Not signed: never honour more than one window from now
+    return min(until, time.time() + READ_YOUR_WRITES_SECONDS) if math.isfinite(until) else 0.0
+
+
+class Replica:
+    """One replica's engines (async created on first use) and health"""
+
+    def __init__(self, index: int, url: str, async_url: Callable[[str], str]):
+        self.name = f"replica{index}"
+        self.url = url
+        self._async_url = async_url
+        self.unhealthy_until = 0.0
+
+        self.engine = create_engine(url, echo=False, future=True, **engine_options(url, self.name))
+        instrument_engine(self.engine, self.name)
+        self.session_factory = sessionmaker(bind=self.engine, autoflush=False, autocommit=False, future=True)
+        self._async_session_factory = None
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def mark_unhealthy(self, error: Exception):
+        self.unhealthy_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        logger.warning(f"Replica {self.name} unavailable, using fallback for {REPLICA_RETRY_SECONDS}s: {error}")
+
+    def async_session_factory(self):
+        if self._async_session_factory is None:
+            name = f"{self.name}_async"
+            async_url = self._async_url(self.url)
+            async_engine = create_async_engine(
+                async_url, echo=False, **engine_options(async_url, name, is_async=True)
+            )
+            instrument_engine(async_engine, name)
+            self._async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_session_factory
+
+
+class ReplicaRouter:
+    """Chooses the session for a request: a healthy replica or the primary"""
+
+    def __init__(self, urls: List[str], async_url: Callable[[str], str]):
+        self.replicas = [Replica(index, url, async_url) for index, url in enumerate(urls)]
+        self._next = 0
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def record_write(self, response: Response, subject: Optional[str]):
+        """Route the writer's reads to the primary for the read-your-writes window"""
+        until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+        response.set_cookie(
+            PRIMARY_UNTIL_COOKIE, until, max_age=math.ceil(READ_YOUR_WRITES_SECONDS), httponly=True, samesite="lax"
+        )
+        response.headers[PRIMARY_UNTIL_HEADER] = until
+        if subject is None:
+            return
+        with self._lock:
+            self._writers[subject] = time.monotonic() + READ_YOUR_WRITES_SECONDS
+            self._writers.move_to_end(subject)
+            while len(self._writers) > MAX_TRACKED_WRITERS:
+                self._writers.popitem(last=False)
+
+    def wrote_recently(self, request: Request) -> bool:
+        if primary_until(request) > time.time():
+            return True
+        subject = token_subject(request)
+        if subject is None:
+            return False
+        with self._lock:
+            until = self._writers.get(subject)
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self._writers[subject]
+                return False
+            return True
+
+    def candidates(self, request: Request) -> List[Replica]:
+        """Replicas to try for this request, in order; empty means use the primary"""
+        if not self.replicas or request.method not in READ_METHODS:
+            return []
+        if self.wrote_recently(request):
+            metrics.counter("db.replica.read_your_writes").inc()
+            return []
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return []
+        with self._lock:
+            start = self._next % len(healthy)
+            self._next += 1
+        return healthy[start:] + healthy[:start]
+
+    def open_session(self, request: Request, primary: Callable[[], Session]) -> Session:
+        """Sync session for the request, with a connection already checked out"""
+        for replica in self.candidates(request):
+            db = replica.session_factory()
+            try:
+                db.connection()
+            except DBAPIError as e:
+                db.close()
+                replica.mark_unhealthy(e)
+                metrics.counter("db.replica.fallbacks").inc()
+                continue
+            metrics.counter("db.replica.reads").inc()
+            return db
+        metrics.counter("db.replica.primary_reads").inc()
+        return primary()
+
+    async def open_async_session(self, request: Request, primary: Callable[[], AsyncSession]) -> AsyncSession:
+        """Async session for the request, with a connection already checked out"""
+        for replica in self.candidates(request):
+            db = replica.async_session_factory()()
+            try:
+                await db.connection()
+            except DBAPIError as e:
+                await db.close()
+                replica.mark_unhealthy(e)
+                metrics.counter("db.replica.fallbacks").inc()
+                continue
+            metrics.counter("db.replica.reads").inc()
+            return db
+        metrics.counter("db.replica.primary_reads").inc()
+        return primary()
@@ -0,0 +1,96 @@
+"""
+Periodic background jobs
+
+A minimal asyncio scheduler for maintenance sweeps. Each job is a
+synchronous function taking a database session; it runs on a worker
+thread so the event loop keeps serving requests. Jobs must be safe to run
+concurrently in several processes (every API worker may run a scheduler),
+e.g. by claiming rows with SELECT ... FOR UPDATE SKIP LOCKED.
+
+Per-job metrics: scheduler.<job>.runs, .errors, .duration_seconds and
+.last_success (unix time).
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[Session], int]
+
+
+class Job:
+    """A named sweep run every `interval` seconds; returns the number of rows it changed"""
+
+    def __init__(self, name: str, interval: float, func: JobFunc):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = 0.0
+
+
+class Scheduler:
+    """Runs jobs at their intervals until stopped"""
+
+    def __init__(self, jobs: Sequence[Job], session_factory: Callable[[], Session] = SessionLocal):
+        self.jobs: List[Job] = list(jobs)
+        self.session_factory = session_factory
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def run_job(self, job: Job) -> int:
+        """Run one job in its own session, recording metrics. Errors are logged, not raised."""
+        started = time.perf_counter()
+        metrics.counter(f"scheduler.{job.name}.runs").inc()
+        db = self.session_factory()
+        try:
+            changed = job.func(db)
+            metrics.gauge(f"scheduler.{job.name}.last_success").set(time.time())
+            if changed:
+                logger.info(f"Job {job.name} updated {changed} rows")
+            return changed
+        except Exception:
+            db.rollback()
+            metrics.counter(f"scheduler.{job.name}.errors").inc()
+            logger.exception(f"Job {job.name} failed")
+            return 0
+        finally:
+            db.close()
+            metrics.histogram(f"scheduler.{job.name}.duration_seconds").observe(time.perf_counter() - started)
+
+    def run_once(self) -> int:
+        """Run every job once, synchronously"""
+        return sum(self.run_job(job) for job in self.jobs)
+
+    async def run(self):
+        """Run due jobs on a worker thread until stop() is called"""
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            for job in self.jobs:
+                if job.next_run <= now:
+                    await asyncio.to_thread(self.run_job, job)
+                    job.next_run = time.monotonic() + job.interval
+
+            wait = max(0.0, min(job.next_run for job in self.jobs) - time.monotonic())
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        """Start the scheduler as a task on the running loop"""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Ask the scheduler to stop and wait for the running job to finish"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
@@ -0,0 +1,276 @@
+"""
+Stripe webhook inbox
+
+The webhook endpoint only verifies the signature and stores the event in
+stripe_events, keyed by Stripe's event id, then acknowledges. Stripe
+redelivers events it considers unacknowledged and may send the same event
+more than once; the primary key turns every redelivery or replay into a
+no-op.
+
+drain_inbox applies stored events in bounded batches:
+
+- Ordering: events of one Stripe object (data.object.id) are applied in
+  the order Stripe created them. Only the oldest pending event of each
+  object is claimable, so a later event waits while an earlier one is
+  being retried. An event older than one already applied for the same
+  object is marked superseded instead of being applied, since every
+  handled event carries the object's full state.
+- Concurrency: events are claimed with SELECT ... FOR UPDATE SKIP LOCKED,
+  so several workers can drain at once.
+- Failures: each event is applied in a savepoint. A failing event is
+  retried with exponential backoff (RETRY_BASE doubling up to RETRY_MAX)
+  and marked failed after STRIPE_INBOX_MAX_ATTEMPTS attempts.
+
+Metrics: stripe_inbox.received, .duplicates, .processed, .superseded,
+.retried, .failed (counters), .depth, .oldest_pending_seconds, .dead_letters
+(gauges, refreshed by each drain) and .lag_seconds (histogram of time from
+receipt to processing).
+
+The drain runs in-process with the API scheduler (see app.main) or in a
+standalone worker: python -m app.services.stripe_inbox [--once]
+"""
+import datetime as dt
+import logging
+import os
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from ..models.mentoring import (
+    Booking, BookingStatusEnum, PaymentStatusEnum, StripeEvent, Subscription, SubscriptionStatusEnum,
+    Transaction, WebhookEventStatusEnum,
+)
+from .metrics import metrics
+from .scheduler import Job, Scheduler
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("STRIPE_INBOX_BATCH_SIZE", "100"))
+MAX_BATCHES = int(os.getenv("STRIPE_INBOX_MAX_BATCHES", "10"))
+MAX_ATTEMPTS = int(os.getenv("STRIPE_INBOX_MAX_ATTEMPTS", "8"))
+DRAIN_INTERVAL_SECONDS = float(os.getenv("STRIPE_INBOX_INTERVAL_SECONDS", "2"))
+
+RETRY_BASE = dt.timedelta(seconds=30)
+RETRY_MAX = dt.timedelta(hours=1)
+
+LAG_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+# Stripe subscription statuses that map onto ours; others leave the status unchanged
+SUBSCRIPTION_STATUSES = {
+    "active": SubscriptionStatusEnum.active,
+    "trialing": SubscriptionStatusEnum.active,
+    "canceled": SubscriptionStatusEnum.cancelled,
+    "incomplete_expired": SubscriptionStatusEnum.expired,
+}
+
+
+def record_event(db: Session, event: Dict[str, Any]) -> bool:
+    """Store a verified event in the inbox; False if it was already there (a redelivery or replay)"""
+    if db.get(StripeEvent, event["event_id"]) is not None:
+        metrics.counter("stripe_inbox.duplicates").inc()
+        return False
+
+    data = event["data"]
+    db.add(StripeEvent(
+        id=event["event_id"],
+        type=event["event_type"],
+        object_id=data.get("id") or event["event_id"],
+        payload=data,
+        created=dt.datetime.utcfromtimestamp(event["created"]),
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Delivered concurrently to another request
+        db.rollback()
+        metrics.counter("stripe_inbox.duplicates").inc()
+        return False
+    metrics.counter("stripe_inbox.received").inc()
+    return True
+
+
+# Event handlers: stage changes for one event's data.object, without committing
+
+def _transaction_for_payment(db: Session, payment_intent_id: str):
+    return db.query(Transaction).filter(Transaction.stripe_payment_id == payment_intent_id).first()
+
+
+def _checkout_completed(db: Session, data: dict):
+    booking_id = (data.get("metadata") or {}).get("booking_id")
+    if not booking_id:
+        return
+    transaction = db.query(Transaction).filter(Transaction.booking_id == int(booking_id)).first()
+    if transaction:
+        transaction.status = PaymentStatusEnum.completed
+        transaction.stripe_payment_id = data.get("payment_intent")
+
+    booking = db.get(Booking, int(booking_id))
+    if booking and booking.status == BookingStatusEnum.pending:
+        booking.status = BookingStatusEnum.confirmed
+
+
+def _payment_succeeded(db: Session, data: dict):
+    transaction = _transaction_for_payment(db, data["id"])
+    if transaction:
+        transaction.status = PaymentStatusEnum.completed
+
+
+def _payment_failed(db: Session, data: dict):
+    transaction = _transaction_for_payment(db, data["id"])
+    if transaction and transaction.status == PaymentStatusEnum.pending:
+        transaction.status = PaymentStatusEnum.failed
+
+
+def _subscription_changed(db: Session, data: dict):
+    subscription = db.query(Subscription).filter(Subscription.stripe_subscription_id == data["id"]).first()
+    if not subscription:
+        return
+    status = SUBSCRIPTION_STATUSES.get(data.get("status"))
+    if status is not None:
+        subscription.status = status
+    if data.get("current_period_end"):
+        subscription.expires_at = dt.datetime.utcfromtimestamp(data["current_period_end"])
+
+
+def _subscription_deleted(db: Session, data: dict):
+    subscription = db.query(Subscription).filter(Subscription.stripe_subscription_id == data["id"]).first()
+    if subscription:
+        subscription.status = SubscriptionStatusEnum.cancelled
+        subscription.cancelled_at = subscription.cancelled_at or dt.datetime.utcnow()
+
+
+HANDLERS: Dict[str, Callable[[Session, dict], None]] = {
+    "checkout.session.completed": _checkout_completed,
+    "payment_intent.succeeded": _payment_succeeded,
+    "payment_intent.payment_failed": _payment_failed,
+    "customer.subscription.created": _subscription_changed,
+    "customer.subscription.updated": _subscription_changed,
+    "customer.subscription.deleted": _subscription_deleted,
+}
+
+
+def apply_event(db: Session, event_type: str, data: dict):
+    """Stage the effects of one event; unhandled types are ignored"""
+    handler = HANDLERS.get(event_type)
+    if handler is not None:
+        handler(db, data)
+
+
+def _retry_delay(attempts: int) -> dt.timedelta:
+    return min(RETRY_MAX, RETRY_BASE * 2 ** (attempts - 1))
+
+
+def _is_superseded(db: Session, event: StripeEvent) -> bool:
+    return db.query(
+        exists().where(
+            StripeEvent.object_id == event.object_id,
+            StripeEvent.status == WebhookEventStatusEnum.processed,
+            StripeEvent.created > event.created,
+        )
+    ).scalar()
+
+
+def _process(db: Session, event: StripeEvent, now: dt.datetime) -> bool:
+    """Apply one claimed event, or schedule its retry; True if it was applied"""
+    event.attempts += 1
+    if _is_superseded(db, event):
+        event.status = WebhookEventStatusEnum.superseded
+        event.processed_at = now
+        metrics.counter("stripe_inbox.superseded").inc()
+        return False
+
+    try:
+        with db.begin_nested():
+            apply_event(db, event.type, event.payload)
+    except Exception as e:
+        event.last_error = f"{type(e).__name__}: {e}"[:1000]
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = WebhookEventStatusEnum.failed
+            metrics.counter("stripe_inbox.failed").inc()
+            logger.error(f"Stripe event {event.id} ({event.type}) failed {event.attempts} times, giving up: {e}")
+        else:
+            event.next_attempt_at = now + _retry_delay(event.attempts)
+            metrics.counter("stripe_inbox.retried").inc()
+            logger.warning(f"Stripe event {event.id} ({event.type}) failed, retrying at {event.next_attempt_at}: {e}")
+        return False
+
+    event.status = WebhookEventStatusEnum.processed
+    event.processed_at = now
+    event.last_error = None
+    metrics.counter("stripe_inbox.processed").inc()
+    metrics.histogram("stripe_inbox.lag_seconds", buckets=LAG_BUCKETS).observe(
+        (now - event.received_at).total_seconds()
+    )
+    return True
+
+
+def _record_depth(db: Session, now: dt.datetime):
+    depth, oldest = db.query(func.count(StripeEvent.id), func.min(StripeEvent.received_at)).filter(
+        StripeEvent.status == WebhookEventStatusEnum.pending
+    ).one()
+    dead_letters = db.query(func.count(StripeEvent.id)).filter(
+        StripeEvent.status == WebhookEventStatusEnum.failed
+    ).scalar()
+    metrics.gauge("stripe_inbox.depth").set(depth)
+    metrics.gauge("stripe_inbox.oldest_pending_seconds").set((now - oldest).total_seconds() if oldest else 0)
+    metrics.gauge("stripe_inbox.dead_letters").set(dead_letters)
+
+
+def drain_inbox(db: Session) -> int:
+    """Apply due inbox events in batches, one transaction per batch; returns the number applied"""
+    earlier = aliased(StripeEvent)
+    waiting_on_earlier = exists().where(
+        earlier.object_id == StripeEvent.object_id,
+        earlier.status == WebhookEventStatusEnum.pending,
+        or_(
+            earlier.created < StripeEvent.created,
+            and_(earlier.created == StripeEvent.created, earlier.id < StripeEvent.id),
+        ),
+    )
+
+    applied = 0
+    for _ in range(MAX_BATCHES):
+        now = dt.datetime.utcnow()
+        events = db.execute(
+            select(StripeEvent)
+            .where(
+                StripeEvent.status == WebhookEventStatusEnum.pending,
+                StripeEvent.next_attempt_at <= now,
+                ~waiting_on_earlier,
+            )
+            .order_by(StripeEvent.created, StripeEvent.id)
+            .limit(BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not events:
+            break
+
+        # Keep claiming even after a short batch: an object's next event becomes claimable once
+        # the one before it is applied
+        applied += sum(_process(db, event, now) for event in events)
+        db.commit()
+
+    _record_depth(db, dt.datetime.utcnow())
+    db.rollback()
+    return applied
+
+
+def inbox_jobs(interval: float = DRAIN_INTERVAL_SECONDS) -> List[Job]:
+    return [Job("stripe_inbox", interval, drain_inbox)]
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    scheduler = Scheduler(inbox_jobs())
+    if "--once" in sys.argv:
+        print(f"Applied {scheduler.run_once()} Stripe events")
+    else:
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            pass
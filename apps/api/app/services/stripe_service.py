@@ -1,5 +1,6 @@
 """Stripe payment service for MentorMatch"""
 
+import json
 import os
 import stripe
 from typing import Optional, Dict, Any
@@ -345,13 +346,15 @@ class StripeService:
             )
 
             event_type = event["type"]
-            event_data = event["data"]["object"]
+            # Plain JSON (the verified payload) rather than a StripeObject, so it can be stored
+            event_data = json.loads(payload)["data"]["object"]
 
             logger.info(f"Received Stripe webhook: {event_type}")
 
             return {
                 "event_type": event_type,
                 "event_id": event["id"],
+                "created": event["created"],
                 "data": event_data,
             }
         except ValueError as e:
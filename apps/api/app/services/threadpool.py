@@ -0,0 +1,86 @@
+"""
+Worker threads for blocking work
+
+Database access goes through the synchronous SQLAlchemy Session, so it
+must not run on the event loop: one slow query would stall every request
+served by the process. Route handlers that touch the database are plain
+`def` functions, which FastAPI (like sync dependencies such as get_db)
+runs on AnyIO's default thread limiter. This module sizes that pool,
+offers run_blocking for the few `async def` handlers that need to call
+blocking code, and reports:
+
+- threadpool.size / .in_use / .waiting: pool saturation
+- threadpool.wait_seconds / .run_seconds: queueing and run time of run_blocking calls
+- event_loop.lag_seconds: how late the loop wakes up, i.e. how long it was blocked
+"""
+import asyncio
+import os
+import time
+from typing import Callable, Optional, TypeVar
+
+import anyio.to_thread
+
+from .db_pool import MAX_OVERFLOW, POOL_SIZE
+from .metrics import metrics
+
+T = TypeVar("T")
+
+# Threads for sync handlers, dependencies and run_blocking; each may hold a DB
+# connection, so by default there are as many as the pool can hand out. More
+# threads would only queue on pool checkout (and time out after DB_POOL_TIMEOUT)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(POOL_SIZE + MAX_OVERFLOW)))
+
+# Event loop lag sampling period
+LOOP_LAG_INTERVAL = 0.25
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Limiter of the running event loop, set by configure_threadpool
+_limiter = None
+
+
+def _collect():
+    if _limiter is None:
+        return
+    stats = _limiter.statistics()
+    metrics.gauge("threadpool.size").set(stats.total_tokens)
+    metrics.gauge("threadpool.in_use").set(stats.borrowed_tokens)
+    metrics.gauge("threadpool.waiting").set(stats.tasks_waiting)
+
+
+metrics.register_collector(_collect)
+
+
+def configure_threadpool(size: int = THREADPOOL_SIZE):
+    """Size the default thread limiter of the running event loop. Call from the loop."""
+    global _limiter
+    _limiter = anyio.to_thread.current_default_thread_limiter()
+    _limiter.total_tokens = size
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call on the worker pool and await its result"""
+    submitted = time.perf_counter()
+    started: Optional[float] = None
+
+    def call() -> T:
+        nonlocal started
+        started = time.perf_counter()
+        return func(*args, **kwargs)
+
+    try:
+        return await anyio.to_thread.run_sync(call)
+    finally:
+        finished = time.perf_counter()
+        if started is not None:
+            metrics.histogram("threadpool.wait_seconds").observe(started - submitted)
+            metrics.histogram("threadpool.run_seconds").observe(finished - started)
+
+
+async def monitor_event_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Sample event loop lag until cancelled"""
+    lag = metrics.histogram("event_loop.lag_seconds", buckets=LAG_BUCKETS)
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lag.observe(max(0.0, time.perf_counter() - expected))
@@ -0,0 +1,104 @@
+"""
+Timezone conversion tables
+
+Availability is computed over thousands of minutes at once, so converting
+every slot through zoneinfo would be slow and easy to get wrong around DST.
+Instead, for a zone and a UTC window we find the minutes at which the
+zone's UTC offset changes (once, cached) and expand that table into a
+per-minute offset array with NumPy when needed.
+
+All naive datetimes here are UTC unless a function says otherwise.
+"""
+import datetime as dt
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+UTC = "UTC"
+
+# Offsets are sampled hourly, then transitions are located to the minute
+SAMPLE_MINUTES = 60
+
+
+@lru_cache(maxsize=256)
+def _load_zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def is_valid_zone(name: str) -> bool:
+    return bool(name) and _load_zone(name) is not None
+
+
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo for an IANA name, falling back to UTC for missing or unknown zones"""
+    return (_load_zone(name) if name else None) or _load_zone(UTC)
+
+
+def offset_at(zone: ZoneInfo, value: dt.datetime) -> int:
+    """UTC offset of the zone at a naive UTC instant, in minutes"""
+    aware = value.replace(tzinfo=dt.timezone.utc).astimezone(zone)
+    return int(aware.utcoffset() // dt.timedelta(minutes=1))
+
+
+def utc_to_local(value: dt.datetime, zone: ZoneInfo) -> dt.datetime:
+    """Naive UTC -> naive wall-clock time in the zone"""
+    return value.replace(tzinfo=dt.timezone.utc).astimezone(zone).replace(tzinfo=None)
+
+
+def local_to_utc(value: dt.datetime, zone: ZoneInfo) -> dt.datetime:
+    """Naive wall-clock time in the zone -> naive UTC"""
+    return value.replace(tzinfo=zone).astimezone(dt.timezone.utc).replace(tzinfo=None)
+
+
+@lru_cache(maxsize=1024)
+def offset_transitions(zone_name: str, window_start: dt.datetime, minutes: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    UTC-offset table for a zone over [window_start, window_start + minutes).
+
+    Returns (starts, offsets): the offset is offsets[i] from minute starts[i]
+    until the next start. starts[0] is always 0.
+    """
+    zone = get_zone(zone_name)
+
+    def offset(minute: int) -> int:
+        return offset_at(zone, window_start + dt.timedelta(minutes=minute))
+
+    starts, offsets = [0], [offset(0)]
+    previous = 0
+    for sample in range(SAMPLE_MINUTES, minutes + SAMPLE_MINUTES, SAMPLE_MINUTES):
+        sample = min(sample, minutes - 1)
+        if sample <= previous:
+            break
+        current = offset(sample)
+        if current != offsets[-1]:
+            # Binary search for the first minute with the new offset
+            low, high = previous, sample
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset(middle) == offsets[-1]:
+                    low = middle
+                else:
+                    high = middle
+            starts.append(high)
+            offsets.append(current)
+        previous = sample
+
+    return tuple(starts), tuple(offsets)
+
+
+def utc_offsets(zone_name: str, window_start: dt.datetime, minutes: int) -> np.ndarray:
+    """Per-minute UTC offsets (in minutes) of a zone over a UTC window"""
+    starts, offsets = offset_transitions(zone_name, window_start, minutes)
+    lengths = np.diff(np.array(starts + (minutes,), dtype=np.int64))
+    return np.repeat(np.array(offsets, dtype=np.int64), lengths)
+
+
+@lru_cache(maxsize=128)
+def fixed_offset(minutes: int) -> dt.timezone:
+    """Fixed-offset tzinfo for rendering already-converted datetimes"""
+    return dt.timezone(dt.timedelta(minutes=minutes))
@@ -0,0 +1,154 @@
+"""
+Access token revocation list
+
+Access tokens are verified statelessly, so revoking one (logout, a
+reused refresh token) means remembering its id until it would have
+expired anyway. Revoked ids, an access token's jti or its session id
+(sid), are stored in the revoked_tokens table and mirrored in a Bloom
+filter in every process. Each authenticated request checks its ids
+against the filter, a few hash probes with no I/O; only on a filter hit
+(a revoked token or a rare false positive) is the table consulted.
+
+The filter is filled in keyset-paginated batches by the revocation_sync
+job, which runs right after startup and then every
+REVOCATION_SYNC_SECONDS to pick up revocations made by other processes.
+Until the first load completes, every check goes to the table. The filter
+is rebuilt from the table once it holds more than its capacity.
+
+Metrics: auth.revocation.lookups and .false_positives (counters),
+.filter_entries and .ready (gauges).
+"""
+import datetime as dt
+import hashlib
+import math
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from .metrics import metrics
+
+REVOCATION_CAPACITY = int(os.getenv("REVOCATION_CAPACITY", "200000"))
+REVOCATION_ERROR_RATE = float(os.getenv("REVOCATION_ERROR_RATE", "0.001"))
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "10"))
+
+# Rows per batch when loading revocations
+LOAD_BATCH_SIZE = 5000
+# Re-read this much history on each sync, to catch rows committed late or by hosts with skewed clocks
+SYNC_OVERLAP = dt.timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        """Add a key; False if it was (probably) present already, leaving count unchanged"""
+        positions = self._positions(key)
+        if all(self._bits[position >> 3] & (1 << (position & 7)) for position in positions):
+            return False
+        for position in positions:
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Bloom filter of revoked token ids, backed by the revoked_tokens table"""
+
+    def __init__(self, capacity: int = REVOCATION_CAPACITY, error_rate: float = REVOCATION_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ready = False
+        self._filter = BloomFilter(capacity, error_rate)
+        self._loading: Optional[BloomFilter] = None  # filter being rebuilt by sync
+        self._synced_until: Optional[dt.datetime] = None
+        self._lock = threading.Lock()
+
+        self._lookups = metrics.counter("auth.revocation.lookups")
+        self._false_positives = metrics.counter("auth.revocation.false_positives")
+        metrics.register_collector(self._collect)
+
+    def _collect(self):
+        metrics.gauge("auth.revocation.filter_entries").set(self._filter.count)
+        metrics.gauge("auth.revocation.ready").set(int(self.ready))
+
+    def add(self, token_id: str):
+        """Record a revocation made by this process (the table row is written by the caller)"""
+        with self._lock:
+            self._filter.add(token_id)
+            if self._loading is not None:
+                self._loading.add(token_id)
+
+    def is_revoked(self, db: Session, *token_ids: Optional[str]) -> bool:
+        """Whether any of the ids was revoked; touches the database only on a filter hit"""
+        from ..database import RevokedToken
+
+        candidates = [token_id for token_id in token_ids if token_id and (not self.ready or token_id in self._filter)]
+        if not candidates:
+            return False
+
+        self._lookups.inc()
+        revoked = db.execute(
+            select(RevokedToken.token_id)
+            .where(RevokedToken.token_id.in_(candidates), RevokedToken.expires_at > dt.datetime.utcnow())
+            .limit(1)
+        ).first() is not None
+        if not revoked and self.ready:
+            self._false_positives.inc()
+        return revoked
+
+    def sync(self, db: Session) -> int:
+        """Load revocations made since the last sync (all unexpired ones the first time), in batches"""
+        from ..database import RevokedToken
+
+        started = dt.datetime.utcnow()
+        rebuild = self._synced_until is None or self._filter.count > self.capacity
+        with self._lock:
+            target = self._loading = BloomFilter(self.capacity, self.error_rate) if rebuild else None
+        target = target or self._filter
+
+        query = select(RevokedToken.revoked_at, RevokedToken.token_id).where(RevokedToken.expires_at > started)
+        if not rebuild:
+            query = query.where(RevokedToken.revoked_at >= self._synced_until - SYNC_OVERLAP)
+        query = query.order_by(RevokedToken.revoked_at, RevokedToken.token_id).limit(LOAD_BATCH_SIZE)
+
+        added, after = 0, None
+        while True:
+            page = query if after is None else query.where(
+                tuple_(RevokedToken.revoked_at, RevokedToken.token_id) > after
+            )
+            rows = db.execute(page).all()
+            with self._lock:
+                # Ids re-read from the overlap window are already in the filter and not counted again
+                added += sum(target.add(token_id) for _, token_id in rows)
+            if len(rows) < LOAD_BATCH_SIZE:
+                break
+            after = tuple(rows[-1])
+
+        with self._lock:
+            if rebuild:
+                self._filter, self._loading = target, None
+            self._synced_until = started
+            self.ready = True
+        return added
+
+
+# Singleton instance
+revocation_list = RevocationList()
@@ -0,0 +1 @@
+"""Ad-hoc performance benchmarks; run with python -m benchmarks.<name> from apps/api"""
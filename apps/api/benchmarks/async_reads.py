@@ -0,0 +1,105 @@
+"""
+Requests per second of the hot read endpoints, sync vs async
+
+Drives /mentors, /mentors/{id} and /categories with a fixed number of
+concurrent clients, once through the async routes (AsyncSession on
+aiosqlite/asyncpg, as served by the app) and once through equivalent
+`def` routes on the sync Session and worker thread pool.
+
+    DATABASE_URL=sqlite:///./srs.db python -m benchmarks.async_reads [--concurrency 50] [--seconds 3]
+
+Run against a seeded database (python -m app.seed_data).
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+os.environ.setdefault("RUN_SCHEDULER", "false")
+
+from app.database import get_db  # noqa: E402
+from app.main import app as async_app  # noqa: E402
+from app.models.mentoring import AvailabilitySlot, Category, MentorCategory, MentorReview, MentorStats, Profile  # noqa: E402
+from app.routers.categories import category_list_query  # noqa: E402
+from app.routers.mentors import _list_mentors_page  # noqa: E402
+
+
+def build_sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/mentors")
+    def list_mentors(db: Session = Depends(get_db)):
+        return _list_mentors_page(db, None, None, None, None, None, None, "rating", 1, 10, "offset", None, None)
+
+    @app.get("/mentors/{mentor_id}")
+    def get_mentor(mentor_id: int, db: Session = Depends(get_db)):
+        mentor = db.execute(
+            select(Profile).where(Profile.id == mentor_id, Profile.is_mentor == True)
+        ).scalar_one_or_none()
+        if not mentor:
+            raise HTTPException(status_code=404)
+        db.execute(select(Category).join(MentorCategory).where(MentorCategory.mentor_id == mentor.id)).all()
+        db.execute(
+            select(MentorReview).where(MentorReview.reviewee_id == mentor_id, MentorReview.is_public == True)
+            .order_by(MentorReview.created_at.desc()).limit(20)
+        ).all()
+        db.execute(select(AvailabilitySlot).where(
+            AvailabilitySlot.mentor_id == mentor_id, AvailabilitySlot.is_active == True
+        )).all()
+        db.get(MentorStats, mentor.id)
+        return {"id": mentor.id}
+
+    @app.get("/categories")
+    def list_categories(db: Session = Depends(get_db)):
+        return [{"id": cat.id, "mentor_count": count or 0} for cat, count in db.execute(category_list_query())]
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, concurrency: int, seconds: float) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path)
+        response.raise_for_status()
+        done = 0
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal done
+            while time.perf_counter() < deadline:
+                await client.get(path)
+                done += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return done / (time.perf_counter() - started)
+
+
+async def run(concurrency: int, seconds: float):
+    sync_app = build_sync_app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=async_app), base_url="http://bench") as client:
+        mentors = (await client.get("/mentors?limit=1")).json()["mentors"]
+    paths = ["/mentors", "/categories"] + ([f"/mentors/{mentors[0]['id']}"] if mentors else [])
+
+    print(f"{'endpoint':24s} {'sync rps':>10s} {'async rps':>10s}")
+    for path in paths:
+        sync_rps = await drive(sync_app, path, concurrency, seconds)
+        async_rps = await drive(async_app, path, concurrency, seconds)
+        print(f"{path:24s} {sync_rps:10.0f} {async_rps:10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
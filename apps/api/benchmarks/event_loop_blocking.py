@@ -0,0 +1,134 @@
+"""
+Latency of fast requests while one request runs a slow query
+
+Serves the same two endpoints twice: once with the slow endpoint as an
+`async def` calling the sync Session directly (blocking the event loop),
+once as a plain `def` (run on the worker thread pool, as the routers do).
+Fast requests are fired at a steady rate while the slow query runs, and
+their p50/p99 latency is reported for each variant.
+
+    python -m benchmarks.event_loop_blocking [--slow-seconds 1.0] [--rate 200]
+
+Uses a throwaway SQLite database; the slow query is a recursive CTE, or
+pg_sleep when DATABASE_URL points at Postgres.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def build_app(database_url: str, slow_seconds: float, blocking: bool) -> FastAPI:
+    engine = create_engine(database_url, connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {})
+    SessionLocal = sessionmaker(bind=engine)
+    if engine.dialect.name == "postgresql":
+        slow_sql = text("SELECT pg_sleep(:seconds)").bindparams(seconds=slow_seconds)
+    else:
+        # SQLite: a recursive CTE sized by calibrate_rows
+        slow_sql = None
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    def slow_query(db: Session):
+        if slow_sql is not None:
+            return db.execute(slow_sql).scalar()
+        return db.execute(text(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n LIMIT :rows) SELECT count(*) FROM n"
+        ), {"rows": app.state.slow_rows}).scalar()
+
+    if blocking:
+        @app.get("/slow")
+        async def slow(db: Session = Depends(get_db)):
+            return {"result": slow_query(db)}
+    else:
+        @app.get("/slow")
+        def slow(db: Session = Depends(get_db)):
+            return {"result": slow_query(db)}
+
+    @app.get("/fast")
+    def fast(db: Session = Depends(get_db)):
+        return {"result": db.execute(text("SELECT 1")).scalar()}
+
+    app.state.engine = engine
+    app.state.slow_rows = 0
+    return app
+
+
+def calibrate_rows(engine, seconds: float) -> int:
+    rows = 200_000
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        conn.execute(text(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n LIMIT :rows) SELECT count(*) FROM n"
+        ), {"rows": rows}).scalar()
+        elapsed = time.perf_counter() - started
+    return int(rows * seconds / max(elapsed, 1e-6))
+
+
+async def measure(app: FastAPI, slow_seconds: float, rate: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/fast")  # warm up pool and routes
+
+        async def timed_fast():
+            started = time.perf_counter()
+            await client.get("/fast")
+            return time.perf_counter() - started
+
+        slow = asyncio.create_task(client.get("/slow"))
+        fast = []
+        deadline = time.perf_counter() + slow_seconds * 1.5
+        while time.perf_counter() < deadline:
+            fast.append(asyncio.create_task(timed_fast()))
+            await asyncio.sleep(1 / rate)
+        latencies = sorted(await asyncio.gather(*fast))
+        await slow
+
+    return {
+        "requests": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--slow-seconds", type=float, default=1.0)
+    parser.add_argument("--rate", type=int, default=200, help="fast requests per second")
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    tmpdir = None
+    if not database_url:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmpdir.name}/bench.db"
+
+    for label, blocking in (("async def + sync Session", True), ("def on worker threads", False)):
+        app = build_app(database_url, args.slow_seconds, blocking)
+        if app.state.engine.dialect.name != "postgresql":
+            app.state.slow_rows = calibrate_rows(app.state.engine, args.slow_seconds)
+        result = asyncio.run(measure(app, args.slow_seconds, args.rate))
+        print(
+            f"{label:28s} requests={result['requests']:5d} "
+            f"p50={result['p50_ms']:8.1f}ms p99={result['p99_ms']:8.1f}ms max={result['max_ms']:8.1f}ms"
+        )
+        app.state.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Google sign-in latency with and without the signing key cache
+
+Starts a local stand-in for Google's JWKS endpoint (tests/google_key_server.py,
+with a simulated network round trip and a Cache-Control max-age), signs ID
+tokens with a throwaway RSA key and calls POST /auth/google sequentially:
+
+- fetch per login: a fresh verifier for every request, so each sign-in
+  downloads the keys, like google.oauth2.id_token.verify_oauth2_token did
+- cached keys: the app's verifier, which fetches once and then verifies
+  locally
+
+The verifier's behaviour (rotation, rate-limited refetches, stale keys,
+claim checks) is covered by tests/test_google_tokens.py.
+
+    python -m benchmarks.google_login [--logins 200] [--fetch-ms 80]
+
+Uses a throwaway SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from tests.google_key_server import CLIENT_ID, KeyServer, SigningKey
+
+_tmpdir = None
+if "DATABASE_URL" not in os.environ:
+    _tmpdir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir.name}/bench.db"
+os.environ.setdefault("RUN_SCHEDULER", "false")
+os.environ["GOOGLE_CLIENT_ID"] = CLIENT_ID
+
+import app.routers.auth as auth_router  # noqa: E402
+from app.database import init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.google_tokens import GoogleTokenVerifier  # noqa: E402
+
+
+async def measure(key: SigningKey, logins: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        for i in range(logins):
+            token = key.id_token(f"google-bench-{i % 20}@example.com")
+            started = time.perf_counter()
+            response = await client.post("/auth/google", json={"token": token})
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--fetch-ms", type=float, default=80, help="simulated round trip to the key server")
+    args = parser.parse_args()
+
+    init_db()
+    key_server = KeyServer(args.fetch_ms / 1000)
+
+    class FetchPerLogin:
+        def verify(self, token, client_id):
+            return GoogleTokenVerifier(key_server.url).verify(token, client_id)
+
+    variants = (("fetch per login", FetchPerLogin()), ("cached keys", GoogleTokenVerifier(key_server.url)))
+    for label, verifier in variants:
+        auth_router.google_token_verifier = verifier
+        fetches = key_server.fetches
+        result = asyncio.run(measure(key_server.keys[0], args.logins))
+        print(
+            f"{label:16s} logins={args.logins:5d} key fetches={key_server.fetches - fetches:5d} "
+            f"p50={result['p50_ms']:7.1f}ms p99={result['p99_ms']:7.1f}ms"
+        )
+    key_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Login throughput against concurrent read latency
+
+Runs a burst of concurrent password logins while a steady stream of
+cheap unauthenticated reads (GET /categories) is fired at the app, and
+reports logins per second, 429 rejections and read p50/p99 latency. Two
+variants are compared:
+
+- shared pool: a `def` login verifying bcrypt on the worker thread pool,
+  as before hashing got its own executor
+- hashing pool: POST /auth/login, verifying on the bounded hashing pool
+  (PASSWORD_HASH_WORKERS / PASSWORD_HASH_QUEUE_LIMIT)
+
+    python -m benchmarks.login_throughput [--logins 64] [--seconds 3] [--rate 100]
+
+Uses a throwaway SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+_tmpdir = None
+if "DATABASE_URL" not in os.environ:
+    _tmpdir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir.name}/bench.db"
+os.environ.setdefault("RUN_SCHEDULER", "false")
+
+from fastapi import Depends, HTTPException  # noqa: E402
+from fastapi.security import OAuth2PasswordRequestForm  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import SessionLocal, User, get_db, hash_password, init_db, verify_password  # noqa: E402
+from app.main import app  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+@app.post("/bench/shared-pool-login")
+def shared_pool_login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = db.query(User).filter(User.email == form_data.username).first()
+    if not user or not verify_password(form_data.password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    return {"ok": True}
+
+
+def seed_users(count: int):
+    init_db()
+    password_hash = hash_password(PASSWORD)
+    db = SessionLocal()
+    try:
+        existing = {email for (email,) in db.query(User.email).filter(User.email.like("bench-%@example.com"))}
+        db.add_all([
+            User(email=f"bench-{i}@example.com", password_hash=password_hash)
+            for i in range(count) if f"bench-{i}@example.com" not in existing
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def measure(login_path: str, logins: int, seconds: float, rate: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await client.get("/categories")  # warm up pool and routes
+        deadline = time.perf_counter() + seconds
+        statuses = {}
+
+        async def login_client(i: int):
+            while time.perf_counter() < deadline:
+                response = await client.post(
+                    login_path, data={"username": f"bench-{i}@example.com", "password": PASSWORD}
+                )
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 429:
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+
+        async def timed_read():
+            started = time.perf_counter()
+            await client.get("/categories")
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        login_tasks = [asyncio.create_task(login_client(i)) for i in range(logins)]
+        reads = []
+        while time.perf_counter() < deadline:
+            reads.append(asyncio.create_task(timed_read()))
+            await asyncio.sleep(1 / rate)
+        latencies = sorted(await asyncio.gather(*reads))
+        await asyncio.gather(*login_tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "logins_per_second": statuses.get(200, 0) / elapsed,
+        "rejected": statuses.get(429, 0),
+        "reads": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rate", type=int, default=100, help="reads per second")
+    args = parser.parse_args()
+
+    seed_users(args.logins)
+    for label, path in (("shared pool", "/bench/shared-pool-login"), ("hashing pool", "/auth/login")):
+        result = asyncio.run(measure(path, args.logins, args.seconds, args.rate))
+        print(
+            f"{label:13s} logins/s={result['logins_per_second']:6.1f} rejected={result['rejected']:5d} "
+            f"reads={result['reads']:5d} read p50={result['p50_ms']:8.1f}ms p99={result['p99_ms']:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Shared fixtures: every test runs against a fresh SQLite database.
+
+DATABASE_URL is set before the app is imported, since the engine is
+created at import time.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="mentormatch-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.setdefault("RUN_SCHEDULER", "false")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, User, create_access_token, engine
+from app.models import Profile
+from app.services.principal_cache import principal_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager, so startup hooks (schedulers) don't run
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_profile(db):
+    """Create a user with a profile; returns (profile id, auth headers)"""
+    def make(email: str, is_mentor: bool = False, hourly_rate: str = "60.00", timezone: str = "UTC"):
+        user = User(email=email)
+        db.add(user)
+        db.flush()
+        profile = Profile(
+            user_id=user.id,
+            display_name=email.split("@")[0],
+            is_mentor=is_mentor,
+            hourly_rate=Decimal(hourly_rate) if is_mentor else None,
+            timezone=timezone,
+        )
+        db.add(profile)
+        db.commit()
+        token = create_access_token({"sub": email})
+        return profile.id, {"Authorization": f"Bearer {token}"}
+
+    return make
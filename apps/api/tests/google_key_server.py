@@ -0,0 +1,85 @@
+"""
+Local stand-in for Google's JWKS endpoint, and ID tokens signed for it
+
+Used by test_google_tokens.py and benchmarks/google_login.py.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+class SigningKey:
+    """A throwaway RSA key that signs ID tokens, and its public JWK"""
+
+    def __init__(self, kid: str):
+        self.kid = kid
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = private.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        public_pem = private.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self.public_jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid, "use": "sig"}
+
+    def id_token(
+        self,
+        email: str,
+        audience: str = CLIENT_ID,
+        issuer: str = "https://accounts.google.com",
+        expires_in: int = 3600,
+    ) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": issuer, "aud": audience, "sub": email, "email": email,
+            "email_verified": True, "iat": now, "exp": now + expires_in,
+        }
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+class KeyServer:
+    """
+    Serves the public keys of `keys` like https://www.googleapis.com/oauth2/v3/certs
+
+    Counts fetches, sleeps fetch_seconds per request (a simulated round
+    trip) and answers 503 while `failing` is set.
+    """
+
+    def __init__(self, fetch_seconds: float = 0.0, max_age: int = 3600):
+        self.keys = [SigningKey("key-1")]
+        self.fetches = 0
+        self.failing = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                time.sleep(fetch_seconds)
+                if server.failing:
+                    self.send_error(503)
+                    return
+                body = json.dumps({"keys": [key.public_jwk for key in server.keys]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={max_age}, must-revalidate, no-transform")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/oauth2/v3/certs"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,62 @@
+"""Availability search over stored and missing weekly bitmaps"""
+import datetime as dt
+
+from app.models import AvailabilitySlot, MentorWeeklyAvailability, Profile
+from app.services.availability import refresh_weekly_bitmap, search_available_mentors
+
+# A Monday
+WINDOW_START = dt.datetime(2026, 1, 5, 8)
+WINDOW_END = dt.datetime(2026, 1, 5, 18)
+
+
+def _add_monday_hours(db, mentor_id: int, start: int, end: int):
+    db.add(AvailabilitySlot(mentor_id=mentor_id, day_of_week=0, start_time=dt.time(start), end_time=dt.time(end)))
+    db.commit()
+
+
+def _search(db, max_candidates=None):
+    query = db.query(Profile.id, Profile.timezone).filter(Profile.is_mentor == True).order_by(Profile.id)
+    return search_available_mentors(db, query, WINDOW_START, WINDOW_END, 60, max_candidates=max_candidates)
+
+
+def test_mentors_without_a_stored_bitmap_are_found(db, make_profile):
+    indexed_id, _ = make_profile("indexed@example.com", is_mentor=True)
+    unindexed_id, _ = make_profile("unindexed@example.com", is_mentor=True)
+    _add_monday_hours(db, indexed_id, 9, 11)
+    refresh_weekly_bitmap(db, indexed_id)
+    db.commit()
+    _add_monday_hours(db, unindexed_id, 13, 15)
+    assert db.get(MentorWeeklyAvailability, unindexed_id) is None
+
+    assert _search(db) == [
+        (indexed_id, [(dt.datetime(2026, 1, 5, 9), dt.datetime(2026, 1, 5, 11))]),
+        (unindexed_id, [(dt.datetime(2026, 1, 5, 13), dt.datetime(2026, 1, 5, 15))]),
+    ]
+
+
+def test_mentors_without_hours_are_not_found(db, make_profile):
+    make_profile("idle@example.com", is_mentor=True)
+    assert _search(db) == []
+
+
+def test_only_the_first_candidates_are_checked(db, make_profile):
+    mentor_ids = [make_profile(f"mentor{i}@example.com", is_mentor=True)[0] for i in range(3)]
+    for mentor_id in mentor_ids:
+        _add_monday_hours(db, mentor_id, 9, 11)
+
+    assert [mentor_id for mentor_id, _ in _search(db, max_candidates=2)] == mentor_ids[:2]
+
+
+def test_endpoint_pages_through_free_mentors(client, db, make_profile):
+    early_id, _ = make_profile("early@example.com", is_mentor=True)
+    late_id, _ = make_profile("late@example.com", is_mentor=True)
+    _add_monday_hours(db, late_id, 14, 16)
+    _add_monday_hours(db, early_id, 9, 11)
+
+    params = {"start": WINDOW_START.isoformat(), "end": WINDOW_END.isoformat(), "limit": 1}
+    first = client.get("/mentors/available", params=params).json()
+    second = client.get("/mentors/available", params={**params, "page": 2}).json()
+
+    assert first["pagination"]["total"] == 2
+    assert [mentor["id"] for mentor in first["mentors"] + second["mentors"]] == [early_id, late_id]
+    assert first["mentors"][0]["free_windows"] == [{"start": "2026-01-05T09:00:00", "end": "2026-01-05T11:00:00"}]
@@ -0,0 +1,43 @@
+"""Lifecycle sweeps: expiry of unconfirmed pending bookings"""
+import datetime as dt
+from decimal import Decimal
+
+from app.models import Booking, BookingStatusEnum
+from app.services.booking_lifecycle import EXPIRED_PENDING_REASON, expire_pending_bookings
+
+NOW = dt.datetime(2026, 1, 5, 12)
+
+
+def minutes(n: int) -> dt.timedelta:
+    return dt.timedelta(minutes=n)
+
+
+def test_pending_bookings_expire_by_age_and_start(db, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    mentee_id, _ = make_profile("mentee@example.com")
+
+    def add(starts_in: dt.timedelta, created_ago: dt.timedelta) -> Booking:
+        booking = Booking(
+            mentor_id=mentor_id, mentee_id=mentee_id, scheduled_at=NOW + starts_in, duration_minutes=30,
+            status=BookingStatusEnum.pending, price=Decimal("30.00"), created_at=NOW - created_ago,
+        )
+        db.add(booking)
+        return booking
+
+    just_booked = add(starts_in=minutes(20), created_ago=minutes(5))
+    left_unconfirmed = add(starts_in=minutes(20), created_ago=minutes(45))
+    already_started = add(starts_in=minutes(-5), created_ago=minutes(10))
+    far_ahead = add(starts_in=minutes(180), created_ago=minutes(600))
+    db.commit()
+
+    assert expire_pending_bookings(db, now=NOW) == 2
+
+    db.expire_all()
+    assert just_booked.status == BookingStatusEnum.pending
+    assert far_ahead.status == BookingStatusEnum.pending
+    for booking in (left_unconfirmed, already_started):
+        assert booking.status == BookingStatusEnum.cancelled
+        assert booking.cancel_reason == EXPIRED_PENDING_REASON
+
+    # Once its start passes, a late booking expires too
+    assert expire_pending_bookings(db, now=NOW + minutes(20)) == 1
@@ -0,0 +1,90 @@
+"""Recurring booking series: expansion and per-occurrence conflicts"""
+import datetime as dt
+
+from app.models import AvailabilityOverride, Booking
+from app.services.booking_series import CONFLICT_BOOKED, CONFLICT_UNAVAILABLE, expand_occurrences
+
+
+def _start(days: int = 3, hour: int = 10) -> dt.datetime:
+    day = dt.datetime.utcnow().replace(hour=hour, minute=0, second=0, microsecond=0)
+    return day + dt.timedelta(days=days)
+
+
+def _create_series(client, headers, mentor_id: int, start: dt.datetime, count: int = 4):
+    return client.post(
+        "/bookings/series",
+        json={"mentor_id": mentor_id, "scheduled_at": start.isoformat(), "duration_minutes": 60, "count": count},
+        headers=headers,
+    )
+
+
+def test_weekly_series_keeps_local_time_across_dst():
+    # 18:00 in Berlin: 17:00 UTC before the switch to summer time, 16:00 after
+    occurrences = expand_occurrences(dt.datetime(2026, 3, 23, 17), 60, count=2, mentor_tz="Europe/Berlin")
+    assert [o.starts_at for o in occurrences] == [dt.datetime(2026, 3, 23, 17), dt.datetime(2026, 3, 30, 16)]
+    assert {o.local_start for o in occurrences} == {dt.time(18)}
+
+
+def test_conflicting_occurrences_are_reported_and_the_rest_booked(client, db, make_profile):
+    mentor_id, mentor = make_profile("mentor@example.com", is_mentor=True)
+    _, mentee = make_profile("mentee@example.com")
+    start = _start()
+    weeks = [start + dt.timedelta(weeks=i) for i in range(4)]
+
+    # Week 2 overlaps another booking, week 3 is closed all day, week 4 is closed only in the afternoon
+    response = client.post(
+        "/bookings",
+        json={"mentor_id": mentor_id, "scheduled_at": (weeks[1] + dt.timedelta(minutes=30)).isoformat()},
+        headers=make_profile("other@example.com")[1],
+    )
+    assert response.status_code == 201, response.text
+    db.add_all([
+        AvailabilityOverride(mentor_id=mentor_id, date=weeks[2].date(), is_available=False),
+        AvailabilityOverride(
+            mentor_id=mentor_id, date=weeks[3].date(), is_available=False,
+            start_time=dt.time(14), end_time=dt.time(16),
+        ),
+    ])
+    db.commit()
+
+    response = _create_series(client, mentee, mentor_id, start)
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert (body["created"], body["conflicts"]) == (2, 2)
+    assert [item["conflict"] for item in body["occurrences"]] == [None, CONFLICT_BOOKED, CONFLICT_UNAVAILABLE, None]
+    bookings = {b.id: b for b in db.query(Booking).filter(Booking.mentor_id == mentor_id)}
+    for index in (0, 3):
+        booking = bookings[body["occurrences"][index]["booking_id"]]
+        assert (booking.scheduled_at, booking.ends_at) == (weeks[index], weeks[index] + dt.timedelta(hours=1))
+
+
+def test_rebooking_a_series_conflicts_with_itself(client, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    _, mentee = make_profile("mentee@example.com")
+    start = _start()
+
+    assert _create_series(client, mentee, mentor_id, start, count=3).json()["created"] == 3
+
+    body = _create_series(client, mentee, mentor_id, start + dt.timedelta(minutes=30), count=3).json()
+    assert (body["created"], body["conflicts"]) == (0, 3)
+    assert {item["conflict"] for item in body["occurrences"]} == {CONFLICT_BOOKED}
+
+
+def test_series_accepts_offset_aware_times(client, db, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    _, mentee = make_profile("mentee@example.com")
+    start = _start()
+    until = start + dt.timedelta(weeks=2)
+
+    response = client.post(
+        "/bookings/series",
+        json={
+            "mentor_id": mentor_id,
+            "scheduled_at": start.isoformat() + "Z",
+            "until": until.isoformat() + "Z",
+        },
+        headers=mentee,
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["created"] == 3
+    assert sorted(b.scheduled_at for b in db.query(Booking)) == [start + dt.timedelta(weeks=i) for i in range(3)]
@@ -0,0 +1,60 @@
+"""Concurrent slot claims: exactly one of several overlapping requests wins"""
+import datetime as dt
+import threading
+import time
+from contextlib import nullcontext
+from decimal import Decimal
+
+from app.database import SessionLocal
+from app.models import Booking, BookingStatusEnum
+from app.services import booking_slots
+from app.services.booking_slots import SlotUnavailableError, commit_booking_slot
+
+SLOT = dt.datetime(2026, 1, 5, 10)
+
+
+def _claim(mentor_id: int, mentee_id: int, scheduled_at: dt.datetime) -> str:
+    db = SessionLocal()
+    try:
+        def add_booking():
+            # Widen the window between the slot check and the insert
+            time.sleep(0.02)
+            db.add(Booking(
+                mentor_id=mentor_id, mentee_id=mentee_id, scheduled_at=scheduled_at,
+                duration_minutes=60, status=BookingStatusEnum.pending, price=Decimal("60.00"),
+            ))
+
+        commit_booking_slot(db, mentor_id, scheduled_at, 60, add_booking)
+        return "booked"
+    except SlotUnavailableError:
+        return "taken"
+    finally:
+        db.close()
+
+
+def test_overlapping_claims_across_connections(db, make_profile, monkeypatch):
+    # Without the in-process stripes every thread behaves like a separate API process
+    monkeypatch.setattr(booking_slots, "_stripes", [nullcontext()] * booking_slots.LOCK_STRIPES)
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    others = [make_profile(f"other{i}@example.com", is_mentor=True)[0] for i in range(4)]
+    mentee_id, _ = make_profile("mentee@example.com")
+
+    # 12 requests for overlapping slots of one mentor, 4 for other mentors
+    claims = [(mentor_id, SLOT + dt.timedelta(minutes=5 * i)) for i in range(12)]
+    claims += [(other_id, SLOT) for other_id in others]
+    results = [None] * len(claims)
+    barrier = threading.Barrier(len(claims))
+
+    def run(index: int):
+        barrier.wait()
+        results[index] = _claim(claims[index][0], mentee_id, claims[index][1])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(claims))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results[:12].count("booked") == 1
+    assert results[12:] == ["booked"] * 4
+    assert db.query(Booking).filter(Booking.mentor_id == mentor_id).count() == 1
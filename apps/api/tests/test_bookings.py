@@ -0,0 +1,121 @@
+"""Booking endpoints: creation, listing and bulk confirm/cancel"""
+import datetime as dt
+
+import pytest
+
+from app.models import Booking, BookingStatusEnum
+
+
+def _start(days: int = 3, hour: int = 10) -> dt.datetime:
+    day = dt.datetime.utcnow().replace(hour=hour, minute=0, second=0, microsecond=0)
+    return day + dt.timedelta(days=days)
+
+
+@pytest.fixture
+def people(make_profile):
+    mentor_id, mentor = make_profile("mentor@example.com", is_mentor=True)
+    mentee_id, mentee = make_profile("mentee@example.com")
+    _, stranger = make_profile("stranger@example.com")
+    return {"mentor_id": mentor_id, "mentee_id": mentee_id, "mentor": mentor, "mentee": mentee, "stranger": stranger}
+
+
+def _book(client, people, start: dt.datetime) -> int:
+    response = client.post(
+        "/bookings",
+        json={"mentor_id": people["mentor_id"], "scheduled_at": start.isoformat(), "duration_minutes": 30},
+        headers=people["mentee"],
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_create_and_list_booking(client, people):
+    booking_id = _book(client, people, _start())
+
+    for headers in (people["mentee"], people["mentor"]):
+        response = client.get("/bookings", params={"include_participants": True}, headers=headers)
+        assert response.status_code == 200
+        [item] = response.json()
+        assert item["id"] == booking_id
+        assert item["mentor_id"] == people["mentor_id"]
+        assert item["mentee_id"] == people["mentee_id"]
+        assert item["price_cents"] == 3000
+        assert item["mentor_name"] == "mentor"
+
+    assert client.get("/bookings", headers=people["stranger"]).json() == []
+
+
+def test_create_rejects_taken_slot(client, people):
+    start = _start()
+    _book(client, people, start)
+    response = client.post(
+        "/bookings",
+        json={"mentor_id": people["mentor_id"], "scheduled_at": (start + dt.timedelta(minutes=15)).isoformat()},
+        headers=people["mentee"],
+    )
+    assert response.status_code == 400
+
+
+def test_bulk_confirm_only_by_mentor(client, people):
+    ids = [_book(client, people, _start(days=d)) for d in (2, 3)]
+
+    response = client.post("/bookings/bulk", json={"action": "confirm", "booking_ids": ids}, headers=people["mentee"])
+    assert response.json()["succeeded"] == 0
+    assert {r["error"] for r in response.json()["results"]} == {"Only the mentor can confirm the booking"}
+
+    response = client.post("/bookings/bulk", json={"action": "confirm", "booking_ids": ids}, headers=people["mentor"])
+    body = response.json()
+    assert body["succeeded"] == 2
+    assert all(r["status"] == "confirmed" for r in body["results"])
+
+
+def test_bulk_cancel_reports_per_item(client, db, people):
+    ok, done, no_show = (_book(client, people, _start(days=d)) for d in (2, 3, 4))
+    db.query(Booking).filter(Booking.id == done).update({Booking.status: BookingStatusEnum.completed})
+    db.query(Booking).filter(Booking.id == no_show).update({Booking.status: BookingStatusEnum.no_show})
+    db.commit()
+
+    response = client.post(
+        "/bookings/bulk",
+        json={"action": "cancel", "booking_ids": [ok, done, no_show, 999999], "reason": "travel"},
+        headers=people["mentee"],
+    )
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (1, 3)
+    errors = {r["booking_id"]: r["error"] for r in body["results"]}
+    assert errors == {
+        ok: None,
+        done: "Cannot cancel completed booking",
+        no_show: "Cannot cancel a no-show booking",
+        999999: "Booking not found",
+    }
+
+    db.expire_all()
+    cancelled = db.get(Booking, ok)
+    assert cancelled.status == BookingStatusEnum.cancelled
+    assert cancelled.cancel_reason == "travel"
+    assert cancelled.cancelled_by == people["mentee_id"]
+
+
+def test_bulk_cancel_rejects_non_participants(client, db, people):
+    booking_id = _book(client, people, _start())
+
+    response = client.post(
+        "/bookings/bulk", json={"action": "cancel", "booking_ids": [booking_id]}, headers=people["stranger"]
+    )
+    assert response.json()["results"][0]["error"] == "Not authorized to cancel this booking"
+    db.expire_all()
+    assert db.get(Booking, booking_id).status == BookingStatusEnum.pending
+
+
+def test_single_cancel_records_who_cancelled(client, db, people):
+    booking_id = _book(client, people, _start())
+
+    response = client.put(f"/bookings/{booking_id}/cancel", params={"reason": "ill"}, headers=people["mentor"])
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    db.expire_all()
+    assert db.get(Booking, booking_id).cancelled_by == people["mentor_id"]
+
+    response = client.put(f"/bookings/{booking_id}/cancel", headers=people["mentor"])
+    assert response.status_code == 400
@@ -0,0 +1,119 @@
+"""Google ID token verification against a local stand-in key server"""
+import pytest
+
+from app.services.google_tokens import (
+    DEFAULT_MAX_AGE, MIN_REFETCH_SECONDS, STALE_KEYS_GRACE, GoogleTokenVerifier, cache_lifetime,
+)
+from tests.google_key_server import CLIENT_ID, KeyServer, SigningKey
+
+EMAIL = "someone@example.com"
+
+
+@pytest.fixture(scope="module")
+def key_server():
+    server = KeyServer()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def verifier(key_server):
+    key_server.keys[1:] = []
+    key_server.failing = False
+    return GoogleTokenVerifier(key_server.url)
+
+
+def _age(verifier: GoogleTokenVerifier, seconds: float):
+    """Pretend the cached keys were fetched `seconds` earlier"""
+    verifier._expires_at -= seconds
+    verifier._last_fetch -= seconds
+
+
+def test_valid_token_is_verified_with_cached_keys(key_server, verifier):
+    fetches = key_server.fetches
+    for _ in range(3):
+        assert verifier.verify(key_server.keys[0].id_token(EMAIL), CLIENT_ID)["email"] == EMAIL
+    assert key_server.fetches == fetches + 1
+
+
+@pytest.mark.parametrize("token_args, error", [
+    ({"audience": "someone-else"}, "audience"),
+    ({"issuer": "https://accounts.example.com"}, "Wrong issuer"),
+    ({"issuer": "accounts.google.com.example.com"}, "Wrong issuer"),
+    ({"expires_in": -60}, "expired"),
+])
+def test_invalid_claims_are_rejected(key_server, verifier, token_args, error):
+    with pytest.raises(ValueError, match=error):
+        verifier.verify(key_server.keys[0].id_token(EMAIL, **token_args), CLIENT_ID)
+
+
+def test_both_google_issuers_are_accepted(key_server, verifier):
+    for issuer in ("accounts.google.com", "https://accounts.google.com"):
+        assert verifier.verify(key_server.keys[0].id_token(EMAIL, issuer=issuer), CLIENT_ID)["iss"] == issuer
+
+
+def test_expired_keys_are_refetched(key_server, verifier):
+    token = key_server.keys[0].id_token(EMAIL)
+    verifier.verify(token, CLIENT_ID)
+    fetches = key_server.fetches
+
+    _age(verifier, 3600 + 1)
+    assert verifier.verify(token, CLIENT_ID)["email"] == EMAIL
+    assert key_server.fetches == fetches + 1
+
+
+def test_unknown_key_id_refetches_once_then_is_rate_limited(key_server, verifier):
+    verifier.verify(key_server.keys[0].id_token(EMAIL), CLIENT_ID)
+    _age(verifier, MIN_REFETCH_SECONDS)
+    fetches = key_server.fetches
+
+    # Keys rotated early: one refetch picks up the new key
+    key_server.keys.append(SigningKey("key-2"))
+    assert verifier.verify(key_server.keys[1].id_token(EMAIL), CLIENT_ID)["email"] == EMAIL
+    assert key_server.fetches == fetches + 1
+
+    # A key id Google never published: the refetch right after is skipped
+    forged = SigningKey("key-forged").id_token(EMAIL)
+    with pytest.raises(ValueError, match="unknown key"):
+        verifier.verify(forged, CLIENT_ID)
+    assert key_server.fetches == fetches + 1
+
+    _age(verifier, MIN_REFETCH_SECONDS)
+    with pytest.raises(ValueError, match="unknown key"):
+        verifier.verify(forged, CLIENT_ID)
+    assert key_server.fetches == fetches + 2
+
+
+def test_stale_keys_are_used_within_the_grace_period(key_server, verifier):
+    token = key_server.keys[0].id_token(EMAIL)
+    verifier.verify(token, CLIENT_ID)
+    key_server.failing = True
+    fetches = key_server.fetches
+
+    # Expired and the refresh fails: the previous keys still verify
+    _age(verifier, 3600 + STALE_KEYS_GRACE // 2)
+    assert verifier.verify(token, CLIENT_ID)["email"] == EMAIL
+    assert key_server.fetches == fetches + 1
+
+    # Past the grace period they don't
+    _age(verifier, STALE_KEYS_GRACE)
+    with pytest.raises(ValueError, match="unknown key"):
+        verifier.verify(token, CLIENT_ID)
+
+    # Once the key server recovers, verification does too
+    key_server.failing = False
+    _age(verifier, MIN_REFETCH_SECONDS)
+    assert verifier.verify(token, CLIENT_ID)["email"] == EMAIL
+
+
+def test_failed_first_fetch_rejects_tokens(key_server, verifier):
+    key_server.failing = True
+    with pytest.raises(ValueError, match="unknown key"):
+        verifier.verify(key_server.keys[0].id_token(EMAIL), CLIENT_ID)
+
+
+def test_cache_lifetime_from_headers():
+    assert cache_lifetime({"cache-control": "public, max-age=20000, must-revalidate"}) == 20000
+    assert cache_lifetime({"cache-control": "public, max-age=20000", "age": "500"}) == 19500
+    assert cache_lifetime({"cache-control": "max-age=100", "age": "500"}) == 0
+    assert cache_lifetime({}) == DEFAULT_MAX_AGE
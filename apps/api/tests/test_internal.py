@@ -0,0 +1,15 @@
+"""Internal endpoints require the configured token"""
+from app.routers import internal
+
+
+def test_metrics_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", "")
+    assert client.get("/internal/metrics").status_code == 403
+    assert client.get("/internal/metrics", headers={"X-Internal-Token": ""}).status_code == 403
+
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", "s3cret")
+    assert client.get("/internal/metrics", headers={"X-Internal-Token": "wrong"}).status_code == 403
+    response = client.get("/internal/metrics", headers={"X-Internal-Token": "s3cret"})
+    assert response.status_code == 200
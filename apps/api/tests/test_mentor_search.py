@@ -0,0 +1,43 @@
+"""In-process search index: only mentors take candidate slots"""
+import datetime as dt
+
+from app.models import MentorSearchDocument, Profile
+from app.services import mentor_search
+from app.services.mentor_search import MentorSearchIndex, refresh_search_documents
+
+
+def _index_mentors(db, make_profile, *emails):
+    profile_ids = [make_profile(email, is_mentor=True)[0] for email in emails]
+    refresh_search_documents(db, profile_ids)
+    db.commit()
+    return profile_ids
+
+
+def test_documents_of_non_mentors_are_not_indexed(db, make_profile):
+    mentor_id, former_id = _index_mentors(db, make_profile, "python@example.com", "python.too@example.com")
+    db.get(Profile, former_id).is_mentor = False
+    db.commit()
+
+    index = MentorSearchIndex()
+    index.refresh(db)
+    assert [profile_id for profile_id, _ in index.search("python", 10)] == [mentor_id]
+
+
+def test_profiles_that_stop_being_mentors_are_dropped(db, make_profile, monkeypatch):
+    mentor_id, former_id = _index_mentors(db, make_profile, "python@example.com", "python.too@example.com")
+    # Old enough that refreshes after the first don't re-read it
+    db.get(MentorSearchDocument, former_id).updated_at -= dt.timedelta(hours=1)
+    db.commit()
+    index = MentorSearchIndex()
+    index.refresh(db)
+    assert {profile_id for profile_id, _ in index.search("python", 10)} == {mentor_id, former_id}
+
+    # Their document is unchanged, so only the periodic mentor check sees it
+    db.get(Profile, former_id).is_mentor = False
+    db.commit()
+    index.refresh(db)
+    assert len(index.search("python", 10)) == 2
+
+    monkeypatch.setattr(mentor_search, "MENTOR_CHECK_INTERVAL", dt.timedelta(0))
+    index.refresh(db)
+    assert [profile_id for profile_id, _ in index.search("python", 10)] == [mentor_id]
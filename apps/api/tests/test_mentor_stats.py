@@ -0,0 +1,103 @@
+"""MentorStats maintenance: seeding from the source tables and concurrent increments"""
+import datetime as dt
+import threading
+from decimal import Decimal
+
+import pytest
+
+from app.database import SessionLocal
+from app.models import Booking, BookingStatusEnum, MentorReview, MentorStats
+from app.services.mentor_stats import apply_review, ensure_stats, record_completed_session
+
+
+@pytest.fixture
+def mentor_and_booking(db, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    mentee_id, _ = make_profile("mentee@example.com")
+    booking = Booking(
+        mentor_id=mentor_id,
+        mentee_id=mentee_id,
+        scheduled_at=dt.datetime(2026, 1, 5, 10),
+        duration_minutes=60,
+        status=BookingStatusEnum.completed,
+        price=Decimal("60.00"),
+    )
+    db.add(booking)
+    db.commit()
+    return mentor_id, mentee_id, booking.id
+
+
+def _add_review(db, mentor_id: int, mentee_id: int, booking_id: int, rating: int, is_public: bool = True):
+    db.add(MentorReview(
+        booking_id=booking_id, reviewer_id=mentee_id, reviewee_id=mentor_id, rating=rating, is_public=is_public
+    ))
+    apply_review(db, mentor_id, rating, is_public)
+
+
+def test_missing_row_is_seeded_from_all_reviews(db, mentor_and_booking):
+    mentor_id, mentee_id, booking_id = mentor_and_booking
+    for rating in (2, 4):
+        db.add(MentorReview(booking_id=booking_id, reviewer_id=mentee_id, reviewee_id=mentor_id, rating=rating))
+    db.add(MentorReview(
+        booking_id=booking_id, reviewer_id=mentee_id, reviewee_id=mentor_id, rating=1, is_public=False
+    ))
+    db.commit()
+    assert db.get(MentorStats, mentor_id) is None
+
+    _add_review(db, mentor_id, mentee_id, booking_id, 5)
+    db.commit()
+
+    stats = db.get(MentorStats, mentor_id)
+    assert (stats.review_count, stats.avg_rating, stats.completed_sessions) == (3, pytest.approx(11 / 3), 1)
+
+
+def test_review_removal_updates_average(db, mentor_and_booking):
+    mentor_id, mentee_id, booking_id = mentor_and_booking
+    _add_review(db, mentor_id, mentee_id, booking_id, 5)
+    _add_review(db, mentor_id, mentee_id, booking_id, 3)
+    db.commit()
+
+    review = db.query(MentorReview).filter(MentorReview.rating == 5).one()
+    db.delete(review)
+    apply_review(db, mentor_id, 5, True, removed=True)
+    db.commit()
+
+    db.expire_all()
+    stats = db.get(MentorStats, mentor_id)
+    assert (stats.review_count, stats.avg_rating) == (1, pytest.approx(3.0))
+
+
+def test_concurrent_updates_are_not_lost(db, mentor_and_booking):
+    mentor_id, mentee_id, booking_id = mentor_and_booking
+    ensure_stats(db, mentor_id)
+    db.commit()
+
+    workers = 8
+    barrier = threading.Barrier(workers)
+    errors = []
+
+    def review(rating: int):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            _add_review(session, mentor_id, mentee_id, booking_id, rating)
+            record_completed_session(session, mentor_id)
+            session.commit()
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=review, args=(1 + i % 5,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.expire_all()
+    stats = db.get(MentorStats, mentor_id)
+    ratings = [1 + i % 5 for i in range(workers)]
+    assert stats.review_count == workers
+    assert stats.avg_rating == pytest.approx(sum(ratings) / workers)
+    assert stats.completed_sessions == 1 + workers
@@ -0,0 +1,51 @@
+"""Stripe webhook endpoint: signed events land in the inbox once"""
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from app.models import StripeEvent
+from app.services.stripe_service import stripe_service
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(stripe_service, "webhook_secret", WEBHOOK_SECRET)
+
+
+def _post_event(client, event: dict, secret: str = WEBHOOK_SECRET):
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return client.post(
+        "/payments/webhook",
+        content=payload,
+        headers={"stripe-signature": f"t={timestamp},v1={signature}", "content-type": "application/json"},
+    )
+
+
+def _event(event_id: str = "evt_1") -> dict:
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": "payment_intent.succeeded",
+        "created": int(time.time()),
+        "data": {"object": {"id": "pi_1", "object": "payment_intent"}},
+    }
+
+
+def test_webhook_stores_event_once(client, db):
+    assert _post_event(client, _event()).status_code == 200
+    assert _post_event(client, _event()).status_code == 200
+
+    [stored] = db.query(StripeEvent).all()
+    assert (stored.id, stored.type, stored.object_id) == ("evt_1", "payment_intent.succeeded", "pi_1")
+
+
+def test_webhook_rejects_bad_signature(client, db):
+    assert _post_event(client, _event(), secret="whsec_other").status_code == 400
+    assert db.query(StripeEvent).count() == 0
@@ -0,0 +1,31 @@
+"""Recommendations are served from the cache kept by the refresh job"""
+from app.models import Profile
+from app.services.recommendations import RecommendationEngine, recommendation_jobs
+
+
+def test_recommend_reads_only_the_cache(db, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    mentee_id, _ = make_profile("mentee@example.com")
+    mentee = db.get(Profile, mentee_id)
+    engine = RecommendationEngine()
+
+    assert engine.recommend(db, mentee, 10) == []
+
+    assert engine.refresh(db) == 1
+    assert engine.recommend(db, mentee, 10) == [mentor_id]
+
+
+def test_refresh_folds_in_new_mentors(db, make_profile):
+    first_id, _ = make_profile("first@example.com", is_mentor=True)
+    engine = RecommendationEngine()
+    engine.refresh(db)
+
+    second_id, _ = make_profile("second@example.com", is_mentor=True)
+    assert engine.recommend(db, None, 10) == [first_id]
+
+    assert engine.refresh(db) >= 1
+    assert sorted(engine.recommend(db, None, 10)) == [first_id, second_id]
+
+
+def test_refresh_runs_as_a_scheduler_job():
+    assert [job.name for job in recommendation_jobs()] == ["recommendations_refresh"]
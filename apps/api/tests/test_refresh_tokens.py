@@ -0,0 +1,100 @@
+"""Sessions: refresh token rotation, reuse detection, logout and the revocation filter"""
+import datetime as dt
+
+import pytest
+
+from app.database import RevokedToken
+from app.services.token_revocation import BloomFilter, RevocationList
+
+PASSWORD = "correct horse battery"
+
+
+@pytest.fixture
+def session_tokens(client):
+    response = client.post("/auth/signup", json={"email": "user@example.com", "password": PASSWORD, "name": "User"})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _refresh(client, refresh_token: str):
+    return client.post("/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def _me(client, access_token: str) -> int:
+    return client.get("/auth/me", headers={"Authorization": f"Bearer {access_token}"}).status_code
+
+
+def test_refresh_rotates_the_token(client, session_tokens):
+    response = _refresh(client, session_tokens["refresh_token"])
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != session_tokens["refresh_token"]
+    assert _me(client, rotated["access_token"]) == 200
+
+    # The rotated token works once more, in turn
+    assert _refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_token_revokes_the_session(client, session_tokens):
+    rotated = _refresh(client, session_tokens["refresh_token"]).json()
+
+    response = _refresh(client, session_tokens["refresh_token"])
+    assert response.status_code == 401
+    assert "session revoked" in response.json()["detail"]
+
+    # Every token of the session stops working, including the ones issued after the leak
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+    assert _me(client, rotated["access_token"]) == 401
+    assert _me(client, session_tokens["access_token"]) == 401
+
+
+def test_reuse_leaves_other_sessions_alone(client, session_tokens):
+    response = client.post("/auth/login", data={"username": "user@example.com", "password": PASSWORD})
+    other = response.json()
+
+    _refresh(client, session_tokens["refresh_token"])
+    assert _refresh(client, session_tokens["refresh_token"]).status_code == 401
+
+    assert _me(client, other["access_token"]) == 200
+    assert _refresh(client, other["refresh_token"]).status_code == 200
+
+
+def test_unknown_refresh_token_is_rejected(client):
+    assert _refresh(client, "not-a-token").status_code == 401
+
+
+def test_logout_ends_the_session(client, session_tokens):
+    headers = {"Authorization": f"Bearer {session_tokens['access_token']}"}
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+
+    assert _me(client, session_tokens["access_token"]) == 401
+    assert _refresh(client, session_tokens["refresh_token"]).status_code == 401
+
+
+def test_bloom_filter_counts_distinct_keys():
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    assert bloom.add("a") and bloom.add("b")
+    assert not bloom.add("a")
+    assert bloom.count == 2
+    assert "a" in bloom and "c" not in bloom
+
+
+def test_incremental_syncs_do_not_recount_the_overlap(db):
+    revocations = RevocationList(capacity=100, error_rate=0.01)
+    now = dt.datetime.utcnow()
+    expires_at = now + dt.timedelta(minutes=15)
+    db.add_all([RevokedToken(token_id=f"jti-{i}", revoked_at=now, expires_at=expires_at) for i in range(3)])
+    db.commit()
+
+    assert revocations.sync(db) == 3
+    # The rows fall inside the overlap window of the following syncs
+    for _ in range(3):
+        assert revocations.sync(db) == 0
+    assert revocations._filter.count == 3
+
+    db.add(RevokedToken(token_id="jti-new", revoked_at=dt.datetime.utcnow(), expires_at=expires_at))
+    db.commit()
+    assert revocations.sync(db) == 1
+    assert revocations._filter.count == 4
+    assert revocations.is_revoked(db, "jti-new")
+    assert not revocations.is_revoked(db, "jti-other")
@@ -0,0 +1,63 @@
+"""Replica routing: read-your-writes carried by the client"""
+import time
+
+import pytest
+from starlette.requests import Request
+
+from app.database import async_database_url, replica_router
+from app.services.replicas import (
+    PRIMARY_UNTIL_COOKIE, PRIMARY_UNTIL_HEADER, READ_YOUR_WRITES_SECONDS, ReplicaRouter, primary_until,
+)
+
+
+@pytest.fixture
+def router(tmp_path):
+    return ReplicaRouter([f"sqlite:///{tmp_path}/replica.db"], async_database_url)
+
+
+def _request(method: str = "GET", headers: dict = None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw})
+
+
+def test_reads_use_replicas_and_writes_the_primary(router):
+    assert router.candidates(_request()) == router.replicas
+    assert router.candidates(_request("POST")) == []
+
+
+@pytest.mark.parametrize("carrier", ["cookie", "header"])
+def test_recent_write_carried_by_the_client_routes_to_the_primary(router, carrier):
+    def read(until: float):
+        if carrier == "cookie":
+            return _request(headers={"Cookie": f"{PRIMARY_UNTIL_COOKIE}={until}"})
+        return _request(headers={PRIMARY_UNTIL_HEADER: str(until)})
+
+    assert router.candidates(read(time.time() + 5)) == []
+    assert router.candidates(read(time.time() - 1)) == router.replicas
+
+
+def test_client_cannot_pin_itself_to_the_primary(router):
+    request = _request(headers={PRIMARY_UNTIL_HEADER: str(time.time() + 10 * READ_YOUR_WRITES_SECONDS)})
+    assert primary_until(request) <= time.time() + READ_YOUR_WRITES_SECONDS
+    for value in ("not a time", "inf"):
+        assert router.candidates(_request(headers={PRIMARY_UNTIL_HEADER: value})) == router.replicas
+
+
+def test_successful_writes_hand_the_window_to_the_client(client, router, make_profile, monkeypatch):
+    monkeypatch.setattr(replica_router, "replicas", router.replicas)
+    _, headers = make_profile("someone@example.com")
+
+    response = client.post("/bookings", json={}, headers=headers)
+    assert response.status_code == 422
+    assert PRIMARY_UNTIL_HEADER not in response.headers
+
+    response = client.put("/profiles/me", json={"bio": "Hello"}, headers=headers)
+    assert response.status_code == 200, response.text
+    until = float(response.headers[PRIMARY_UNTIL_HEADER])
+    assert time.time() < until <= time.time() + READ_YOUR_WRITES_SECONDS
+    assert float(response.cookies[PRIMARY_UNTIL_COOKIE]) == until
+
+    # Another process, with no record of the write, still reads from the primary
+    assert ReplicaRouter([], async_database_url).wrote_recently(
+        _request(headers={"Cookie": f"{PRIMARY_UNTIL_COOKIE}={until}"})
+    )
@@ -0,0 +1,43 @@
+"""Review endpoints keep MentorStats in step"""
+import datetime as dt
+from decimal import Decimal
+
+from app.models import Booking, BookingStatusEnum, MentorStats, Session as SessionModel
+
+
+def test_review_lifecycle_updates_stats(client, db, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    mentee_id, mentee = make_profile("mentee@example.com")
+    booking = Booking(
+        mentor_id=mentor_id,
+        mentee_id=mentee_id,
+        scheduled_at=dt.datetime(2026, 1, 5, 10),
+        status=BookingStatusEnum.completed,
+        price=Decimal("60.00"),
+    )
+    db.add(booking)
+    db.flush()
+    session = SessionModel(booking_id=booking.id)
+    db.add(session)
+    db.commit()
+
+    response = client.post("/reviews", json={"session_id": session.id, "rating": 4, "comment": "Great"}, headers=mentee)
+    assert response.status_code == 201, response.text
+    review = response.json()
+    assert (review["mentor_id"], review["reviewer_name"], review["comment"]) == (mentor_id, "mentee", "Great")
+
+    duplicate = client.post("/reviews", json={"session_id": session.id, "rating": 5}, headers=mentee)
+    assert duplicate.status_code == 400
+
+    listing = client.get(f"/reviews/mentor/{mentor_id}", headers=mentee).json()
+    assert (listing["total_reviews"], listing["average_rating"]) == (1, 4.0)
+    assert listing["rating_distribution"]["4"] == 1
+    assert listing["reviews"][0]["session_id"] == session.id
+
+    stats = db.get(MentorStats, mentor_id)
+    assert (stats.review_count, stats.avg_rating) == (1, 4.0)
+
+    assert client.delete(f"/reviews/{review['id']}", headers=mentee).status_code == 200
+    db.expire_all()
+    stats = db.get(MentorStats, mentor_id)
+    assert (stats.review_count, stats.avg_rating) == (0, 0.0)
@@ -0,0 +1,155 @@
+"""Stripe webhook inbox: deduplication, per-object ordering, retries and supersession"""
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+
+from app.models import (
+    Booking, BookingStatusEnum, PaymentStatusEnum, StripeEvent, Subscription, SubscriptionStatusEnum,
+    SubscriptionTierEnum, Transaction, WebhookEventStatusEnum,
+)
+from app.services import stripe_inbox
+from app.services.stripe_inbox import RETRY_BASE, drain_inbox, record_event
+
+T0 = 1_767_600_000  # Stripe event times (unix seconds)
+
+
+def _event(event_id: str, event_type: str, data: dict, created: int = T0) -> dict:
+    return {"event_id": event_id, "event_type": event_type, "data": data, "created": created}
+
+
+def _subscription_updated(event_id: str, status: str, created: int) -> dict:
+    return _event(event_id, "customer.subscription.updated", {"id": "sub_1", "status": status}, created)
+
+
+@pytest.fixture
+def booking(db, make_profile):
+    mentor_id, _ = make_profile("mentor@example.com", is_mentor=True)
+    mentee_id, _ = make_profile("mentee@example.com")
+    booking = Booking(
+        mentor_id=mentor_id, mentee_id=mentee_id, scheduled_at=dt.datetime(2026, 1, 5, 10),
+        duration_minutes=60, status=BookingStatusEnum.pending, price=Decimal("60.00"),
+    )
+    db.add(booking)
+    db.flush()
+    db.add(Transaction(
+        booking_id=booking.id, amount=Decimal("60.00"), platform_fee=Decimal("6.00"),
+        mentor_payout=Decimal("54.00"), status=PaymentStatusEnum.pending,
+    ))
+    db.commit()
+    return booking
+
+
+@pytest.fixture
+def subscription(db, booking):
+    subscription = Subscription(
+        mentee_id=booking.mentee_id, mentor_id=booking.mentor_id, tier=SubscriptionTierEnum.basic,
+        price=Decimal("100.00"), status=SubscriptionStatusEnum.active, stripe_subscription_id="sub_1",
+    )
+    db.add(subscription)
+    db.commit()
+    return subscription
+
+
+def _checkout_completed(booking: Booking) -> dict:
+    return _event("evt_checkout", "checkout.session.completed", {
+        "id": "cs_1", "payment_intent": "pi_1", "metadata": {"booking_id": str(booking.id)},
+    })
+
+
+def _statuses(db) -> dict:
+    db.expire_all()
+    return {event.id: event.status for event in db.query(StripeEvent)}
+
+
+def test_replaying_an_event_is_a_no_op(db, booking):
+    event = _checkout_completed(booking)
+    assert record_event(db, event)
+    assert not record_event(db, event)
+    assert drain_inbox(db) == 1
+
+    # The user cancels; a replay of the old event must not confirm the booking again
+    booking.status = BookingStatusEnum.cancelled
+    db.commit()
+    assert not record_event(db, event)
+    assert drain_inbox(db) == 0
+
+    db.expire_all()
+    assert booking.status == BookingStatusEnum.cancelled
+    assert booking.transaction.status == PaymentStatusEnum.completed
+    assert db.query(StripeEvent).count() == 1
+
+
+def test_events_of_an_object_apply_in_creation_order(db, subscription):
+    # Delivered out of order: the cancellation was created after the renewal
+    record_event(db, _subscription_updated("evt_cancel", "canceled", created=T0 + 10))
+    record_event(db, _subscription_updated("evt_renew", "active", created=T0))
+
+    assert drain_inbox(db) == 2
+    db.expire_all()
+    assert subscription.status == SubscriptionStatusEnum.cancelled
+
+
+def test_late_older_event_is_superseded(db, subscription):
+    record_event(db, _subscription_updated("evt_cancel", "canceled", created=T0 + 10))
+    assert drain_inbox(db) == 1
+
+    record_event(db, _subscription_updated("evt_renew", "active", created=T0))
+    assert drain_inbox(db) == 0
+
+    assert _statuses(db) == {
+        "evt_cancel": WebhookEventStatusEnum.processed, "evt_renew": WebhookEventStatusEnum.superseded,
+    }
+    db.expire_all()
+    assert subscription.status == SubscriptionStatusEnum.cancelled
+
+
+def test_failed_event_is_retried_with_backoff_and_blocks_later_ones(db, subscription, monkeypatch):
+    calls = []
+
+    def flaky(db, data):
+        calls.append(data["status"])
+        if len(calls) == 1:
+            raise RuntimeError("database hiccup")
+        stripe_inbox._subscription_changed(db, data)
+
+    monkeypatch.setitem(stripe_inbox.HANDLERS, "customer.subscription.updated", flaky)
+    record_event(db, _subscription_updated("evt_renew", "active", created=T0))
+    record_event(db, _subscription_updated("evt_cancel", "canceled", created=T0 + 10))
+
+    started = dt.datetime.utcnow()
+    assert drain_inbox(db) == 0
+    db.expire_all()
+    failed = db.get(StripeEvent, "evt_renew")
+    assert (failed.status, failed.attempts) == (WebhookEventStatusEnum.pending, 1)
+    assert failed.last_error == "RuntimeError: database hiccup"
+    assert failed.next_attempt_at >= started + RETRY_BASE
+    # The later event of the same object waits for the retry
+    assert calls == ["active"]
+    assert drain_inbox(db) == 0
+
+    failed.next_attempt_at = started
+    db.commit()
+    assert drain_inbox(db) == 2
+    assert calls == ["active", "active", "canceled"]
+    assert set(_statuses(db).values()) == {WebhookEventStatusEnum.processed}
+    db.expire_all()
+    assert subscription.status == SubscriptionStatusEnum.cancelled
+
+
+def test_event_is_marked_failed_after_max_attempts(db, subscription, monkeypatch):
+    def broken(db, data):
+        raise ValueError("unexpected payload")
+
+    monkeypatch.setitem(stripe_inbox.HANDLERS, "customer.subscription.updated", broken)
+    monkeypatch.setattr(stripe_inbox, "MAX_ATTEMPTS", 2)
+    record_event(db, _subscription_updated("evt_renew", "active", created=T0))
+
+    for _ in range(2):
+        drain_inbox(db)
+        db.expire_all()
+        db.query(StripeEvent).update({StripeEvent.next_attempt_at: dt.datetime.utcnow() - dt.timedelta(seconds=1)})
+        db.commit()
+
+    assert _statuses(db) == {"evt_renew": WebhookEventStatusEnum.failed}
+    assert drain_inbox(db) == 0